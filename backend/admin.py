@@ -3,7 +3,7 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth import get_user_model
 from .models import (
     TableArea, Table, Reservation, PlateCategory, 
-    Plate, Bill, BillPlate
+    Plate, Bill, BillPlate, OutgoingEmail
 )
 
 User = get_user_model()
@@ -75,4 +75,10 @@ class BillPlateAdmin(admin.ModelAdmin):
     list_display = ('id', 'plate', 'account', 'notes')
     list_filter = ('account',)
     search_fields = ('notes',)
-    raw_id_fields = ('plate', 'account')
\ No newline at end of file
+    raw_id_fields = ('plate', 'account')
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'recipient', 'subject', 'state', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('state',)
+    search_fields = ('recipient', 'subject')
@@ -0,0 +1,44 @@
+## Backend de autenticacion con cache del usuario por proceso
+import time
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend, UserModel
+
+# user_id -> (expira, base de datos, valores de los campos). Cada request arma su propia instancia
+_user_cache = {}
+
+
+def forget_cached_user(user_id):
+    """
+    Drop a user from the cache; called from the User post_save/post_delete signals.
+    Queryset updates (User.objects.filter(...).update(...)) send no signal: call it for each user they touch.
+    """
+    _user_cache.pop(user_id, None)
+
+
+def clear_user_cache():
+    _user_cache.clear()
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend whose get_user (run by AuthenticationMiddleware on every request) is served
+    from a short-lived per-process cache, so request.user and its role flags cost no query.
+    Edits and deletes through save()/delete() invalidate the entry in this process; queryset
+    updates bypass the cache (see forget_cached_user). Other processes see changes after
+    USER_CACHE_SECONDS at most.
+    """
+
+    def get_user(self, user_id):
+        ttl = getattr(settings, "USER_CACHE_SECONDS", 30)
+        now = time.monotonic()
+        cached = _user_cache.get(user_id)
+        if cached is not None and cached[0] > now:
+            # Instancia nueva desde los valores: no comparte _state ni relaciones cacheadas con otros requests
+            _, db, values = cached
+            return UserModel.from_db(db, [field.attname for field in UserModel._meta.concrete_fields], values)
+
+        user = super().get_user(user_id)
+        if user is not None and ttl > 0:
+            values = [getattr(user, field.attname) for field in user._meta.concrete_fields]
+            _user_cache[user_id] = (now + ttl, user._state.db, values)
+        return user
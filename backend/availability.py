@@ -0,0 +1,166 @@
+## Disponibilidad de mesas para reservaciones
+# Cada mesa tiene una lista ordenada de intervalos ocupados (reservaciones y cuentas abiertas),
+# asi una consulta "¿hay mesa para N personas a las HH:MM?" es una busqueda binaria por mesa
+from bisect import bisect_left, insort
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+
+from backend.models import Bill, Reservation, Table
+from backend.restaurant_time import get_restaurant_tz, restaurant_day_bounds
+# Reservaciones que todavia ocupan (o van a ocupar) una mesa
+BLOCKING_RESERVATION_STATES = ("active", "in_course")
+
+
+def get_seating_duration():
+    return timedelta(minutes=getattr(settings, "RESERVATION_SEATING_MINUTES", 120))
+
+
+def get_day_slots(day):
+    """Aware datetimes (restaurant time) at which a reservation can start on the given date."""
+    opening = time.fromisoformat(getattr(settings, "RESTAURANT_OPENING_TIME", "13:00"))
+    last_seating = time.fromisoformat(getattr(settings, "RESTAURANT_LAST_SEATING_TIME", "22:00"))
+    step = timedelta(minutes=getattr(settings, "RESERVATION_SLOT_MINUTES", 30))
+
+    restaurant_tz = get_restaurant_tz()
+    slot = datetime.combine(day, opening, tzinfo=restaurant_tz)
+    end = datetime.combine(day, last_seating, tzinfo=restaurant_tz)
+    slots = []
+    while slot <= end:
+        slots.append(slot)
+        slot += step
+    return slots
+
+
+class TableSchedule:
+    """Busy intervals of one table, kept sorted by start. Overlapping bookings are merged."""
+
+    def __init__(self, table):
+        self.table = table
+        self.starts = []
+        self.ends = []
+
+    def is_free(self, start, end):
+        i = bisect_left(self.starts, start)
+        # El intervalo anterior debe terminar antes de que empiece este, y el siguiente empezar despues
+        if i > 0 and self.ends[i - 1] > start:
+            return False
+        if i < len(self.starts) and self.starts[i] < end:
+            return False
+        return True
+
+    def book(self, start, end):
+        i = bisect_left(self.starts, start)
+        if i > 0 and self.ends[i - 1] >= start:
+            i -= 1
+            start = self.starts[i]
+        j = i
+        while j < len(self.starts) and self.starts[j] <= end:
+            end = max(end, self.ends[j])
+            j += 1
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+
+class AvailabilityIndex:
+    """
+    In-memory interval index of a restaurant day.
+    Tables are grouped by area and sorted by capacity, so the first free table found for a
+    party is also the smallest one that fits it.
+    Reservations that already have a table block it; the rest are placed best-fit in
+    date order (in their preferred area when they have one), the same way a host would seat them.
+    """
+
+    def __init__(self, tables, duration):
+        self.duration = duration
+        self.schedules = {}
+        # area_id -> [(capacity, table_id)] ordenado, None = todas las areas
+        self.by_area = {None: []}
+        # reservation_id -> mesa sugerida, para el plan del dia
+        self.assignments = {}
+        self.unplaced = []
+        for table in tables:
+            self.schedules[table.id] = TableSchedule(table)
+            insort(self.by_area[None], (table.capacity, table.id))
+            insort(self.by_area.setdefault(table.area_id, []), (table.capacity, table.id))
+
+    @classmethod
+    def for_day(cls, day):
+        """Build the index of a restaurant-local date with three queries."""
+        duration = get_seating_duration()
+        day_start, day_end = restaurant_day_bounds(day)
+
+        index = cls(Table.objects.only("id", "code", "capacity", "area_id").order_by("id"), duration)
+
+        # Cuentas abiertas: la mesa esta ocupada al menos un turno desde que se abrio la cuenta
+        current_bills = Bill.objects.filter(state="current", table__isnull=False).values_list("table_id", "date_time")
+        for table_id, opened_at in current_bills:
+            index.block(table_id, opened_at, max(opened_at + duration, datetime.now(get_restaurant_tz())))
+
+        reservations = Reservation.objects.filter(
+            state__in=BLOCKING_RESERVATION_STATES,
+            date_time__gte=day_start - duration,
+            date_time__lt=day_end,
+        ).values_list("id", "table_id", "table_area_id", "amount_people", "date_time").order_by("date_time", "id")
+        # Primero las que ya tienen mesa, despues las demas en orden de llegada
+        reservations = sorted(reservations, key=lambda row: row[1] is None)
+        for reservation_id, table_id, area_id, amount_people, date_time in reservations:
+            if table_id is not None:
+                index.block(table_id, date_time, date_time + duration)
+                continue
+            table = index.seat(date_time, amount_people, area_id)
+            if table is None:
+                index.unplaced.append(reservation_id)
+            else:
+                index.assignments[reservation_id] = table
+        return index
+
+    def block(self, table_id, start, end):
+        schedule = self.schedules.get(table_id)
+        if schedule is not None:
+            schedule.book(start, end)
+
+    def find_table(self, start, amount_people, area_id=None):
+        """Smallest table (in the area if given) with room for the party for a whole seating, or None."""
+        end = start + self.duration
+        candidates = self.by_area.get(area_id, [])
+        for i in range(bisect_left(candidates, (amount_people, 0)), len(candidates)):
+            schedule = self.schedules[candidates[i][1]]
+            if schedule.is_free(start, end):
+                return schedule.table
+        return None
+
+    def seat(self, start, amount_people, area_id=None):
+        """
+        Book the best table for a party and return it. A preferred area that is full
+        falls back to any area, like the waiters do.
+        """
+        table = self.find_table(start, amount_people, area_id)
+        if table is None and area_id is not None:
+            table = self.find_table(start, amount_people)
+        if table is not None:
+            self.schedules[table.id].book(start, start + self.duration)
+        return table
+
+    def open_slots(self, day, amount_people, area_id=None):
+        """Every slot of the day with whether the party fits (slots already past are closed)."""
+        now = datetime.now(get_restaurant_tz())
+        return [
+            (slot, slot > now and self.find_table(slot, amount_people, area_id) is not None)
+            for slot in get_day_slots(day)
+        ]
+
+
+def find_best_available_table(amount_people, area_id=None):
+    """
+    Smallest table that is free right now and fits the party, preferring the given area.
+    One query; used to seat a reservation when the waiter doesn't pick a table.
+    """
+    tables = Table.objects.filter(state="available", capacity__gte=amount_people)
+    if area_id is not None:
+        tables = tables.annotate(
+            other_area=Case(When(area_id=area_id, then=Value(0)), default=Value(1), output_field=IntegerField())
+        ).order_by("other_area", "capacity", "id")
+    else:
+        tables = tables.order_by("capacity", "id")
+    return tables.first()
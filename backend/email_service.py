@@ -1,6 +1,108 @@
-from django.core.mail import send_mail
+from datetime import timedelta
+from django.core.mail import EmailMessage, get_connection
 from django.contrib.sites.shortcuts import get_current_site
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from backend.models import OutgoingEmail
+
+
+def queue_email(subject, message, recipient):
+    """Save an email in the outbox. Sending it is the job of the send_outbox_emails command."""
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "noreply@dinely.com"),
+        recipient=recipient,
+    )
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff: base, 2*base, 4*base... seconds after each failed attempt."""
+    base = getattr(settings, "OUTBOX_RETRY_BASE_SECONDS", 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def claim_pending_emails(batch_size):
+    """
+    Take a batch of due outbox emails in a short transaction: their next_attempt_at moves
+    OUTBOX_LEASE_SECONDS ahead (a lease) and the attempt is counted, so no other worker picks them
+    while they're being sent, and a worker that dies mid-batch only delays them until the lease ends.
+    """
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "OUTBOX_LEASE_SECONDS", 300))
+
+    with transaction.atomic():
+        # skip_locked deja que varios workers reclamen a la vez sin tomar el mismo correo
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(state=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(
+                next_attempt_at=now + lease, attempts=F("attempts") + 1,
+            )
+    for email in emails:
+        email.attempts += 1
+    return emails
+
+
+def _record_result(email, error, max_attempts):
+    """Save how one send went with its own short UPDATE (autocommit, no lock held while sending)."""
+    if error is None:
+        changes = {"state": OutgoingEmail.SENT, "sent_at": timezone.now(), "last_error": ""}
+    elif email.attempts >= max_attempts:
+        changes = {"state": OutgoingEmail.FAILED, "last_error": str(error)}
+    else:
+        changes = {"next_attempt_at": timezone.now() + get_retry_delay(email.attempts), "last_error": str(error)}
+    OutgoingEmail.objects.filter(id=email.id).update(**changes)
+
+
+def send_pending_emails(batch_size=None):
+    """
+    Send one batch of due outbox emails over a single connection of the configured EMAIL_BACKEND.
+    The batch is claimed first (claim_pending_emails) and sent outside any transaction, so a slow
+    SMTP server never holds a database lock. Failed emails are retried later with backoff,
+    and marked failed after OUTBOX_MAX_ATTEMPTS. Returns (sent, failed) counts for the batch.
+    """
+    batch_size = batch_size or getattr(settings, "OUTBOX_BATCH_SIZE", 50)
+    max_attempts = getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    sent = failed = 0
+
+    emails = claim_pending_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        connection_error = None
+    except Exception as e:
+        connection_error = e
+
+    try:
+        for email in emails:
+            error = connection_error
+            if error is None:
+                message = EmailMessage(email.subject, email.body, email.from_email, [email.recipient], connection=connection)
+                try:
+                    message.send()
+                except Exception as e:
+                    error = e
+
+            _record_result(email, error, max_attempts)
+            if error is None:
+                sent += 1
+            else:
+                failed += 1
+    finally:
+        if connection_error is None:
+            connection.close()
+
+    return sent, failed
 
 
 def send_password_setup_email(user, uid, token, request):
@@ -36,19 +138,9 @@ def send_password_setup_email(user, uid, token, request):
         El equipo de Dinely
         """
     
-    # Enviar email
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@dinely.com',
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error al enviar email: {str(e)}")
-        return False
+    # Se guarda en el outbox, el comando send_outbox_emails lo envia
+    queue_email(subject, message, user.email)
+    return True
 
 
 def send_email_validation_email(user, code, request):
@@ -83,17 +175,7 @@ def send_email_validation_email(user, code, request):
         El equipo de Dinely
         """
     
-    # Enviar email
-    try:
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL if hasattr(settings, 'DEFAULT_FROM_EMAIL') else 'noreply@dinely.com',
-            recipient_list=[user.email],
-            fail_silently=False,
-        )
-        return True
-    except Exception as e:
-        print(f"Error al enviar email: {str(e)}")
-        return False
+    # Se guarda en el outbox, el comando send_outbox_emails lo envia
+    queue_email(subject, message, user.email)
+    return True
 
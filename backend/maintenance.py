@@ -0,0 +1,76 @@
+## Mantenimiento periodico (python manage.py dinely_maintenance)
+# Borra filas que ya no sirven en lotes pequenos, para no bloquear la base de datos con un DELETE enorme,
+# y despues compacta/actualiza las estadisticas de las tablas afectadas
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from backend.models import EmailValidationCode, KitchenEvent, OutgoingEmail
+
+
+def get_purge_querysets(now=None):
+    """Name -> queryset of the rows that can be deleted at now."""
+    now = now or timezone.now()
+    kitchen_days = getattr(settings, "KITCHEN_EVENT_RETENTION_DAYS", 7)
+    outbox_days = getattr(settings, "OUTBOX_RETENTION_DAYS", 30)
+    return {
+        "email_validation_codes": EmailValidationCode.objects.filter(Q(is_used=True) | Q(expires_at__lt=now)),
+        "sessions": Session.objects.filter(expire_date__lt=now),
+        "kitchen_events": KitchenEvent.objects.filter(created_at__lt=now - timedelta(days=kitchen_days)),
+        # Los pendientes se quedan aunque sean viejos, todavia se pueden enviar
+        "outgoing_emails": OutgoingEmail.objects.filter(
+            state__in=[OutgoingEmail.SENT, OutgoingEmail.FAILED],
+            created_at__lt=now - timedelta(days=outbox_days),
+        ),
+    }
+
+
+def purge_in_batches(queryset, batch_size=None):
+    """Delete the rows of queryset batch_size primary keys at a time. Returns the number of rows deleted."""
+    batch_size = batch_size or getattr(settings, "MAINTENANCE_BATCH_SIZE", 1000)
+    model = queryset.model
+    deleted = 0
+    while True:
+        # Cada lote es su propia transaccion (autocommit) y solo bloquea esas filas
+        keys = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        model.objects.filter(pk__in=keys).delete()
+        deleted += len(keys)
+
+
+def compact_database(models):
+    """
+    VACUUM + ANALYZE after a purge. SQLite can only vacuum the whole file;
+    PostgreSQL vacuums just the given tables. Must run outside a transaction.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("VACUUM")
+            cursor.execute("ANALYZE")
+        elif connection.vendor == "postgresql":
+            for model in models:
+                cursor.execute(f"VACUUM (ANALYZE) {connection.ops.quote_name(model._meta.db_table)}")
+
+
+def run_maintenance(batch_size=None, vacuum=True):
+    """
+    Purge every queryset of get_purge_querysets and compact the database.
+    Returns {name: (rows deleted, seconds)}, with "vacuum" timed too when it runs.
+    """
+    report = {}
+    querysets = get_purge_querysets()
+    for name, queryset in querysets.items():
+        started = time.perf_counter()
+        deleted = purge_in_batches(queryset, batch_size)
+        report[name] = (deleted, time.perf_counter() - started)
+
+    if vacuum:
+        started = time.perf_counter()
+        compact_database([queryset.model for queryset in querysets.values()])
+        report["vacuum"] = (None, time.perf_counter() - started)
+    return report
@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from backend.models import Bill, BillPlate, Reservation, Review, Table
+from backend.seed import seed_restaurant
+from backend.views.admin.utils import get_waiter_with_least_bills
+
+
+# Indices agregados en 0011_hot_path_indexes (y la cola de cocina), se quitan para comparar
+BENCHMARKED_INDEXES = {
+    Bill: ["bill_table_state_idx", "bill_waiter_state_idx", "bill_current_table_idx", "bill_date_id_idx"],
+    Reservation: ["reservation_state_date_idx", "reservation_email_idx", "reservation_phone_idx", "reservation_date_id_idx"],
+    Review: ["review_created_id_idx"],
+    BillPlate: ["billplate_pending_idx"],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database with a large synthetic restaurant and print EXPLAIN and timings "
+        "for the queries behind every list/lookup view, without and with the hot path indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bills", type=int, default=50000)
+        parser.add_argument("--reservations", type=int, default=50000)
+        parser.add_argument("--repeat", type=int, default=20, help="Times each query is run for the timing")
+
+    def handle(self, *args, **options):
+        # Nunca tocar la base de datos real: se crea una de prueba y se destruye al final
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {options['bills']} bills and {options['reservations']} reservations...")
+            started = time.perf_counter()
+            staff = seed_restaurant(bills=options["bills"], reservations=options["reservations"])
+            self.stdout.write(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+            queries = self.get_queries(staff)
+
+            self.set_indexes(enabled=False)
+            without = self.run_queries(queries, options["repeat"], "WITHOUT hot path indexes")
+            self.set_indexes(enabled=True)
+            with_indexes = self.run_queries(queries, options["repeat"], "WITH hot path indexes")
+
+            self.stdout.write(self.style.MIGRATE_HEADING("Summary (ms per query)"))
+            for name in queries:
+                before, after = without[name], with_indexes[name]
+                speedup = before / after if after else float("inf")
+                self.stdout.write(f"  {name:<40} {before:9.3f} -> {after:9.3f}  ({speedup:.1f}x)")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def get_queries(self, staff):
+        table = staff["tables"][0]
+        waiter = staff["waiters"][0]
+        customer = staff["customers"][0]
+        now = timezone.now()
+        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        some_code = Reservation.objects.values_list("code", flat=True).first()
+
+        return {
+            "get_tables": lambda: Table.objects.with_active_bill_code(),
+            "get_available_tables": lambda: Table.objects.with_active_bill_code().exclude(
+                id__in=Bill.objects.filter(state="current", table__isnull=False).values_list("table_id", flat=True)
+            ),
+            "get_bills (first page)": lambda: Bill.objects.order_by("-date_time", "-id")[:50],
+            "get_bills (current)": lambda: Bill.objects.filter(state="current"),
+            "active bill of a table": lambda: Bill.objects.filter(table=table, state="current"),
+            "current bills of a waiter": lambda: Bill.objects.filter(waiter=waiter, state="current"),
+            "waiter with least bills": lambda: [get_waiter_with_least_bills()],
+            "kitchen queue": lambda: BillPlate.objects.filter(cooked=False, account__state="current").order_by("id"),
+            "bills changed since": lambda: Bill.objects.filter(updated_at__gte=now - timedelta(minutes=1)),
+            "get_reservations (first page)": lambda: Reservation.objects.order_by("-date_time", "-id")[:50],
+            "waiter reservations of today": lambda: Reservation.objects.filter(
+                state="active", date_time__gte=start_of_day, date_time__lte=start_of_day + timedelta(days=1)
+            ).order_by("date_time"),
+            "reservation by email": lambda: Reservation.objects.filter(email=customer.email, state="active").order_by("-date_time")[:1],
+            "reservation by phone": lambda: Reservation.objects.filter(phone_number=customer.phone_number, state="active").order_by("-date_time")[:1],
+            "reservation by code": lambda: Reservation.objects.filter(code=some_code),
+            "user has reviewed": lambda: Review.objects.filter(user=customer)[:1],
+            "get_reviews (first page)": lambda: Review.objects.order_by("-created_at", "-id")[:20],
+        }
+
+    def set_indexes(self, enabled):
+        with connection.schema_editor() as schema_editor:
+            for model, names in BENCHMARKED_INDEXES.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        if enabled:
+                            schema_editor.add_index(model, index)
+                        else:
+                            schema_editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def run_queries(self, queries, repeat, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        timings = {}
+        for name, build in queries.items():
+            queryset = build()
+            plan = queryset.explain() if hasattr(queryset, "explain") else "(python, see timing)"
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(build())
+            timings[name] = (time.perf_counter() - started) * 1000 / repeat
+
+            self.stdout.write(f"\n{name}: {timings[name]:.3f} ms")
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+        self.stdout.write("")
+        return timings
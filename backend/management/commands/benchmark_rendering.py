@@ -0,0 +1,62 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+
+from backend.models import Bill, Table
+from backend.seed import seed_restaurant
+from backend.serializers.bills import ReadBillSerializer
+from backend.serializers.tables import ReadTableSerializer
+from backend.views import rendering
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare the Read*Serializer + JsonResponse path against "
+        "the .values() builders + orjson path used by get_bills and get_tables (MB/s of JSON)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bills", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **options):
+        # Nunca tocar la base de datos real: se crea una de prueba y se destruye al final
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.stdout.write(f"Seeding {options['bills']} bills...")
+            seed_restaurant(bills=options["bills"], reservations=0)
+            self.stdout.write(f"orjson: {'yes' if rendering.orjson is not None else 'no (stdlib json)'}\n")
+
+            paths = {
+                "bills: ReadBillSerializer": lambda: self.encode_serializer(
+                    ReadBillSerializer(Bill.objects.with_related(), many=True).data
+                ),
+                "bills: values + builders": lambda: rendering.dumps(
+                    rendering.build_bills(rendering.bill_values(Bill.objects.all()))
+                ),
+                "tables: ReadTableSerializer": lambda: self.encode_serializer(
+                    ReadTableSerializer(Table.objects.with_active_bill_code(), many=True).data
+                ),
+                "tables: values + builders": lambda: rendering.dumps(
+                    rendering.build_tables(rendering.table_values(Table.objects.all()))
+                ),
+            }
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{'path':<32} {'ms':>10} {'KB':>10} {'MB/s':>10}"))
+            for name, render in paths.items():
+                body = render()
+                started = time.perf_counter()
+                for _ in range(options["repeat"]):
+                    render()
+                elapsed = (time.perf_counter() - started) / options["repeat"]
+                self.stdout.write(
+                    f"{name:<32} {elapsed * 1000:10.1f} {len(body) / 1024:10.1f} {len(body) / elapsed / 1e6:10.2f}"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def encode_serializer(self, data):
+        # Lo mismo que hace JsonResponse
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
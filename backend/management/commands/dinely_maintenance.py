@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+
+from backend.maintenance import run_maintenance
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete used/expired email validation codes, expired sessions, old kitchen events and old sent "
+        "outbox emails in batches, then VACUUM/ANALYZE the database. Meant to run from cron (e.g. nightly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows deleted per statement")
+        parser.add_argument("--no-vacuum", action="store_true", help="Only purge, skip VACUUM/ANALYZE")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = run_maintenance(options["batch_size"], vacuum=not options["no_vacuum"])
+
+        for name, (deleted, seconds) in report.items():
+            rows = "" if deleted is None else f"{deleted} rows deleted, "
+            self.stdout.write(f"{name}: {rows}{seconds * 1000:.0f} ms")
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.2f} s"))
@@ -0,0 +1,34 @@
+import time
+from django.core.management.base import BaseCommand
+
+from backend.email_service import send_pending_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the emails queued in the outbox (OutgoingEmail) in batches over one connection. "
+        "Runs forever polling for new emails unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send everything that is due and exit")
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--interval", type=float, default=5, help="Seconds to wait when the outbox is empty")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        try:
+            while True:
+                sent, failed = send_pending_emails(options["batch_size"])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}")
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} sent, {total_failed} failed"))
@@ -0,0 +1,71 @@
+## Cache del menu publico (platillos y categorias) con version para ETag
+# La version esta en la base de datos; el cache solo guarda los payloads de cada version
+import json
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+
+from backend.models import MenuVersion
+
+MENU_VERSION_KEY = "menu:version"
+MENU_VERSION_ID = 1
+
+
+def get_menu_version():
+    """
+    Current menu version. It lives in the database, so a bump made by one worker is seen by all of them;
+    with a shared cache (CACHE_IS_SHARED) it's also kept there and read without a query.
+    """
+    shared = getattr(settings, "CACHE_IS_SHARED", False)
+    if shared:
+        version = cache.get(MENU_VERSION_KEY)
+        if version is not None:
+            return version
+
+    version = MenuVersion.objects.get_or_create(id=MENU_VERSION_ID, defaults={"version": uuid.uuid4().hex})[0].version
+    if shared:
+        # add() no pisa una version nueva que otro proceso acabe de poner
+        cache.add(MENU_VERSION_KEY, version, None)
+    return version
+
+
+def invalidate_menu():
+    """Bump the menu version; cached payloads of older versions are never read again."""
+    version = uuid.uuid4().hex
+    if not MenuVersion.objects.filter(id=MENU_VERSION_ID).update(version=version):
+        MenuVersion.objects.get_or_create(id=MENU_VERSION_ID, defaults={"version": version})
+    if getattr(settings, "CACHE_IS_SHARED", False):
+        # Despues del commit, para que nadie lea del cache una version que todavia no existe
+        transaction.on_commit(lambda: cache.set(MENU_VERSION_KEY, version, None))
+
+
+def cached_menu_response(request, name, build_payload):
+    """
+    Return the JSON response for a menu endpoint from the cache.
+    The ETag is the menu version, so a client sending it back in If-None-Match gets
+    304 Not Modified without the menu being queried or serialized.
+    build_payload is only called when the payload of the current version isn't cached.
+    """
+    version = get_menu_version()
+    etag = f'"{name}-{version}"'
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    if etag in [value.strip() for value in if_none_match.split(",")]:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    key = f"menu:{name}:{version}"
+    body = cache.get(key)
+    if body is None:
+        body = json.dumps(build_payload(), cls=DjangoJSONEncoder).encode()
+        cache.set(key, body, getattr(settings, "MENU_CACHE_SECONDS", 60 * 60 * 24))
+
+    response = HttpResponse(body, content_type="application/json", status=200)
+    response["ETag"] = etag
+    # El navegador siempre revalida con el ETag, asi nunca muestra un menu viejo
+    response["Cache-Control"] = "no-cache"
+    return response
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_add_cooked_fields_to_billplate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KitchenEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=32)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bill_plate', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='kitchen_events', to='backend.billplate')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_kitchenevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billplate',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='billplate',
+            index=models.Index(condition=models.Q(('cooked', False)), fields=['account'], name='billplate_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:38
+
+import random
+import string
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def regenerate_duplicate_codes(apps, schema_editor):
+    """Give a new code to every duplicated bill/reservation code so the unique index can be created."""
+    characters = string.ascii_uppercase + string.digits
+
+    for model_name, prefix in (("Bill", "CUE"), ("Reservation", "RES")):
+        model = apps.get_model("backend", model_name)
+        used = set(model.objects.values_list("code", flat=True))
+        duplicated = (
+            model.objects.values("code").annotate(total=Count("id")).filter(total__gt=1).values_list("code", flat=True)
+        )
+        for code in list(duplicated):
+            # El primero conserva su codigo
+            for instance in model.objects.filter(code=code).order_by("id")[1:]:
+                new_code = code
+                while new_code in used:
+                    new_code = f"{prefix}-{''.join(random.choices(characters, k=6))}"
+                used.add(new_code)
+                instance.code = new_code
+                instance.save(update_fields=["code"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_updated_at_deletedrecord'),
+    ]
+
+    operations = [
+        migrations.RunPython(regenerate_duplicate_codes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='bill',
+            name='code',
+            field=models.CharField(max_length=16, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='reservation',
+            name='code',
+            field=models.CharField(max_length=16, unique=True),
+        ),
+    ]
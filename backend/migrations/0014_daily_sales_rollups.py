@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('bills', models.PositiveIntegerField(default=0)),
+                ('covers', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('paid', models.FloatField(default=0)),
+                ('tips', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bill',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyAreaSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bills', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('area', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='backend.tablearea')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'area'), name='daily_area_sales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPlateSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('plate', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to='backend.plate')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'plate'), name='daily_plate_sales_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyWaiterSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bills', models.PositiveIntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('tips', models.FloatField(default=0)),
+                ('waiter', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='daily_sales', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'waiter'), name='daily_waiter_sales_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_review_summary(apps, schema_editor):
+    Review = apps.get_model("backend", "Review")
+    ReviewSummary = apps.get_model("backend", "ReviewSummary")
+    scores = range(1, 6)
+    totals = Review.objects.aggregate(
+        reviews=Count("id"),
+        scored=Count("id", filter=Q(score__in=scores)),
+        score_total=Sum("score", filter=Q(score__in=scores), default=0),
+        **{f"score_{score}": Count("id", filter=Q(score=score)) for score in scores},
+    )
+    ReviewSummary.objects.create(id=1, **totals)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_daily_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('scored', models.PositiveIntegerField(default=0)),
+                ('score_total', models.PositiveIntegerField(default=0)),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_review_summary, migrations.RunPython.noop),
+    ]
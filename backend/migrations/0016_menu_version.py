@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:31
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_menu_version(apps, schema_editor):
+    MenuVersion = apps.get_model("backend", "MenuVersion")
+    MenuVersion.objects.get_or_create(id=1, defaults={"version": uuid.uuid4().hex})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_review_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32)),
+            ],
+        ),
+        migrations.RunPython(create_menu_version, migrations.RunPython.noop),
+    ]
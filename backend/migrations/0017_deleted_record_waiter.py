@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_menu_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletedrecord',
+            name='waiter_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:52
+
+from django.db import migrations, models
+
+ROLLUPS = {
+    "DailyWaiterSales": ("waiter", ["bills", "revenue", "tips"]),
+    "DailyPlateSales": ("plate", ["quantity", "revenue"]),
+    "DailyAreaSales": ("area", ["bills", "revenue"]),
+}
+
+
+def merge_duplicate_null_rows(apps, schema_editor):
+    # Las filas (dia, NULL) repetidas que dejo borrar varios meseros/platillos/areas se juntan en una
+    for model_name, (field, amounts) in ROLLUPS.items():
+        model = apps.get_model("backend", model_name)
+        kept = {}
+        for row in model.objects.filter(**{field: None}).order_by("id"):
+            first = kept.setdefault(row.day, row)
+            if first is row:
+                continue
+            for name in amounts:
+                setattr(first, name, getattr(first, name) + getattr(row, name))
+            first.save(update_fields=amounts)
+            row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_deleted_record_waiter'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_null_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyareasales',
+            constraint=models.UniqueConstraint(condition=models.Q(('area', None)), fields=('day',), name='daily_area_sales_unique_null'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyplatesales',
+            constraint=models.UniqueConstraint(condition=models.Q(('plate', None)), fields=('day',), name='daily_plate_sales_unique_null'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailywaitersales',
+            constraint=models.UniqueConstraint(condition=models.Q(('waiter', None)), fields=('day',), name='daily_waiter_sales_unique_null'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+from django.db import migrations
+
+
+def backfill_sales_rollups(apps, schema_editor):
+    # Sin esto el reporte de ventas sale vacio hasta correr backfill_sales_rollups a mano
+    from backend.reports import rebuild_sales_rollups
+
+    rebuild_sales_rollups(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0018_daily_sales_unique_null'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_sales_rollups, migrations.RunPython.noop),
+    ]
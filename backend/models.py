@@ -71,15 +71,37 @@ class User(AbstractUser):
 class TableArea(models.Model):
     label = models.CharField(max_length=64, unique=True)
 
+class TableQuerySet(models.QuerySet):
+    def with_active_bill_code(self):
+        """
+        Annotate each table with the code of its current bill (or None) and join its area,
+        so ReadTableSerializer can render a list of tables with a constant number of queries.
+        """
+        active_bills = Bill.objects.filter(table=models.OuterRef("pk"), state="current")
+        return self.select_related("area").annotate(
+            active_bill_code=models.Subquery(active_bills.values("code")[:1])
+        )
+
 class Table(models.Model):
     code = models.CharField(max_length=64, unique=True)
     capacity = models.PositiveIntegerField()
     state = models.CharField(max_length=64)
     area = models.ForeignKey(TableArea, on_delete=models.SET_NULL, related_name="tables", null=True)
     notes = models.CharField(max_length=2048, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = TableQuerySet.as_manager()
+
     class Meta:
         ordering = ["area"]
 
+class ReservationQuerySet(models.QuerySet):
+    def with_related(self):
+        """Load the nested table (with its area and active bill code) in one extra query."""
+        return self.prefetch_related(
+            models.Prefetch("table", queryset=Table.objects.with_active_bill_code())
+        )
+
 class Reservation(models.Model):
     client = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="reservations", null=True, blank=True)
     # Tenemos informacion del cliente aqui directo por si hace una reservacion sin cuenta (mayoria de los casos)
@@ -88,12 +110,27 @@ class Reservation(models.Model):
     email = models.CharField(max_length=64, null=True, blank=True)
     phone_number = models.CharField(max_length=16, null=True, blank=True)
 
-    code = models.CharField(max_length=16) # RES-######
+    code = models.CharField(max_length=16, unique=True) # RES-######
     date_time = models.DateTimeField()
     table = models.ForeignKey(Table, on_delete=models.SET_NULL, related_name="reservations", null=True)
+    # Area que pidio el cliente, la mesa se asigna despues dentro de esta area
+    table_area = models.ForeignKey(TableArea, on_delete=models.SET_NULL, related_name="reservations", null=True, blank=True)
     amount_people = models.PositiveIntegerField()
     state = models.CharField(max_length=64)
     notes = models.CharField(max_length=2048, null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ReservationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Reservaciones del dia por estado (mesero) y busquedas del cliente por email/telefono
+            models.Index(fields=["state", "date_time"], name="reservation_state_date_idx"),
+            models.Index(fields=["email", "state", "date_time"], name="reservation_email_idx"),
+            models.Index(fields=["phone_number", "state", "date_time"], name="reservation_phone_idx"),
+            # Orden de la paginacion por cursor
+            models.Index(fields=["date_time", "id"], name="reservation_date_id_idx"),
+        ]
 
 #Asi el restaurante puede tener varios categorias y nos facilita obtener cuales son los categorias disponibles
 class PlateCategory(models.Model):
@@ -108,8 +145,19 @@ class Plate(models.Model):
     class Meta:
         ordering = ["category__label", "name"]
 
+class BillQuerySet(models.QuerySet):
+    def with_related(self):
+        """
+        Load everything ReadBillSerializer nests (waiter, table, plates and their categories)
+        up front, so serializing many bills doesn't run queries per row.
+        """
+        return self.select_related("waiter").prefetch_related(
+            models.Prefetch("table", queryset=Table.objects.with_active_bill_code()),
+            "plates__plate__category",
+        )
+
 class Bill(models.Model):
-    code = models.CharField(max_length=16) # CUE-######
+    code = models.CharField(max_length=16, unique=True) # CUE-######
     table = models.ForeignKey(Table, on_delete=models.SET_NULL, related_name="accounts", null=True)
     waiter = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="accounts", null=True)
     date_time = models.DateTimeField(auto_now_add=True)
@@ -117,6 +165,22 @@ class Bill(models.Model):
     total = models.FloatField(default=0)
     total_paid = models.FloatField(default=0)
     tip = models.IntegerField(default=0)
+    # Cuando se cerro la cuenta, el dia del reporte de ventas sale de aqui
+    closed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = BillQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Cuenta activa de una mesa / de un mesero
+            models.Index(fields=["table", "state"], name="bill_table_state_idx"),
+            models.Index(fields=["waiter", "state"], name="bill_waiter_state_idx"),
+            # Solo las cuentas abiertas, siempre pocas aunque el historial crezca
+            models.Index(fields=["table"], condition=models.Q(state="current"), name="bill_current_table_idx"),
+            # Orden de la paginacion por cursor
+            models.Index(fields=["date_time", "id"], name="bill_date_id_idx"),
+        ]
 
 #Tabla de union entre cuentas y platos, es para tener varios platos en una cuenta
 class BillPlate(models.Model):
@@ -125,6 +189,43 @@ class BillPlate(models.Model):
     notes = models.CharField(max_length=1024)
     cooked = models.BooleanField(default=False)
     cooked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Cola de cocina: solo los platillos sin cocinar, que siempre son pocos
+            models.Index(fields=["account"], condition=models.Q(cooked=False), name="billplate_pending_idx"),
+        ]
+
+
+#Registro de cambios de platillos para la pantalla de cocina, el id sirve como id del evento (Last-Event-ID)
+class KitchenEvent(models.Model):
+    PLATE_ADDED = "plate_added"
+    PLATE_COOKED = "plate_cooked"
+    PLATE_UNCOOKED = "plate_uncooked"
+
+    kind = models.CharField(max_length=32)
+    bill_plate = models.ForeignKey(BillPlate, on_delete=models.SET_NULL, related_name="kitchen_events", null=True)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+
+#Registro de objetos eliminados, para que los clientes que sincronizan con since= sepan que borrar
+class DeletedRecord(models.Model):
+    model = models.CharField(max_length=64) # app_label.modelname
+    object_id = models.BigIntegerField()
+    # Mesero de la cuenta (tambien para sus platillos): cada mesero solo sincroniza lo suyo
+    waiter_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "deleted_at"]),
+        ]
 
 
 class Review(models.Model):
@@ -140,10 +241,32 @@ class Review(models.Model):
     
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Orden de la paginacion por cursor (user ya tiene indice por ser ForeignKey)
+            models.Index(fields=["created_at", "id"], name="review_created_id_idx"),
+        ]
         verbose_name = "Review"
         verbose_name_plural = "Reviews"
 
 
+#Resumen de calificaciones (una sola fila): se suma al crear cada review (backend/review_summary.py)
+class ReviewSummary(models.Model):
+    reviews = models.PositiveIntegerField(default=0)
+    # Solo las reviews con calificacion cuentan para el promedio
+    scored = models.PositiveIntegerField(default=0)
+    score_total = models.PositiveIntegerField(default=0)
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+
+
+#Version del menu publico (una sola fila): cambia con cada edicion de platillos o categorias (backend/menu_cache.py)
+class MenuVersion(models.Model):
+    version = models.CharField(max_length=32)
+
+
 class EmailValidationCode(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="email_validation_codes")
     code = models.UUIDField(unique=True, default=uuid.uuid4, editable=False)
@@ -168,3 +291,84 @@ class EmailValidationCode(models.Model):
     def is_valid(self):
         """Check if the code is valid (not expired and not used)"""
         return not self.is_expired() and not self.is_used
+
+
+#Correos por enviar, los views solo escriben aqui y el comando send_outbox_emails los envia
+class OutgoingEmail(models.Model):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+    subject = models.CharField(max_length=256)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.CharField(max_length=254)
+    state = models.CharField(max_length=16, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            # El worker solo busca los pendientes cuyo reintento ya toca
+            models.Index(fields=["state", "next_attempt_at"], name="outgoingemail_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipient} ({self.state})"
+
+
+#Reportes: totales por dia que se van sumando al cerrar cada cuenta (backend/reports.py)
+class DailySales(models.Model):
+    day = models.DateField(unique=True)
+    bills = models.PositiveIntegerField(default=0)
+    covers = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+    paid = models.FloatField(default=0)
+    tips = models.FloatField(default=0)
+
+
+class DailyWaiterSales(models.Model):
+    day = models.DateField()
+    waiter = models.ForeignKey(User, on_delete=models.SET_NULL, related_name="daily_sales", null=True)
+    bills = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+    tips = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "waiter"], name="daily_waiter_sales_unique"),
+            # NULL no choca en el indice de arriba: una sola fila por dia para los meseros borrados (reports.fold_rollups_into_null)
+            models.UniqueConstraint(fields=["day"], condition=models.Q(waiter=None), name="daily_waiter_sales_unique_null"),
+        ]
+
+
+class DailyPlateSales(models.Model):
+    day = models.DateField()
+    plate = models.ForeignKey(Plate, on_delete=models.SET_NULL, related_name="daily_sales", null=True)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "plate"], name="daily_plate_sales_unique"),
+            # NULL no choca en el indice de arriba: una sola fila por dia para los platillos borrados
+            models.UniqueConstraint(fields=["day"], condition=models.Q(plate=None), name="daily_plate_sales_unique_null"),
+        ]
+
+
+class DailyAreaSales(models.Model):
+    day = models.DateField()
+    area = models.ForeignKey(TableArea, on_delete=models.SET_NULL, related_name="daily_sales", null=True)
+    bills = models.PositiveIntegerField(default=0)
+    revenue = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "area"], name="daily_area_sales_unique"),
+            # NULL no choca en el indice de arriba: una sola fila por dia para las areas borradas
+            models.UniqueConstraint(fields=["day"], condition=models.Q(area=None), name="daily_area_sales_unique_null"),
+        ]
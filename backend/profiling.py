@@ -0,0 +1,183 @@
+## Perfilado de peticiones (opcional, PROFILING_ENABLED)
+# Por cada vista: tiempo total, numero y tiempo de queries, tamaño de la respuesta y tiempo de serializacion,
+# en histogramas acumulados por proceso que admin/metrics/ expone en formato de texto de Prometheus
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# name -> (help, buckets)
+METRICS = {
+    "dinely_request_duration_seconds": ("Wall time of the request, per view", SECONDS_BUCKETS),
+    "dinely_db_queries": ("Database queries per request, per view", QUERY_BUCKETS),
+    "dinely_db_duration_seconds": ("Time spent in database queries per request, per view", SECONDS_BUCKETS),
+    "dinely_serializer_duration_seconds": ("Time spent serializing per request, per view", SECONDS_BUCKETS),
+    "dinely_response_size_bytes": ("Response body size, per view (streaming responses excluded)", BYTES_BUCKETS),
+}
+
+
+class Histogram:
+    """Cumulative histogram like Prometheus': counts per upper bound, plus sum and count."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (metric, view) -> Histogram
+        self.histograms = {}
+
+    def observe(self, view, values):
+        with self.lock:
+            for metric, value in values.items():
+                histogram = self.histograms.get((metric, view))
+                if histogram is None:
+                    histogram = self.histograms[(metric, view)] = Histogram(METRICS[metric][1])
+                histogram.observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self.lock:
+            for metric, (description, _) in METRICS.items():
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} histogram")
+                for (name, view), histogram in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    label = view.replace("\\", "\\\\").replace('"', '\\"')
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{metric}_bucket{{view="{label}",le="{bound}"}} {count}')
+                    lines.append(f'{metric}_bucket{{view="{label}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{view="{label}"}} {histogram.sum:g}')
+                    lines.append(f'{metric}_count{{view="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+
+_current_profile = ContextVar("dinely_request_profile", default=None)
+
+
+def serializer_timer(function):
+    """Add the time spent in function to the current request's serializer time (nested calls count once)."""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        profile = _current_profile.get()
+        if profile is None or profile.serializer_depth:
+            return function(*args, **kwargs)
+        profile.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.serializer_time += time.perf_counter() - started
+            profile.serializer_depth -= 1
+
+    return wrapper
+
+
+def install_serializer_timer():
+    """Time every DRF serializer's .data. Idempotent."""
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if not getattr(data.fget, "_profiled", False):
+        fget = serializer_timer(data.fget)
+        fget._profiled = True
+        BaseSerializer.data = property(fget)
+
+
+def get_view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return f"{match.func.__module__}.{match.func.__qualname__}"
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in (PROFILING_ENABLED): records every request in the histograms of its view and logs
+    the ones over PROFILING_QUERY_BUDGET queries or PROFILING_LATENCY_BUDGET_MS milliseconds.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timer()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(profile.execute_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        duration = time.perf_counter() - started
+
+        view = get_view_name(request)
+        values = {
+            "dinely_request_duration_seconds": duration,
+            "dinely_db_queries": profile.queries,
+            "dinely_db_duration_seconds": profile.db_time,
+            "dinely_serializer_duration_seconds": profile.serializer_time,
+        }
+        # En streaming el cuerpo se genera despues de la vista, no se puede medir aqui
+        if not response.streaming:
+            values["dinely_response_size_bytes"] = len(response.content)
+        registry.observe(view, values)
+
+        query_budget = getattr(settings, "PROFILING_QUERY_BUDGET", 20)
+        latency_budget = getattr(settings, "PROFILING_LATENCY_BUDGET_MS", 500)
+        if profile.queries > query_budget or duration * 1000 > latency_budget:
+            logger.warning(
+                "Request over budget: %s %s (%s) took %.0f ms with %d queries (%.0f ms in the database)",
+                request.method, request.path, view, duration * 1000, profile.queries, profile.db_time * 1000,
+            )
+        return response
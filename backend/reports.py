@@ -0,0 +1,205 @@
+## Reportes de ventas: tablas con totales por dia (dia, mesero, platillo, area)
+# finalize_bill suma cada cuenta al cerrarla (y se resta antes de reabrirla, editarla o borrarla); rebuild_sales_rollups recalcula un rango desde el historial
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate
+
+from backend.models import (
+    Bill, BillPlate, DailyAreaSales, DailyPlateSales, DailySales, DailyWaiterSales, Reservation,
+)
+from backend.restaurant_time import get_restaurant_tz, restaurant_day_bounds, to_restaurant_time
+
+ROLLUP_MODELS = [DailySales, DailyWaiterSales, DailyPlateSales, DailyAreaSales]
+
+
+def _add_to_rollup(model, keys, **amounts):
+    """
+    Add amounts to the rollup row of keys with an UPDATE ... SET x = x + n, creating the row if needed.
+    Negative amounts (taking something back out) only touch a row that already exists.
+    """
+    increments = {field: F(field) + value for field, value in amounts.items()}
+    if model.objects.filter(**keys).update(**increments) or any(value < 0 for value in amounts.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **amounts)
+    except IntegrityError:
+        # Otra cuenta creo la fila al mismo tiempo
+        model.objects.filter(**keys).update(**increments)
+
+
+def _add_to_plate_rollups(day, plates, sign=1):
+    """
+    Add the (plate_id, quantity, revenue) rows of plates to the DailyPlateSales of day with a fixed
+    number of queries, however many plates there are: the missing rows are inserted with
+    ON CONFLICT DO NOTHING, then one UPDATE adds to all of them with CASE plate_id WHEN ... .
+    """
+    plates = list(plates)
+    # Las filas sin platillo (NULL) no se pueden comparar en el CASE plate_id WHEN, van de una en una
+    for plate in plates:
+        if plate["plate_id"] is None:
+            _add_to_rollup(
+                DailyPlateSales, {"day": day, "plate_id": None},
+                quantity=sign * plate["quantity"], revenue=sign * plate["revenue"],
+            )
+    plates = [plate for plate in plates if plate["plate_id"] is not None]
+    if not plates:
+        return
+    if sign > 0:
+        DailyPlateSales.objects.bulk_create(
+            [DailyPlateSales(day=day, plate_id=plate["plate_id"]) for plate in plates], ignore_conflicts=True,
+        )
+    quantity = Case(
+        *[When(plate_id=plate["plate_id"], then=Value(sign * plate["quantity"])) for plate in plates],
+        output_field=IntegerField(),
+    )
+    revenue = Case(
+        *[When(plate_id=plate["plate_id"], then=Value(sign * plate["revenue"])) for plate in plates],
+        output_field=FloatField(),
+    )
+    DailyPlateSales.objects.filter(day=day, plate_id__in=[plate["plate_id"] for plate in plates]).update(
+        quantity=F("quantity") + quantity, revenue=F("revenue") + revenue,
+    )
+
+
+def _drop_empty_rollups(day):
+    """Delete the rows of day left empty after taking something out (a rebuild never creates them)."""
+    DailySales.objects.filter(day=day, bills=0, covers=0).delete()
+    DailyWaiterSales.objects.filter(day=day, bills=0).delete()
+    DailyAreaSales.objects.filter(day=day, bills=0).delete()
+    DailyPlateSales.objects.filter(day=day, quantity=0).delete()
+
+
+# Rollup con clave -> (campo de la clave, campos que se suman)
+ROLLUP_KEYS = {
+    DailyWaiterSales: ("waiter_id", ["bills", "revenue", "tips"]),
+    DailyPlateSales: ("plate_id", ["quantity", "revenue"]),
+    DailyAreaSales: ("area_id", ["bills", "revenue"]),
+}
+
+
+def fold_rollups_into_null(model, key):
+    """
+    Call before deleting the waiter, plate or area key: SET_NULL would turn its rows into a second
+    (day, NULL) row wherever that day already has one. Those rows are added to the existing NULL row
+    and deleted; the rest are left for SET_NULL. A fixed number of queries, however many days.
+    """
+    field, amounts = ROLLUP_KEYS[model]
+    rows = model.objects.filter(**{field: key})
+    null_rows = model.objects.filter(**{field: None})
+    same_day = rows.filter(day=OuterRef("day"))
+    # Normalmente ya corre dentro de la transaccion del DELETE, sin savepoint propio
+    with transaction.atomic(savepoint=False):
+        null_rows.filter(day__in=rows.values("day")).update(
+            **{name: F(name) + Subquery(same_day.values(name)[:1]) for name in amounts}
+        )
+        rows.filter(day__in=null_rows.values("day")).delete()
+
+
+def record_closed_bill(bill_id, sign=1):
+    """
+    Add a closed bill to the rollups of its (restaurant-local) closing day. The bill is read from the
+    database, so call it after the UPDATE that closes it to count the total as it was written.
+    sign=-1 takes the bill back out: call it before reopening, editing or deleting a closed bill.
+    """
+    bill = Bill.objects.filter(id=bill_id).values(
+        "closed_at", "date_time", "waiter_id", "table__area_id", "total", "total_paid", "tip",
+    ).get()
+    day = to_restaurant_time(bill["closed_at"] or bill["date_time"]).date()
+    total = sign * bill["total"]
+    tips = total * bill["tip"] / 100
+    plates = (
+        BillPlate.objects.filter(account_id=bill_id)
+        .values("plate_id")
+        .annotate(quantity=Count("id"), revenue=Coalesce(Sum("plate__price"), 0.0))
+    )
+
+    with transaction.atomic():
+        _add_to_rollup(DailySales, {"day": day}, bills=sign, revenue=total, paid=sign * bill["total_paid"], tips=tips)
+        _add_to_rollup(DailyWaiterSales, {"day": day, "waiter_id": bill["waiter_id"]}, bills=sign, revenue=total, tips=tips)
+        _add_to_rollup(DailyAreaSales, {"day": day, "area_id": bill["table__area_id"]}, bills=sign, revenue=total)
+        _add_to_plate_rollups(day, plates, sign)
+        if sign < 0:
+            _drop_empty_rollups(day)
+
+
+def record_covers(reservations, sign=1):
+    """
+    Add the people of finalized reservations, as (date_time, amount_people) pairs, to the covers
+    of each reservation's own (restaurant-local) day, the same rule rebuild_sales_rollups uses.
+    sign=-1 takes them back out (a finalized reservation that is edited or deleted).
+    """
+    days = {}
+    for date_time, amount_people in reservations:
+        day = to_restaurant_time(date_time).date()
+        days[day] = days.get(day, 0) + amount_people
+
+    with transaction.atomic():
+        for day, covers in days.items():
+            _add_to_rollup(DailySales, {"day": day}, covers=sign * covers)
+            if sign < 0:
+                DailySales.objects.filter(day=day, bills=0, covers=0).delete()
+
+
+def _rebuild_models(apps=None):
+    models = [Bill, BillPlate, Reservation, *ROLLUP_MODELS]
+    if apps is None:
+        return models
+    return [apps.get_model("backend", model.__name__) for model in models]
+
+
+def rebuild_sales_rollups(date_from=None, date_to=None, apps=None):
+    """
+    Recompute the rollups of [date_from, date_to] (restaurant-local dates, both optional)
+    from the closed bills with GROUP BY queries. Used for the backfill and after editing history.
+    Bills closed before closed_at existed are counted on the day they were opened.
+    Returns the number of days rebuilt.
+    apps is a migration's app registry, to run it with the historical models from a data migration.
+    """
+    Bill, BillPlate, Reservation, DailySales, DailyWaiterSales, DailyPlateSales, DailyAreaSales = _rebuild_models(apps)
+    restaurant_tz = get_restaurant_tz()
+    closed_bills = Bill.objects.filter(state="closed").annotate(
+        day=TruncDate(Coalesce("closed_at", "date_time"), tzinfo=restaurant_tz)
+    )
+    finalized = Reservation.objects.filter(state="finalized").annotate(day=TruncDate("date_time", tzinfo=restaurant_tz))
+    rollups = {model: model.objects.all() for model in [DailySales, DailyWaiterSales, DailyPlateSales, DailyAreaSales]}
+    if date_from:
+        start, _ = restaurant_day_bounds(date_from)
+        closed_bills = closed_bills.filter(Q(closed_at__gte=start) | Q(closed_at__isnull=True, date_time__gte=start))
+        finalized = finalized.filter(date_time__gte=start)
+        rollups = {model: queryset.filter(day__gte=date_from) for model, queryset in rollups.items()}
+    if date_to:
+        _, end = restaurant_day_bounds(date_to)
+        closed_bills = closed_bills.filter(Q(closed_at__lt=end) | Q(closed_at__isnull=True, date_time__lt=end))
+        finalized = finalized.filter(date_time__lt=end)
+        rollups = {model: queryset.filter(day__lte=date_to) for model, queryset in rollups.items()}
+
+    tips = Sum(F("total") * F("tip") / 100.0)
+    covers = dict(finalized.values("day").annotate(covers=Sum("amount_people")).values_list("day", "covers"))
+    days = closed_bills.values("day").annotate(
+        bills=Count("id"), revenue=Sum("total"), paid=Sum("total_paid"), tips=tips,
+    ).order_by("day")
+    waiters = closed_bills.values("day", "waiter_id").annotate(bills=Count("id"), revenue=Sum("total"), tips=tips)
+    areas = closed_bills.values("day", "table__area_id").annotate(bills=Count("id"), revenue=Sum("total"))
+    plates = (
+        BillPlate.objects.filter(account__in=closed_bills.values("id"))
+        .annotate(day=TruncDate(Coalesce("account__closed_at", "account__date_time"), tzinfo=restaurant_tz))
+        .values("day", "plate_id")
+        .annotate(quantity=Count("id"), revenue=Coalesce(Sum("plate__price"), 0.0))
+    )
+
+    with transaction.atomic():
+        for queryset in rollups.values():
+            queryset.delete()
+        day_rows = [DailySales(covers=covers.pop(row["day"], 0), **row) for row in days]
+        # Dias con reservaciones finalizadas pero sin cuentas cerradas
+        day_rows += [DailySales(day=day, covers=amount) for day, amount in covers.items()]
+        DailySales.objects.bulk_create(day_rows, batch_size=1000)
+        DailyWaiterSales.objects.bulk_create([DailyWaiterSales(**row) for row in waiters], batch_size=1000)
+        DailyAreaSales.objects.bulk_create([
+            DailyAreaSales(day=row["day"], area_id=row["table__area_id"], bills=row["bills"], revenue=row["revenue"])
+            for row in areas
+        ], batch_size=1000)
+        DailyPlateSales.objects.bulk_create([DailyPlateSales(**row) for row in plates], batch_size=1000)
+
+    return len(day_rows)
@@ -0,0 +1,44 @@
+## Zona horaria del restaurante (settings.RESTAURANT_TIME_ZONE), compartida por serializers y views
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.utils import timezone
+
+
+@lru_cache(maxsize=None)
+def _get_zone(name):
+    return ZoneInfo(name)
+
+
+def get_restaurant_tz():
+    """The restaurant's ZoneInfo. The zone is only loaded once per name."""
+    return _get_zone(getattr(settings, "RESTAURANT_TIME_ZONE", "America/Mexico_City"))
+
+
+def to_restaurant_time(value):
+    """Convert a datetime to the restaurant's local time (naive values are taken as UTC)."""
+    if timezone.is_naive(value):
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(get_restaurant_tz())
+
+
+def format_restaurant_datetimes(values):
+    """ISO strings with the local offset for a batch of datetimes; the zone is resolved once."""
+    restaurant_tz = get_restaurant_tz()
+    return [
+        None if value is None else (
+            value.replace(tzinfo=dt_timezone.utc) if value.tzinfo is None else value
+        ).astimezone(restaurant_tz).isoformat()
+        for value in values
+    ]
+
+
+def restaurant_today():
+    return timezone.now().astimezone(get_restaurant_tz()).date()
+
+
+def restaurant_day_bounds(day):
+    """Aware [start, end) datetimes of a restaurant-local date."""
+    start = datetime.combine(day, time.min, tzinfo=get_restaurant_tz())
+    return start, start + timedelta(days=1)
@@ -0,0 +1,66 @@
+## Resumen de calificaciones para el widget de la pagina principal
+# Una sola fila con el total, la suma y el histograma 1-5; create_review la actualiza con
+# UPDATE ... SET x = x + 1 en lugar de recorrer toda la tabla de reviews en cada visita
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from backend.models import Review, ReviewSummary
+
+SUMMARY_ID = 1
+SCORES = range(1, 6)
+
+
+def _increments(score, amount):
+    increments = {"reviews": F("reviews") + amount}
+    if score in SCORES:
+        increments["scored"] = F("scored") + amount
+        increments["score_total"] = F("score_total") + score * amount
+        increments[f"score_{score}"] = F(f"score_{score}") + amount
+    return increments
+
+
+def _count_reviews(reviews=None):
+    reviews = Review.objects.all() if reviews is None else reviews
+    return reviews.aggregate(
+        reviews=Count("id"),
+        scored=Count("id", filter=Q(score__in=SCORES)),
+        score_total=Sum("score", filter=Q(score__in=SCORES), default=0),
+        **{f"score_{score}": Count("id", filter=Q(score=score)) for score in SCORES},
+    )
+
+
+def record_review(score, amount=1):
+    """
+    Add (amount=1) or remove (amount=-1) a review with the given score (or None) from the summary.
+    Must run in the transaction that saves or deletes the review.
+    """
+    increments = _increments(score, amount)
+    if ReviewSummary.objects.filter(id=SUMMARY_ID).update(**increments):
+        return
+    # Primera review (o la fila se borro): se crea la fila con el conteo de la tabla, que ya incluye esta
+    try:
+        with transaction.atomic():
+            ReviewSummary.objects.create(id=SUMMARY_ID, **_count_reviews())
+    except IntegrityError:
+        # Otra peticion creo la fila al mismo tiempo; no veia esta review (sin commit), asi que se suma encima
+        ReviewSummary.objects.filter(id=SUMMARY_ID).update(**increments)
+
+
+def rebuild_review_summary():
+    """Recompute the summary row from the reviews table with one aggregate query."""
+    totals = _count_reviews()
+    ReviewSummary.objects.update_or_create(id=SUMMARY_ID, defaults=totals)
+    return totals
+
+
+def get_review_summary():
+    """Count, average and 1-5 histogram, read from the summary row."""
+    summary = ReviewSummary.objects.filter(id=SUMMARY_ID).first()
+    if summary is None:
+        rebuild_review_summary()
+        summary = ReviewSummary.objects.get(id=SUMMARY_ID)
+    return {
+        "count": summary.reviews,
+        "average": round(summary.score_total / summary.scored, 2) if summary.scored else None,
+        "histogram": {str(score): getattr(summary, f"score_{score}") for score in SCORES},
+    }
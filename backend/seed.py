@@ -0,0 +1,178 @@
+## Datos sinteticos de un restaurante para benchmarks y pruebas de rendimiento
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from backend.models import TableArea, Table, Reservation, PlateCategory, Plate, Bill, BillPlate, Review
+from backend.review_summary import rebuild_review_summary
+
+AREAS = ["Terraza", "Salon", "Barra", "Jardin"]
+CATEGORIES = ["Entradas", "Sopas", "Platos fuertes", "Postres", "Bebidas", "Vinos"]
+RESERVATION_STATES = ["active", "cancelled", "finalized", "in_course"]
+
+
+@contextmanager
+def keep_dates(*fields):
+    """
+    Let bulk_create store the given auto_now/auto_now_add fields as they are set on the objects,
+    so the seeded history can span months instead of all being "now".
+    """
+    original = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in original:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def seed_restaurant(
+    bills=10000,
+    reservations=5000,
+    tables=60,
+    plates=40,
+    waiters=8,
+    customers=200,
+    plates_per_bill=4,
+    days=180,
+    random_seed=0,
+):
+    """
+    Fill the database with a realistic restaurant: areas, tables, menu, staff, customers,
+    `days` days of bills (with their plates) and reservations, and reviews.
+    Everything is inserted with bulk_create. Returns a dictionary with the created staff.
+    """
+    rng = random.Random(random_seed)
+    User = get_user_model()
+    now = timezone.now()
+    # Una sola contraseña hasheada para todos, PBKDF2 por usuario tardaria minutos
+    password = make_password("password123")
+
+    areas = TableArea.objects.bulk_create([TableArea(label=label) for label in AREAS])
+    table_objects = Table.objects.bulk_create([
+        Table(code=f"M-{i + 1}", capacity=rng.choice([2, 2, 4, 4, 4, 6, 8]), state="available", area=areas[i % len(areas)])
+        for i in range(tables)
+    ])
+
+    categories = PlateCategory.objects.bulk_create([PlateCategory(label=label) for label in CATEGORIES])
+    plate_objects = Plate.objects.bulk_create([
+        Plate(
+            name=f"Platillo {i + 1}",
+            price=rng.randrange(40, 400),
+            category=categories[i % len(categories)],
+            description="Platillo de la casa",
+        )
+        for i in range(plates)
+    ])
+
+    admin = User(email="admin@dinely.com", name="Admin", password=password, is_admin=True)
+    cook = User(email="cocina@dinely.com", name="Cocina", password=password, is_kitchen=True)
+    waiter_objects = [
+        User(email=f"mesero{i + 1}@dinely.com", name=f"Mesero {i + 1}", password=password, is_waiter=True)
+        for i in range(waiters)
+    ]
+    customer_objects = [
+        User(email=f"cliente{i + 1}@correo.com", name=f"Cliente {i + 1}", password=password, phone_number=f"33{i:08d}")
+        for i in range(customers)
+    ]
+    User.objects.bulk_create([admin, cook] + waiter_objects + customer_objects)
+    # bulk_create en SQLite/PostgreSQL regresa los ids, pero se recargan por si otro backend no lo hace
+    admin = User.objects.get(email=admin.email)
+    cook = User.objects.get(email=cook.email)
+    waiter_objects = list(User.objects.filter(is_waiter=True).order_by("id"))
+    customer_objects = list(User.objects.filter(email__endswith="@correo.com").order_by("id"))
+
+    # Historial de cuentas: todas cerradas excepto una por cada mesa ocupada
+    with keep_dates(Bill._meta.get_field("date_time"), Bill._meta.get_field("updated_at")):
+        bill_objects = [
+            Bill(
+                code=f"CUE-{i:06d}",
+                table=rng.choice(table_objects),
+                waiter=rng.choice(waiter_objects),
+                date_time=now - timedelta(days=rng.random() * days),
+                state="closed",
+                tip=rng.choice([0, 10, 15]),
+            )
+            for i in range(bills)
+        ]
+        for bill in bill_objects:
+            bill.updated_at = bill.date_time
+        occupied = table_objects[: len(table_objects) // 3]
+        for table, bill in zip(occupied, bill_objects[-len(occupied):]):
+            bill.table = table
+            bill.state = "current"
+            bill.date_time = bill.updated_at = now - timedelta(minutes=rng.randrange(5, 120))
+        for bill in bill_objects:
+            if bill.state == "closed":
+                bill.closed_at = bill.date_time + timedelta(minutes=rng.randrange(30, 150))
+        Bill.objects.bulk_create(bill_objects, batch_size=2000)
+    Table.objects.filter(id__in=[table.id for table in occupied]).update(state="occupied")
+
+    bill_objects = list(Bill.objects.order_by("id").only("id", "date_time", "state"))
+    created_at = BillPlate._meta.get_field("created_at")
+    with keep_dates(created_at):
+        bill_plates = []
+        totals = {}
+        for bill in bill_objects:
+            for _ in range(rng.randrange(1, plates_per_bill * 2)):
+                plate = rng.choice(plate_objects)
+                totals[bill.id] = totals.get(bill.id, 0) + plate.price
+                bill_plates.append(BillPlate(
+                    plate=plate,
+                    account_id=bill.id,
+                    notes="",
+                    cooked=bill.state == "closed" or rng.random() < 0.5,
+                    created_at=bill.date_time,
+                ))
+        BillPlate.objects.bulk_create(bill_plates, batch_size=5000)
+
+    # Los totales se guardan con bulk_update en lugar de un UPDATE por cuenta
+    for bill in bill_objects:
+        bill.total = totals.get(bill.id, 0)
+        bill.total_paid = bill.total if bill.state == "closed" else 0
+    Bill.objects.bulk_update(bill_objects, ["total", "total_paid"], batch_size=2000)
+
+    reservation_objects = []
+    for i in range(reservations):
+        customer = rng.choice(customer_objects) if rng.random() < 0.7 else None
+        date_time = now + timedelta(days=rng.uniform(-days, 30))
+        reservation_objects.append(Reservation(
+            client=customer,
+            name=customer.name if customer else f"Invitado {i}",
+            email=customer.email if customer else f"invitado{i}@correo.com",
+            phone_number=customer.phone_number if customer else f"55{i:08d}",
+            code=f"RES-{i:06d}",
+            date_time=date_time,
+            amount_people=rng.randrange(1, 9),
+            state="active" if date_time > now else rng.choice(RESERVATION_STATES[1:]),
+            notes="",
+        ))
+    Reservation.objects.bulk_create(reservation_objects, batch_size=2000)
+
+    with keep_dates(Review._meta.get_field("created_at")):
+        Review.objects.bulk_create([
+            Review(
+                user=customer,
+                title="Muy bien",
+                content="Buena comida y buen servicio",
+                score=rng.randrange(1, 6),
+                created_at=now - timedelta(days=rng.random() * days),
+            )
+            for customer in customer_objects[: len(customer_objects) // 2]
+        ])
+    # bulk_create no pasa por create_review
+    rebuild_review_summary()
+
+    return {
+        "admin": admin,
+        "cook": cook,
+        "waiters": waiter_objects,
+        "customers": customer_objects,
+        "tables": table_objects,
+        "plates": plate_objects,
+    }
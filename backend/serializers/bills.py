@@ -1,7 +1,11 @@
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from backend.views.admin.utils import generate_bill_code
-from backend.models import Bill, BillPlate, Table
+from backend.views.admin.utils import generate_bill_code, save_with_unique_code
+from backend.models import Bill, BillPlate, DeletedRecord, Table
+from backend.reports import record_closed_bill
+from backend.table_state import AVAILABLE, OCCUPIED, set_table_state
 from backend.serializers.plates import ReadPlateSerializer
 from backend.serializers.tables import ReadTableSerializer
 from backend.serializers.users import UserReadSerializer
@@ -27,9 +31,6 @@ class AdminCreateBillSerializer(serializers.ModelSerializer):
         return data
     
     def create(self, validated_data):
-        # Auto-generate code
-        validated_data['code'] = generate_bill_code()
-        
         # date_time is auto-set by model (auto_now_add=True)
         # state, total, total_paid, tip have defaults in the model
         
@@ -37,51 +38,69 @@ class AdminCreateBillSerializer(serializers.ModelSerializer):
         table = validated_data.get('table')
         state = validated_data.get('state', 'current')  # Default is 'current'
         
-        bill = Bill(**validated_data)
-        bill.save()
-        
-        # If bill is active (current) and has a table, mark table as occupied
-        if table and state == 'current':
-            table.state = 'occupied'
-            table.save()
+        with transaction.atomic():
+            # Auto-generate code when inserting
+            bill = Bill(**validated_data)
+            save_with_unique_code(bill, generate_bill_code)
+            
+            # If bill is active (current) and has a table, mark table as occupied
+            if table and state == 'current':
+                set_table_state(table.id, OCCUPIED)
+                table.state = OCCUPIED
         
         return bill
     
+    @transaction.atomic
     def update(self, instance, validated_data):
+        # Se bloquea y se relee la cuenta (un mesero la pudo cerrar o agregarle platillos mientras tanto)
+        instance = Bill.objects.select_for_update().get(pk=instance.pk)
+        
         # Store old table and state for state management
         old_table = instance.table
         old_state = instance.state
         new_table = validated_data.get("table", old_table)
         new_state = validated_data.get("state", old_state)
         
+        # Una cuenta cerrada sale de los reportes antes de cambiarla, y vuelve a entrar si sigue cerrada
+        if old_state == "closed":
+            record_closed_bill(instance.pk, sign=-1)
+        
         # Update table if provided
         if "table" in validated_data:
             instance.table = validated_data["table"]
         
         # Update waiter if provided
         if "waiter" in validated_data:
+            # Para el mesero anterior la cuenta desaparece: se le deja una lapida en su sincronizacion
+            old_waiter_id = instance.waiter_id
             instance.waiter = validated_data["waiter"]
+            if old_waiter_id and old_waiter_id != instance.waiter_id:
+                DeletedRecord.objects.create(model=Bill._meta.label_lower, object_id=instance.pk, waiter_id=old_waiter_id)
         
         # Update state if provided
         if "state" in validated_data:
             instance.state = validated_data["state"]
         
+        if new_state == "closed" and old_state != "closed":
+            instance.closed_at = timezone.now()
+        
         instance.save()
         
-        # Handle table state changes
+        # Una cuenta cerrada desde el admin tambien entra en los reportes
+        if new_state == "closed":
+            record_closed_bill(instance.pk)
+        
+        # Handle table state changes (solo se escribe el estado, nunca la fila completa)
         # If old table existed and bill was active, free it
         if old_table and old_state == 'current':
-            old_table.state = 'available'
-            old_table.save()
+            set_table_state(old_table.id, AVAILABLE)
         
         # If new table exists and bill is active, mark it as occupied
         if new_table and new_state == 'current':
-            new_table.state = 'occupied'
-            new_table.save()
+            set_table_state(new_table.id, OCCUPIED)
         # If new table exists but bill is closed, keep it available
         elif new_table and new_state == 'closed':
-            new_table.state = 'available'
-            new_table.save()
+            set_table_state(new_table.id, AVAILABLE)
         
         return instance
 
@@ -94,6 +113,25 @@ class ReadBillPlateSerializer(serializers.ModelSerializer):
         fields = ["id", "plate", "notes", "cooked", "cooked_at"]
 
 
+class ReadKitchenPlateSerializer(serializers.ModelSerializer):
+    """
+    Flat representation of a BillPlate for the kitchen screen.
+    Expects the plate and the bill (with its table) to be loaded already.
+    """
+    bill_id = serializers.IntegerField(source="account_id", read_only=True)
+    bill_code = serializers.CharField(source="account.code", read_only=True)
+    table_code = serializers.SerializerMethodField()
+    plate_name = serializers.CharField(source="plate.name", read_only=True)
+
+    class Meta:
+        model = BillPlate
+        fields = ["id", "bill_id", "bill_code", "table_code", "plate_id", "plate_name", "notes", "cooked", "cooked_at", "created_at"]
+
+    def get_table_code(self, obj):
+        table = obj.account.table if obj.account else None
+        return table.code if table else None
+
+
 class CreateBillPlateSerializer(serializers.ModelSerializer):
     plate_id = serializers.IntegerField(write_only=True)
     notes = serializers.CharField(max_length=1024, required=False, allow_blank=True, default="")
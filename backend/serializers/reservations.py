@@ -1,5 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
 from backend.models import Reservation, Table, TableArea
+from backend.reports import record_covers
+from backend.restaurant_time import to_restaurant_time
 from backend.serializers.tables import ReadTableSerializer
 
 
@@ -30,18 +33,23 @@ class AdminCreateReservationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         # Import here to avoid circular import
-        from backend.views.admin.utils import generate_reservation_code
+        from backend.views.admin.utils import generate_reservation_code, save_with_unique_code
         
-        # Auto-generate code
-        validated_data['code'] = generate_reservation_code()
         # Set client to None (admin doesn't set it)
         validated_data['client'] = None
         
+        # Auto-generate code when inserting
         reservation = Reservation(**validated_data)
-        reservation.save()
+        with transaction.atomic():
+            save_with_unique_code(reservation, generate_reservation_code)
+            # Las personas de una reservacion finalizada cuentan en los reportes de su dia
+            if reservation.state == "finalized":
+                record_covers([(reservation.date_time, reservation.amount_people)])
         return reservation
     
+    @transaction.atomic
     def update(self, instance, validated_data):
+        old_covers = (instance.state, instance.date_time, instance.amount_people)
         instance.name = validated_data.get('name', instance.name)
         instance.email = validated_data.get('email', instance.email)
         instance.phone_number = validated_data.get('phone_number', instance.phone_number)
@@ -52,6 +60,13 @@ class AdminCreateReservationSerializer(serializers.ModelSerializer):
         instance.notes = validated_data.get('notes', instance.notes)
         # Don't modify code or client
         instance.save()
+        
+        new_covers = (instance.state, instance.date_time, instance.amount_people)
+        if old_covers != new_covers:
+            if old_covers[0] == "finalized":
+                record_covers([old_covers[1:]], sign=-1)
+            if new_covers[0] == "finalized":
+                record_covers([new_covers[1:]])
         return instance
 
 class UserCreateReservationSerializer(serializers.ModelSerializer):
@@ -90,13 +105,7 @@ class UserCreateReservationSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         # Import here to avoid circular import
-        from backend.views.admin.utils import generate_reservation_code
-        
-        # Extract table_area if provided (will be removed from validated_data)
-        table_area = validated_data.pop('table_area', None)
-        
-        # Auto-generate code
-        validated_data['code'] = generate_reservation_code()
+        from backend.views.admin.utils import generate_reservation_code, save_with_unique_code
         
         # Set state to "active" for user-created reservations
         validated_data['state'] = "active"
@@ -111,17 +120,13 @@ class UserCreateReservationSerializer(serializers.ModelSerializer):
         # Leave table as None (restaurant assigns later based on area preference)
         validated_data['table'] = None
         
+        # Auto-generate code when inserting
         reservation = Reservation(**validated_data)
-        reservation.save()
+        save_with_unique_code(reservation, generate_reservation_code)
         
         return reservation
     
     def update(self, instance, validated_data):
-        # Extract table_area if provided (will be removed from validated_data)
-        # The SlugRelatedField converts label to TableArea object, but we don't use it
-        # We just validate it exists, then set table to None (restaurant assigns later)
-        validated_data.pop('table_area', None)
-        
         # Update only editable fields (partial update)
         if 'date_time' in validated_data:
             instance.date_time = validated_data['date_time']
@@ -129,6 +134,8 @@ class UserCreateReservationSerializer(serializers.ModelSerializer):
             instance.amount_people = validated_data['amount_people']
         if 'notes' in validated_data:
             instance.notes = validated_data['notes']
+        if validated_data.get('table_area') is not None:
+            instance.table_area = validated_data['table_area']
         
         # Always set table to None when updating (restaurant assigns table based on area preference)
         instance.table = None
@@ -139,38 +146,20 @@ class UserCreateReservationSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class RestaurantDateTimeField(serializers.DateTimeField):
+    """Datetime shown in the restaurant's local time, with its UTC offset (e.g. -06:00)."""
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return to_restaurant_time(value).isoformat()
+
+
 class ReadReservationSerializer(serializers.ModelSerializer):
     table = ReadTableSerializer(read_only=True)
+    # Se guarda en UTC, se muestra en la hora local del restaurante
+    date_time = RestaurantDateTimeField(read_only=True)
     
     class Meta:
         model = Reservation
         fields = ["id", "code", "name", "email", "phone_number", "date_time", "table", "amount_people", "state", "notes"]
-    
-    def to_representation(self, instance):
-        """
-        Convert date_time from UTC to restaurant's local timezone when reading.
-        Restaurant timezone: America/Mexico_City (UTC-6)
-        """
-        data = super().to_representation(instance)
-        
-        if data.get('date_time') and instance.date_time:
-            # instance.date_time is stored in UTC in the database
-            # Convert from UTC to restaurant's local timezone for display
-            import pytz
-            restaurant_tz = pytz.timezone('America/Mexico_City')
-            
-            # Ensure timezone-aware datetime
-            if instance.date_time.tzinfo is None:
-                from django.utils import timezone
-                utc_dt = timezone.make_aware(instance.date_time, timezone.utc)
-            else:
-                utc_dt = instance.date_time
-            
-            # Convert to restaurant's local timezone
-            local_dt = utc_dt.astimezone(restaurant_tz)
-            
-            # Format as ISO string with timezone offset
-            data['date_time'] = local_dt.isoformat()
-        
-        return data
-
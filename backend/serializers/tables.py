@@ -71,7 +71,12 @@ class ReadTableSerializer(serializers.ModelSerializer):
         """
         Get the code of the active bill associated with this table, if any.
         Returns None if no active bill exists.
+        Uses the value annotated by Table.objects.with_active_bill_code() when present,
+        and only falls back to a query for tables loaded without it.
         """
+        if hasattr(obj, "active_bill_code"):
+            return obj.active_bill_code
+
         from backend.models import Bill
         active_bill = Bill.objects.filter(table=obj, state="current").first()
         return active_bill.code if active_bill else None
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from backend.auth_backends import forget_cached_user
+from backend.menu_cache import invalidate_menu
+from backend.models import (
+    Bill, BillPlate, DailyAreaSales, DailyPlateSales, DailyWaiterSales, DeletedRecord, Plate, PlateCategory,
+    Reservation, Review, Table, TableArea,
+)
+from backend.reports import fold_rollups_into_null
+from backend.review_summary import record_review
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Reservation)
+@receiver(post_delete, sender=Table)
+def record_deletion(sender, instance, waiter_id=None, **kwargs):
+    """Leave a tombstone so clients syncing with since= can drop the deleted row."""
+    DeletedRecord.objects.create(model=sender._meta.label_lower, object_id=instance.pk, waiter_id=waiter_id)
+
+
+@receiver(post_delete, sender=Bill)
+def record_bill_deletion(sender, instance, **kwargs):
+    """Bills keep their waiter in the tombstone, so only that waiter's sync drops them."""
+    record_deletion(sender, instance, waiter_id=instance.waiter_id)
+
+
+@receiver(post_delete, sender=BillPlate)
+def record_bill_plate_deletion(sender, instance, origin=None, **kwargs):
+    """
+    Same, for plates removed on their own. The plates deleted with their bill (origin is the bill or
+    a bill queryset) don't need one: the client drops the whole bill, and it'd be one INSERT per plate.
+    """
+    if isinstance(origin, Bill) or getattr(origin, "model", None) is Bill:
+        return
+    # El mesero de la cuenta se lee dentro del mismo INSERT
+    waiter_id = Subquery(Bill.objects.filter(pk=instance.account_id).values("waiter_id"))
+    record_deletion(sender, instance, waiter_id=waiter_id)
+
+
+@receiver(pre_delete, sender=Table)
+def touch_table_references(sender, instance, **kwargs):
+    """
+    Deleting a table sets the FK of its bills and reservations to NULL with a queryset update,
+    which skips auto_now. Bump updated_at here so those rows are synced again.
+    """
+    now = timezone.now()
+    Bill.objects.filter(table=instance).update(updated_at=now)
+    Reservation.objects.filter(table=instance).update(updated_at=now)
+
+
+@receiver(pre_delete, sender=User)
+def touch_waiter_bills(sender, instance, **kwargs):
+    """Same as touch_table_references, for bills that lose their waiter."""
+    Bill.objects.filter(waiter=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_delete, sender=User)
+@receiver(pre_delete, sender=Plate)
+@receiver(pre_delete, sender=TableArea)
+def fold_deleted_key_rollups(sender, instance, **kwargs):
+    """The sales rollups of a deleted waiter, plate or area join the (day, NULL) row of each day."""
+    model = {User: DailyWaiterSales, Plate: DailyPlateSales, TableArea: DailyAreaSales}[sender]
+    fold_rollups_into_null(model, instance.pk)
+
+
+@receiver(post_save, sender=Plate)
+@receiver(post_delete, sender=Plate)
+@receiver(post_save, sender=PlateCategory)
+@receiver(post_delete, sender=PlateCategory)
+def invalidate_menu_cache(sender, **kwargs):
+    """Any change to the menu (from the admin views or Django's admin) gets a new menu version."""
+    invalidate_menu()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Role or password changes (admin.users.edit_user, set password...) take effect on the next request."""
+    forget_cached_user(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_summary(sender, instance, **kwargs):
+    """Reviews deleted from Django's admin or with their user leave the rating summary too."""
+    record_review(instance.score, amount=-1)
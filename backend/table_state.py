@@ -0,0 +1,39 @@
+## Estados de las mesas: cada transicion es un solo UPDATE condicional
+# "UPDATE ... WHERE state = 'available'" lo gana solo una peticion aunque lleguen al mismo tiempo,
+# sin leer la mesa antes ni guardar el objeto completo con save()
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from backend.models import Bill, Table
+
+AVAILABLE = "available"
+OCCUPIED = "occupied"
+RESERVED = "reserved"
+
+# Estados desde los que un mesero puede sentar a un cliente sin reservacion
+WALK_IN_STATES = (AVAILABLE, RESERVED)
+
+
+def occupy_table(table_id, from_states=(AVAILABLE,)):
+    """
+    Mark a table occupied only if it is in one of from_states and has no current bill.
+    Returns True if this call took the table, False if someone else has it.
+    """
+    current_bill = Bill.objects.filter(table=OuterRef("pk"), state="current")
+    updated = (
+        Table.objects.filter(id=table_id, state__in=from_states)
+        .exclude(Exists(current_bill))
+        .update(state=OCCUPIED, updated_at=timezone.now())
+    )
+    return updated == 1
+
+
+def release_table(table_id):
+    """Mark an occupied table available again. Returns False if it wasn't occupied."""
+    updated = Table.objects.filter(id=table_id, state=OCCUPIED).update(state=AVAILABLE, updated_at=timezone.now())
+    return updated == 1
+
+
+def set_table_state(table_id, state):
+    """Unconditional transition, for admin edits. Only writes the state, never a stale copy of the row."""
+    Table.objects.filter(id=table_id).update(state=state, updated_at=timezone.now())
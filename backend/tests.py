@@ -1,3 +1,1515 @@
-from django.test import TestCase
+import json
+from datetime import datetime, time, timedelta
+from io import StringIO
+from smtplib import SMTPException
+from time import perf_counter
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backend.auth_backends import CachedModelBackend, clear_user_cache, forget_cached_user
+from backend.availability import AvailabilityIndex, find_best_available_table
+from backend.email_service import claim_pending_emails, send_email_validation_email, send_pending_emails
+from backend.models import Bill, BillPlate, DailyAreaSales, DailySales, DailyWaiterSales, EmailValidationCode, KitchenEvent, MenuVersion, OutgoingEmail, Plate, PlateCategory, Reservation, Review, ReviewSummary, Table, TableArea
+from backend.profiling import registry as profiling_registry
+from backend.reports import ROLLUP_MODELS, rebuild_sales_rollups, record_closed_bill
+from backend.restaurant_time import get_restaurant_tz, restaurant_day_bounds, restaurant_today
+from backend import review_summary
+from backend.review_summary import get_review_summary, rebuild_review_summary
+from backend.seed import seed_restaurant
+from backend.serializers.bills import ReadBillSerializer
+from backend.serializers.reservations import ReadReservationSerializer
+from backend.serializers.tables import ReadTableSerializer
+from backend.table_state import occupy_table, release_table
+from backend.throttling import LocalMemoryStore, parse_rate, reset_throttle_store
+from backend.urls import urlpatterns
+from backend.views.admin.utils import get_waiter_with_least_bills, save_with_unique_code
+from backend.views.authentication.utils import generate_email_validation_code, generate_password_setup_token
+from backend.views.validators import validate_finalize_bill
+from backend.views.rendering import (
+    bill_values, build_bills, build_reservations, build_tables, dumps, reservation_values, table_values,
+)
+
+
+class ActiveBillCodeQueryTests(TestCase):
+    """
+    ReadTableSerializer.active_bill_code used to run one query per table.
+    Listing tables (directly or nested in bills) must cost a constant number of queries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user("admin@dinely.com", "password123", name="Admin")
+        cls.admin.is_admin = True
+        cls.admin.save()
+        cls.waiter = User.objects.create_user("waiter@dinely.com", "password123", name="Mesero")
+        cls.waiter.is_waiter = True
+        cls.waiter.save()
+        cls.area = TableArea.objects.create(label="Terraza")
+
+    def create_tables(self, amount, start=0):
+        tables = Table.objects.bulk_create([
+            Table(code=f"M-{start + i}", capacity=4, state="available", area=self.area)
+            for i in range(amount)
+        ])
+        # La mitad de las mesas tiene una cuenta activa
+        Bill.objects.bulk_create([
+            Bill(code=f"CUE-{table.code}", table=table, waiter=self.waiter)
+            for table in tables[::2]
+        ])
+        return tables
+
+    def count_get_tables_queries(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/admin/get-tables/")
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response.json()["tables"]
+
+    def test_serializing_tables_uses_a_single_query(self):
+        self.create_tables(200)
+
+        with self.assertNumQueries(1):
+            data = ReadTableSerializer(Table.objects.with_active_bill_code(), many=True).data
+
+        self.assertEqual(len(data), 200)
+        codes = {table["code"]: table["active_bill_code"] for table in data}
+        self.assertEqual(codes["M-0"], "CUE-M-0")
+        self.assertIsNone(codes["M-1"])
+
+    def test_get_tables_query_count_does_not_grow_with_tables(self):
+        self.create_tables(10)
+        small_count, _ = self.count_get_tables_queries()
+
+        self.create_tables(190, start=10)
+        large_count, tables = self.count_get_tables_queries()
+
+        self.assertEqual(len(tables), 200)
+        self.assertEqual(small_count, large_count)
+
+    def test_serializing_bills_does_not_query_per_table(self):
+        self.create_tables(50)
+
+        with self.assertNumQueries(3):
+            data = ReadBillSerializer(Bill.objects.with_related(), many=True).data
+
+        self.assertEqual(len(data), 25)
+        for bill in data:
+            self.assertEqual(bill["table"]["active_bill_code"], bill["code"])
+
+
+@override_settings(KITCHEN_STREAM_MAX_SECONDS=0, KITCHEN_STREAM_POLL_SECONDS=0)
+class KitchenStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.waiter = User.objects.create_user("waiter@dinely.com", "password123", name="Mesero")
+        cls.waiter.is_waiter = True
+        cls.waiter.save()
+        cls.cook = User.objects.create_user("cook@dinely.com", "password123", name="Cocina")
+        cls.cook.is_kitchen = True
+        cls.cook.save()
+        cls.table = Table.objects.create(code="M-1", capacity=4, state="occupied")
+        cls.bill = Bill.objects.create(code="CUE-000001", table=cls.table, waiter=cls.waiter)
+        cls.plate = Plate.objects.create(name="Sopa", price=80)
+
+    def read_stream(self, **headers):
+        self.client.force_login(self.cook)
+        response = self.client.get("/api/kitchen/stream/", **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return b"".join(response.streaming_content).decode()
+
+    def test_add_and_cook_plate_are_streamed_and_resumable(self):
+        self.client.force_login(self.waiter)
+        response = self.client.post(
+            f"/api/waiter/add-plate-to-bill/{self.bill.id}/",
+            {"plate_id": self.plate.id, "quantity": 2, "notes": "sin sal"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        bill_plate_id = response.json()["plates"][0]["id"]
+
+        self.client.force_login(self.cook)
+        self.client.post(f"/api/kitchen/mark-plate-cooked/{bill_plate_id}/", {"cooked": True}, content_type="application/json")
+
+        events = list(KitchenEvent.objects.values_list("id", "kind"))
+        self.assertEqual([kind for _, kind in events], ["plate_added", "plate_added", "plate_cooked"])
+
+        body = self.read_stream(HTTP_LAST_EVENT_ID="0")
+        self.assertEqual(body.count("event: plate_added"), 2)
+        self.assertIn('"bill_code":"CUE-000001"', body)
+        self.assertIn('"table_code":"M-1"', body)
+
+        body = self.read_stream(HTTP_LAST_EVENT_ID=str(events[1][0]))
+        self.assertNotIn("event: plate_added", body)
+        self.assertIn(f"id: {events[2][0]}\nevent: plate_cooked", body)
+
+    def test_stream_without_last_event_id_starts_at_the_newest_event(self):
+        KitchenEvent.objects.create(kind=KitchenEvent.PLATE_ADDED, payload={})
+        body = self.read_stream()
+        self.assertNotIn("event:", body)
+
+
+    @override_settings(KITCHEN_STREAM_MAX_SECONDS=0)
+    def test_an_event_committed_after_a_higher_id_is_not_skipped(self):
+        first, late, second = KitchenEvent.objects.bulk_create(
+            [KitchenEvent(kind=KitchenEvent.PLATE_ADDED, payload={"n": n}) for n in range(3)]
+        )
+        # El de en medio todavia no hace commit cuando el stream lee
+        late_id = late.id
+        late.delete()
+
+        with mock.patch("backend.views.kitchen.utils.time.time", return_value=1000.0):
+            body = self.read_stream(HTTP_LAST_EVENT_ID=str(first.id))
+        self.assertIn(f"id: {second.id}-{late_id}:1010\nevent: plate_added", body)
+
+        # Hace commit despues; el navegador se reconecta con el ultimo id que recibio
+        KitchenEvent.objects.create(id=late_id, kind=KitchenEvent.PLATE_COOKED, payload={"n": 1})
+        with mock.patch("backend.views.kitchen.utils.time.time", return_value=1002.0):
+            body = self.read_stream(HTTP_LAST_EVENT_ID=f"{second.id}-{late_id}:1010")
+        self.assertIn(f"id: {second.id}\nevent: plate_cooked", body)
+        self.assertNotIn("plate_added", body)
+
+    def test_a_gap_expires_across_reconnects(self):
+        first, late, second = KitchenEvent.objects.bulk_create(
+            [KitchenEvent(kind=KitchenEvent.PLATE_ADDED, payload={"n": n}) for n in range(3)]
+        )
+        late_id = late.id
+        late.delete()
+        # Cursor que envio el stream a las 1000 (ver el test anterior)
+        cursor = f"{second.id}-{late_id}:1010"
+
+        # Reconectar no reinicia el plazo del id que falta
+        for now in (1004.0, 1008.0):
+            KitchenEvent.objects.create(kind=KitchenEvent.PLATE_ADDED, payload={})
+            with mock.patch("backend.views.kitchen.utils.time.time", return_value=now):
+                body = self.read_stream(HTTP_LAST_EVENT_ID=cursor)
+            self.assertIn(f"-{late_id}:1010\nevent: plate_added", body)
+
+        newest = KitchenEvent.objects.create(kind=KitchenEvent.PLATE_ADDED, payload={})
+        with mock.patch("backend.views.kitchen.utils.time.time", return_value=1011.0):
+            body = self.read_stream(HTTP_LAST_EVENT_ID=cursor)
+        self.assertIn(f"id: {newest.id}\nevent: plate_added", body)
+
+
+class KitchenQueueTests(TestCase):
+    def test_queue_only_lists_uncooked_plates_of_current_bills(self):
+        User = get_user_model()
+        cook = User.objects.create_user("cook@dinely.com", "password123", name="Cocina")
+        cook.is_kitchen = True
+        cook.save()
+        plate = Plate.objects.create(name="Sopa", price=80)
+        table = Table.objects.create(code="M-1", capacity=4, state="occupied")
+        current = Bill.objects.create(code="CUE-000001", table=table)
+        closed = Bill.objects.create(code="CUE-000002", table=table, state="closed")
+        pending = current.plates.create(plate=plate, notes="sin sal")
+        current.plates.create(plate=plate, notes="", cooked=True)
+        closed.plates.create(plate=plate, notes="")
+
+        self.client.force_login(cook)
+        response = self.client.get("/api/kitchen/get-queue/")
+
+        self.assertEqual(response.status_code, 200)
+        plates = response.json()["plates"]
+        self.assertEqual([item["id"] for item in plates], [pending.id])
+        self.assertEqual(plates[0]["bill_code"], "CUE-000001")
+        self.assertEqual(plates[0]["table_code"], "M-1")
+        self.assertEqual(plates[0]["notes"], "sin sal")
+
+
+class ChangesSinceSyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user("admin@dinely.com", "password123", name="Admin")
+        cls.admin.is_admin = True
+        cls.admin.save()
+        cls.old_table = Table.objects.create(code="M-1", capacity=4, state="available")
+        cls.old_bill = Bill.objects.create(code="CUE-000001", table=cls.old_table, state="closed")
+        cls.gone_table = Table.objects.create(code="M-2", capacity=2, state="available")
+
+    def test_since_returns_only_changed_rows_and_tombstones(self):
+        self.client.force_login(self.admin)
+        cursor = self.client.get("/api/admin/get-bills/").json()["cursor"]
+        # Simula que el cursor quedo despues de los datos existentes
+        Bill.objects.update(updated_at=self.old_bill.updated_at.replace(year=2020))
+        Table.objects.update(updated_at=self.old_table.updated_at.replace(year=2020))
+
+        new_bill = Bill.objects.create(code="CUE-000002", table=self.old_table)
+        gone_table_id = self.gone_table.id
+        self.gone_table.delete()
+
+        bills = self.client.get("/api/admin/get-bills/", {"since": cursor}).json()
+        self.assertEqual([bill["id"] for bill in bills["bills"]], [new_bill.id])
+        self.assertEqual(bills["deleted"], {"bills": [], "bill_plates": []})
+
+        tables = self.client.get("/api/admin/get-tables/", {"since": cursor}).json()
+        self.assertEqual(tables["tables"], [])
+        self.assertEqual(tables["deleted"], {"tables": [gone_table_id]})
+
+    def test_waiters_only_get_tombstones_of_their_own_bills(self):
+        User = get_user_model()
+        ana, luis = [User.objects.create_user(f"{name}@dinely.com", "password123", name=name) for name in ("ana", "luis")]
+        User.objects.filter(id__in=[ana.id, luis.id]).update(is_waiter=True)
+        plate = Plate.objects.create(name="Sopa", price=80)
+        ana_bill = Bill.objects.create(code="CUE-000002", table=self.old_table, waiter=ana)
+        moved_bill = Bill.objects.create(code="CUE-000003", table=self.old_table, waiter=ana)
+        luis_bill = Bill.objects.create(code="CUE-000004", table=self.old_table, waiter=luis)
+        ana_plate = BillPlate.objects.create(account=ana_bill, plate=plate)
+        luis_plate = BillPlate.objects.create(account=luis_bill, plate=plate)
+
+        self.client.force_login(ana)
+        cursor = self.client.get("/api/waiter/get-bills/").json()["cursor"]
+        ana_plate_id, luis_plate_id, luis_bill_id = ana_plate.id, luis_plate.id, luis_bill.id
+        ana_plate.delete()
+        luis_plate.delete()
+        luis_bill.delete()
+        self.client.force_login(self.admin)
+        self.client.post("/api/admin/edit-bill/", {"id": moved_bill.id, "waiter": luis.id}, content_type="application/json")
+
+        self.client.force_login(ana)
+        deleted = self.client.get("/api/waiter/get-bills/", {"since": cursor}).json()["deleted"]
+        self.assertEqual(deleted, {"bills": [moved_bill.id], "bill_plates": [ana_plate_id]})
+
+        self.client.force_login(luis)
+        response = self.client.get("/api/waiter/get-bills/", {"since": cursor}).json()
+        self.assertEqual(response["deleted"], {"bills": [luis_bill_id], "bill_plates": [luis_plate_id]})
+        self.assertIn(moved_bill.id, [bill["id"] for bill in response["bills"]])
+
+        # El admin ve todas las borradas, pero no la reasignada
+        self.client.force_login(self.admin)
+        deleted = self.client.get("/api/admin/get-bills/", {"since": cursor}).json()["deleted"]
+        self.assertEqual(deleted, {"bills": [luis_bill_id], "bill_plates": [ana_plate_id, luis_plate_id]})
+
+    def test_invalid_since_is_rejected(self):
+        self.client.force_login(self.admin)
+        response = self.client.get("/api/admin/get-tables/", {"since": "ayer"})
+        self.assertEqual(response.status_code, 400)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user("admin@dinely.com", "password123", name="Admin")
+        cls.admin.is_admin = True
+        cls.admin.save()
+        cls.table = Table.objects.create(code="M-1", capacity=4, state="available")
+        cls.bills = [
+            Bill.objects.create(code=f"CUE-{i:06d}", table=cls.table, state="closed" if i % 3 else "current")
+            for i in range(7)
+        ]
+
+    def test_pages_cover_every_bill_once_in_stable_order(self):
+        self.client.force_login(self.admin)
+        seen = []
+        params = {"limit": 3}
+        while True:
+            page = self.client.get("/api/admin/get-bills/", params).json()
+            self.assertLessEqual(len(page["bills"]), 3)
+            seen += [bill["id"] for bill in page["bills"]]
+            if not page["next_cursor"]:
+                break
+            params["cursor"] = page["next_cursor"]
+
+        self.assertEqual(seen, sorted((bill.id for bill in self.bills), reverse=True))
+
+    def test_filters_are_applied(self):
+        self.client.force_login(self.admin)
+        response = self.client.get("/api/admin/get-bills/", {"state": "current", "table": self.table.id})
+        self.assertEqual(len(response.json()["bills"]), 3)
+        self.assertIsNone(response.json()["next_cursor"])
+
+        response = self.client.get("/api/admin/get-bills/", {"date_from": "2000-01-01", "date_to": "2000-12-31"})
+        self.assertEqual(response.json()["bills"], [])
+
+        self.assertEqual(self.client.get("/api/admin/get-bills/", {"waiter": "x"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/admin/get-bills/", {"cursor": "no-es-cursor"}).status_code, 400)
+
+
+class AddPlatesToBillTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.waiter = User.objects.create_user("waiter@dinely.com", "password123", name="Mesero")
+        cls.waiter.is_waiter = True
+        cls.waiter.save()
+        cls.table = Table.objects.create(code="M-1", capacity=4, state="occupied")
+        cls.bill = Bill.objects.create(code="CUE-000001", table=cls.table, waiter=cls.waiter, total=10)
+        cls.soup = Plate.objects.create(name="Sopa", price=80)
+        cls.wine = Plate.objects.create(name="Vino", price=120.5)
+
+    def post_items(self, items):
+        self.client.force_login(self.waiter)
+        return self.client.post(
+            f"/api/waiter/add-plates-to-bill/{self.bill.id}/", {"items": items}, content_type="application/json"
+        )
+
+    def test_batch_creates_every_plate_and_updates_total(self):
+        response = self.post_items([
+            {"plate_id": self.soup.id, "quantity": 3, "notes": "sin sal"},
+            {"plate_id": self.wine.id, "quantity": 2},
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["plates"]), 5)
+        self.bill.refresh_from_db()
+        self.assertEqual(self.bill.total, 10 + 80 * 3 + 120.5 * 2)
+        self.assertEqual(KitchenEvent.objects.count(), 5)
+
+    def test_invalid_line_creates_nothing(self):
+        response = self.post_items([
+            {"plate_id": self.soup.id, "quantity": 1},
+            {"plate_id": 9999, "quantity": 1},
+        ])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["items_valid"], "items[1]: Plate not found")
+        self.assertFalse(self.bill.plates.exists())
+
+    def test_closed_bill_is_rejected(self):
+        Bill.objects.filter(id=self.bill.id).update(state="closed")
+        response = self.post_items([{"plate_id": self.soup.id}])
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(BILL_MAX_PLATE_QUANTITY=5)
+    def test_quantity_is_capped_per_request(self):
+        response = self.post_items([
+            {"plate_id": self.soup.id, "quantity": 3},
+            {"plate_id": self.wine.id, "quantity": 3},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["items_valid"], "items: at most 5 plates can be added per request")
+
+        response = self.client.post(
+            f"/api/waiter/add-plate-to-bill/{self.bill.id}/",
+            {"plate_id": self.soup.id, "quantity": 6},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["quantity_valid"], "quantity must be at most 5")
+        self.assertFalse(self.bill.plates.exists())
+
+    def test_null_notes_are_empty_and_other_types_are_rejected(self):
+        self.client.force_login(self.waiter)
+        url = f"/api/waiter/add-plate-to-bill/{self.bill.id}/"
+        response = self.client.post(url, {"plate_id": self.soup.id, "notes": None}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.bill.plates.get().notes, "")
+
+        response = self.client.post(url, {"plate_id": self.soup.id, "notes": 5}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["notes_valid"], "notes must be a string")
+
+        response = self.post_items([{"plate_id": self.soup.id, "notes": ["x"]}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["items_valid"], "items[0]: notes must be a string")
+
+
+class WaiterAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.waiters = []
+        for i in range(5):
+            waiter = User.objects.create_user(f"waiter{i}@dinely.com", "password123", name=f"Mesero {i}")
+            waiter.is_waiter = True
+            waiter.save()
+            cls.waiters.append(waiter)
+        # Cada mesero tiene i cuentas actuales y una cerrada
+        for i, waiter in enumerate(cls.waiters):
+            Bill.objects.create(code=f"CUE-C{i}", waiter=waiter, state="closed")
+            for j in range(i):
+                Bill.objects.create(code=f"CUE-{i}{j}", waiter=waiter)
+
+    def test_least_loaded_waiter_is_found_with_one_query(self):
+        with self.assertNumQueries(1):
+            waiter = get_waiter_with_least_bills()
+        self.assertEqual(waiter, self.waiters[0])
+
+    @override_settings(WAITER_ASSIGNMENT_STRATEGY="round_robin")
+    def test_round_robin_picks_the_waiter_with_the_oldest_last_bill(self):
+        with self.assertNumQueries(1):
+            waiter = get_waiter_with_least_bills()
+        self.assertEqual(waiter, self.waiters[0])
+
+
+class UniqueCodeTests(TestCase):
+    def test_insert_is_retried_only_on_a_code_collision(self):
+        Bill.objects.create(code="CUE-AAAAAA")
+        codes = iter(["CUE-AAAAAA", "CUE-BBBBBB"])
+
+        bill = save_with_unique_code(Bill(), lambda: next(codes))
+
+        self.assertEqual(bill.code, "CUE-BBBBBB")
+        self.assertEqual(Bill.objects.filter(code__in=["CUE-AAAAAA", "CUE-BBBBBB"]).count(), 2)
+
+    def test_gives_up_after_max_attempts(self):
+        Bill.objects.create(code="CUE-AAAAAA")
+        with self.assertRaises(ValueError):
+            save_with_unique_code(Bill(), lambda: "CUE-AAAAAA")
+
+
+class MenuCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = PlateCategory.objects.create(label="Postres")
+        Plate.objects.create(name="Flan", price=60, category=self.category)
+
+    def test_repeated_requests_are_served_from_cache_and_revalidated_with_etag(self):
+        first = self.client.get("/api/plates/get-plates/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["plates"][0]["name"], "Flan")
+
+        # Solo se lee la version del menu (una fila); el payload sale del cache
+        with self.assertNumQueries(2):
+            second = self.client.get("/api/plates/get-plates/")
+            not_modified = self.client.get("/api/plates/get-plates/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+
+    @override_settings(CACHE_IS_SHARED=True)
+    def test_with_a_shared_cache_the_version_is_read_from_it(self):
+        first = self.client.get("/api/plates/get-plates/")
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get("/api/plates/get-plates/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_a_version_bumped_by_another_worker_is_seen(self):
+        first = self.client.get("/api/plates/get-plates/")
+
+        # Otro worker edita el menu: cambia la version en la base de datos, no en este cache
+        MenuVersion.objects.update(version="otro-worker")
+
+        response = self.client.get("/api/plates/get-plates/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("otro-worker", response["ETag"])
+
+    def test_editing_the_menu_changes_the_etag(self):
+        plates = self.client.get("/api/plates/get-plates/")
+        categories = self.client.get("/api/plates/get-plate-categories/")
+
+        self.category.label = "Dulces"
+        self.category.save()
+
+        new_plates = self.client.get("/api/plates/get-plates/", HTTP_IF_NONE_MATCH=plates["ETag"])
+        new_categories = self.client.get("/api/plates/get-plate-categories/", HTTP_IF_NONE_MATCH=categories["ETag"])
+        self.assertEqual(new_plates.status_code, 200)
+        self.assertEqual(new_plates.json()["plates"][0]["category"]["label"], "Dulces")
+        self.assertEqual(new_categories.json()["plate_categories"][0]["label"], "Dulces")
+
+
+class AvailabilityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.terraza = TableArea.objects.create(label="Terraza")
+        cls.salon = TableArea.objects.create(label="Salon")
+        cls.small = Table.objects.create(code="T-1", capacity=2, state="available", area=cls.terraza)
+        cls.medium = Table.objects.create(code="T-2", capacity=4, state="available", area=cls.terraza)
+        cls.large = Table.objects.create(code="S-1", capacity=6, state="available", area=cls.salon)
+        cls.day = (datetime.now(get_restaurant_tz()) + timedelta(days=1)).date()
+
+    def at(self, hour, minute=0):
+        return datetime.combine(self.day, time(hour, minute), tzinfo=get_restaurant_tz())
+
+    def reserve(self, hour, amount_people, area=None, code="RES-1"):
+        return Reservation.objects.create(
+            name="Cliente", code=code, date_time=self.at(hour), amount_people=amount_people,
+            state="active", table_area=area,
+        )
+
+    def test_smallest_free_table_in_the_area_is_picked(self):
+        self.reserve(20, 2, self.terraza)
+        index = AvailabilityIndex.for_day(self.day)
+
+        # La mesa de 2 ya esta tomada a las 20:00, la siguiente mas chica es la de 4
+        self.assertEqual(index.find_table(self.at(20), 2, self.terraza.id), self.medium)
+        self.assertEqual(index.find_table(self.at(22), 2, self.terraza.id), self.small)
+        self.assertIsNone(index.find_table(self.at(20), 6, self.terraza.id))
+        self.assertEqual(index.find_table(self.at(20), 6), self.large)
+
+    def test_endpoint_returns_every_slot_of_the_day(self):
+        self.reserve(20, 4, self.terraza)
+
+        with self.assertNumQueries(4):
+            response = self.client.get("/api/user/get-availability/", {
+                "date": self.day.isoformat(), "amount_people": 3, "table_area": "Terraza",
+            })
+
+        self.assertEqual(response.status_code, 200)
+        slots = {slot["date_time"]: slot["available"] for slot in response.json()["slots"]}
+        self.assertTrue(slots[self.at(18).isoformat()])
+        self.assertFalse(slots[self.at(18, 30).isoformat()])
+        self.assertFalse(slots[self.at(21, 30).isoformat()])
+        self.assertTrue(slots[self.at(22).isoformat()])
+
+    def test_invalid_parameters_are_rejected(self):
+        response = self.client.get("/api/user/get-availability/", {"date": "mañana", "amount_people": 2})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/api/user/get-availability/", {"date": self.day.isoformat(), "amount_people": 0})
+        self.assertEqual(response.status_code, 400)
+
+
+class AutoSeatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.waiter = User.objects.create_user("waiter@dinely.com", "password123", name="Mesero")
+        cls.waiter.is_waiter = True
+        cls.waiter.save()
+        cls.terraza = TableArea.objects.create(label="Terraza")
+        cls.salon = TableArea.objects.create(label="Salon")
+        cls.big_terraza = Table.objects.create(code="T-8", capacity=8, state="available", area=cls.terraza)
+        cls.small_terraza = Table.objects.create(code="T-4", capacity=4, state="available", area=cls.terraza)
+        cls.small_salon = Table.objects.create(code="S-2", capacity=2, state="available", area=cls.salon)
+
+    def test_smallest_fitting_table_in_the_preferred_area(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(find_best_available_table(2, self.terraza.id), self.small_terraza)
+        self.assertEqual(find_best_available_table(2), self.small_salon)
+        # Si el area no tiene mesa donde quepan, se usa otra area
+        self.assertEqual(find_best_available_table(6, self.salon.id), self.big_terraza)
+        self.assertIsNone(find_best_available_table(10))
+
+    def test_assign_table_to_reservation_in_auto_mode(self):
+        reservation = Reservation.objects.create(
+            name="Cliente", code="RES-AUTO", date_time=datetime.now(get_restaurant_tz()), amount_people=3,
+            state="active", table_area=self.terraza,
+        )
+        self.client.force_login(self.waiter)
+
+        response = self.client.post(
+            f"/api/waiter/assign-table-to-reservation/{reservation.id}/", {"auto": True}, content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["table"]["code"], "T-4")
+        self.assertTrue(Bill.objects.filter(table=self.small_terraza, state="current").exists())
+
+    def test_seating_plan_for_the_whole_day(self):
+        now = datetime.now(get_restaurant_tz())
+        for i, amount_people in enumerate([4, 4, 8]):
+            Reservation.objects.create(
+                name="Cliente", code=f"RES-{i}", date_time=now, amount_people=amount_people,
+                state="active", table_area=self.terraza,
+            )
+        self.client.force_login(self.waiter)
+
+        # Sesion + usuario + indice del dia (3) + reservaciones sin mesa
+        with self.assertNumQueries(6):
+            response = self.client.get("/api/waiter/get-seating-plan/")
+
+        plan = response.json()
+        self.assertEqual([item["table_code"] for item in plan["plan"]], ["T-4", "T-8", None])
+        self.assertEqual(plan["unplaced"], 1)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("cliente@correo.com", "password123", name="Cliente")
+
+    def test_emails_are_queued_and_sent_by_the_worker(self):
+        send_email_validation_email(self.user, "codigo", None)
+        send_email_validation_email(self.user, "codigo-2", None)
+        self.assertEqual(len(mail.outbox), 0)
+
+        call_command("send_outbox_emails", "--once", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ["cliente@correo.com"])
+        self.assertFalse(OutgoingEmail.objects.exclude(state=OutgoingEmail.SENT).exists())
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=2)
+    def test_failed_emails_are_retried_with_backoff_then_given_up(self):
+        send_email_validation_email(self.user, "codigo", None)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=SMTPException("down")):
+            self.assertEqual(send_pending_emails(), (0, 1))
+            email = OutgoingEmail.objects.get()
+            self.assertEqual(email.state, OutgoingEmail.PENDING)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+            # No se reintenta antes de tiempo
+            self.assertEqual(send_pending_emails(), (0, 0))
+
+            OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+            send_pending_emails()
+
+        email.refresh_from_db()
+        self.assertEqual(email.state, OutgoingEmail.FAILED)
+        self.assertEqual(email.attempts, 2)
+        self.assertEqual(email.last_error, "down")
+
+
+    def test_claimed_emails_are_leased_until_the_worker_is_presumed_dead(self):
+        send_email_validation_email(self.user, "codigo", None)
+
+        # Un worker reclama el correo y muere antes de enviarlo
+        self.assertEqual(len(claim_pending_emails(10)), 1)
+        self.assertEqual(send_pending_emails(), (0, 0))
+
+        # Al vencer el lease otro worker lo retoma
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(send_pending_emails(), (1, 0))
+        self.assertEqual(OutgoingEmail.objects.get().attempts, 2)
+
+
+class EmailOutboxLockTests(TransactionTestCase):
+    def test_emails_are_sent_outside_any_transaction(self):
+        user = get_user_model().objects.create_user("cliente@correo.com", "password123", name="Cliente")
+        send_email_validation_email(user, "codigo", None)
+        in_transaction = []
+
+        def send_messages(messages):
+            # Un servidor SMTP lento no debe tener tomado el lock de escritura de la base de datos
+            in_transaction.append(connection.in_atomic_block)
+            return len(messages)
+
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages", side_effect=send_messages):
+            self.assertEqual(send_pending_emails(), (1, 0))
+
+        self.assertEqual(in_transaction, [False])
+        self.assertEqual(OutgoingEmail.objects.get().state, OutgoingEmail.SENT)
+
+
+# Sesiones cached_db: solo se usan con un cache compartido entre workers
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db", CACHE_IS_SHARED=True)
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_user_cache()
+        self.cook = get_user_model().objects.create_user("cocina@dinely.com", "password123", name="Cocina")
+        self.cook.is_kitchen = True
+        self.cook.save()
+        self.client.force_login(self.cook)
+
+    def test_polling_endpoint_costs_no_auth_queries(self):
+        self.client.get("/api/user/get-current-user/")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/user/get-current-user/")
+        self.assertEqual(response.json()["user"]["email"], "cocina@dinely.com")
+
+    def test_role_changes_are_seen_on_the_next_request(self):
+        self.client.get("/api/kitchen/get-queue/")
+
+        self.cook.is_kitchen = False
+        self.cook.save()
+        self.assertEqual(self.client.get("/api/kitchen/get-queue/").status_code, 401)
+
+        self.cook.delete()
+        self.assertIsNone(self.client.get("/api/user/get-current-user/").json()["user"])
+
+    def test_each_request_gets_its_own_user_instance(self):
+        backend = CachedModelBackend()
+        first = backend.get_user(self.cook.id)
+        first.name = "Cambiado en un request"
+        first._state.adding = True
+
+        with self.assertNumQueries(0):
+            second = backend.get_user(self.cook.id)
+        self.assertEqual(second.name, "Cocina")
+        self.assertIsNot(second._state, first._state)
+        self.assertFalse(second._state.adding)
+
+    def test_queryset_updates_need_forget_cached_user(self):
+        self.client.get("/api/kitchen/get-queue/")
+
+        get_user_model().objects.filter(id=self.cook.id).update(is_active=False)
+        forget_cached_user(self.cook.id)
+        self.assertIsNone(self.client.get("/api/user/get-current-user/").json()["user"])
+
+
+class FastRenderingTests(TestCase):
+    """The .values() builders must produce exactly what the Read*Serializer produce."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_restaurant(bills=40, reservations=20, tables=8, plates=6, waiters=2, customers=2)
+        Reservation.objects.filter(id__in=Reservation.objects.order_by("id").values("id")[:5]).update(
+            table=Table.objects.order_by("id").first()
+        )
+        # Casos con relaciones nulas
+        Bill.objects.create(code="CUE-SOLA", total=10)
+        Plate.objects.create(name="Sin categoria", price=5)
+        BillPlate.objects.create(account=Bill.objects.get(code="CUE-SOLA"), plate=None, notes="")
+
+    def assertSamePayload(self, fast, serializer_data):
+        self.assertEqual(json.loads(dumps(fast)), json.loads(json.dumps(serializer_data, cls=DjangoJSONEncoder)))
+
+    def test_bills_match_read_bill_serializer(self):
+        bills = Bill.objects.order_by("id")
+        self.assertSamePayload(
+            build_bills(bill_values(bills)),
+            ReadBillSerializer(bills.with_related(), many=True).data,
+        )
+
+    def test_reservations_match_read_reservation_serializer(self):
+        reservations = Reservation.objects.order_by("id")
+        self.assertSamePayload(
+            build_reservations(reservation_values(reservations)),
+            ReadReservationSerializer(reservations.with_related(), many=True).data,
+        )
+
+    def test_tables_match_read_table_serializer(self):
+        tables = Table.objects.order_by("id")
+        self.assertSamePayload(
+            build_tables(table_values(tables)),
+            ReadTableSerializer(tables.with_active_bill_code(), many=True).data,
+        )
+
+
+@override_settings(EXPORT_CHUNK_SIZE=7)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = seed_restaurant(bills=30, reservations=10, tables=6, plates=5, waiters=2, customers=2)
+
+    def setUp(self):
+        self.client.force_login(self.staff["admin"])
+
+    def test_bills_ndjson_streams_every_bill_with_its_plates(self):
+        response = self.client.get("/api/admin/export-bills/", {"format": "ndjson"})
+
+        self.assertTrue(response.streaming)
+        bills = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([bill["id"] for bill in bills], list(Bill.objects.order_by("date_time", "id").values_list("id", flat=True)))
+        self.assertEqual(sum(len(bill["plates"]) for bill in bills), BillPlate.objects.count())
+
+    def test_csv_export_with_date_range(self):
+        day = restaurant_today() - timedelta(days=30)
+        response = self.client.get("/api/admin/export-reservations/", {"date_from": day.isoformat()})
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "code", "date_time"])
+        start_of_day, _ = restaurant_day_bounds(day)
+        self.assertEqual(len(lines) - 1, Reservation.objects.filter(date_time__gte=start_of_day).count())
+
+    def test_only_admins_can_export(self):
+        self.client.force_login(self.staff["waiters"][0])
+        self.assertEqual(self.client.get("/api/admin/export-bills/").status_code, 401)
+
+
+class SalesRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = seed_restaurant(bills=60, reservations=30, tables=6, plates=5, waiters=2, customers=2, days=10)
+        call_command("backfill_sales_rollups", stdout=StringIO())
+
+    def snapshot(self):
+        return {
+            # repr: las claves de los meseros/platillos/areas borrados son None
+            model.__name__: sorted((
+                tuple(round(value, 6) if isinstance(value, float) else value for value in row)
+                for row in model.objects.values_list(*[f.attname for f in model._meta.concrete_fields if f.name != "id"])
+            ), key=repr)
+            for model in ROLLUP_MODELS
+        }
+
+    def assertRollupsMatchRebuild(self):
+        incremental = self.snapshot()
+        rebuild_sales_rollups()
+        self.assertEqual(incremental, self.snapshot())
+
+    def admin_post(self, path, data):
+        self.client.force_login(self.staff["admin"])
+        response = self.client.post(path, data, content_type="application/json")
+        self.assertEqual(response.status_code, 201, response.content)
+        return response
+
+    def test_finalize_bill_adds_to_the_rollups_like_a_rebuild_would(self):
+        bill = Bill.objects.filter(state="current", table__isnull=False).select_related("waiter").first()
+        # Una reservacion de ayer todavia sentada: sus personas cuentan en el dia de la reservacion
+        Reservation.objects.create(
+            code="AYER-1", name="Ayer", email="ayer@example.com", phone_number="5500000000",
+            date_time=timezone.now() - timedelta(days=1), amount_people=4, state="in_course", table=bill.table, notes="",
+        )
+        self.client.force_login(bill.waiter)
+
+        response = self.client.post(
+            f"/api/waiter/finalize-bill/{bill.id}/",
+            {"amount_paid": bill.total * 2, "tip_percentage": 10},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertRollupsMatchRebuild()
+
+    def test_finalize_counts_plates_added_after_validation(self):
+        bill = Bill.objects.filter(state="current").select_related("waiter").first()
+        plate = Plate.objects.first()
+        validate = validate_finalize_bill
+
+        def validate_then_add_plate(*args):
+            result = validate(*args)
+            # Otro mesero agrega un platillo entre la validacion y el cierre
+            BillPlate.objects.create(plate=plate, account=bill, notes="")
+            Bill.objects.filter(id=bill.id).update(total=F("total") + plate.price)
+            return result
+
+        self.client.force_login(bill.waiter)
+        with mock.patch("backend.views.waiter.bills.validate_finalize_bill", side_effect=validate_then_add_plate):
+            response = self.client.post(
+                f"/api/waiter/finalize-bill/{bill.id}/", {"amount_paid": 100000, "tip_percentage": 0},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertRollupsMatchRebuild()
+
+    def test_deleted_areas_and_waiters_share_one_null_row_per_day(self):
+        User = get_user_model()
+        day = restaurant_today()
+        bills = []
+        for i, total in enumerate((100.0, 100.0, 50.0)):
+            area = TableArea.objects.create(label=f"Borrada {i}")
+            waiter = User.objects.create_user(f"borrado{i}@dinely.com", "password123", name=f"Borrado {i}")
+            table = Table.objects.create(code=f"B-{i}", capacity=2, area=area)
+            bills.append(Bill.objects.create(
+                code=f"BOR-{i}", table=table, waiter=waiter, state="closed", closed_at=timezone.now(), total=total,
+            ))
+        for bill in bills[:2]:
+            record_closed_bill(bill.id)
+            bill.table.area.delete()
+            bill.waiter.delete()
+        # Una cuenta mas sin area ni mesero, despues de borrar los dos
+        TableArea.objects.filter(id=bills[2].table.area_id).delete()
+        User.objects.filter(id=bills[2].waiter_id).delete()
+        record_closed_bill(bills[2].id)
+
+        self.assertEqual(DailyAreaSales.objects.filter(day=day, area=None).count(), 1)
+        self.assertEqual(DailyWaiterSales.objects.filter(day=day, waiter=None).count(), 1)
+        self.assertRollupsMatchRebuild()
+
+        # Y se pueden reabrir sin dejar valores negativos
+        record_closed_bill(bills[0].id, sign=-1)
+        Bill.objects.filter(id=bills[0].id).update(state="current")
+        self.assertRollupsMatchRebuild()
+
+    def test_plate_rollups_cost_the_same_for_any_number_of_plates(self):
+        plates = list(Plate.objects.all())
+        table = Table.objects.first()
+        counts = []
+        # La primera cuenta del dia crea las filas de DailySales/mesero/area, se mide a partir de la segunda
+        for amount in (1, 1, len(plates)):
+            bill = Bill.objects.create(
+                code=f"PL-{len(counts)}", table=table, waiter=self.staff["waiters"][0], state="closed", closed_at=timezone.now(),
+                total=sum(plate.price for plate in plates[:amount]),
+            )
+            BillPlate.objects.bulk_create([BillPlate(plate=plate, account=bill, notes="") for plate in plates[:amount]])
+            with CaptureQueriesContext(connection) as queries:
+                record_closed_bill(bill.id)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[1], counts[2])
+        self.assertRollupsMatchRebuild()
+
+    def test_reopening_and_closing_again_counts_the_bill_once(self):
+        bill = Bill.objects.filter(state="closed").first()
+
+        self.admin_post("/api/admin/edit-bill/", {"id": bill.id, "state": "current"})
+        self.admin_post("/api/admin/edit-bill/", {"id": bill.id, "state": "closed"})
+
+        self.assertEqual(sum(DailySales.objects.values_list("bills", flat=True)), Bill.objects.filter(state="closed").count())
+        self.assertRollupsMatchRebuild()
+
+    def test_editing_a_closed_bill_moves_it_between_rollups(self):
+        bill = Bill.objects.filter(state="closed").first()
+        waiter = next(waiter for waiter in self.staff["waiters"] if waiter.id != bill.waiter_id)
+
+        self.admin_post("/api/admin/edit-bill/", {"id": bill.id, "waiter": waiter.id})
+        self.assertRollupsMatchRebuild()
+
+    def test_deleting_a_closed_bill_takes_it_out(self):
+        for bill in Bill.objects.filter(state="closed")[:3]:
+            self.admin_post("/api/admin/delete-bill/", {"id": bill.id})
+        self.assertRollupsMatchRebuild()
+
+    def test_finalized_reservations_edited_by_the_admin_keep_the_covers(self):
+        table = Table.objects.first()
+        data = {
+            "name": "Cena", "email": "cena@example.com", "phone_number": "5512345678",
+            "date_time": (timezone.now() + timedelta(days=2)).isoformat(), "table": table.code,
+            "amount_people": 3, "state": "finalized",
+        }
+        self.admin_post("/api/admin/create-reservation/", data)
+        reservation = Reservation.objects.get(email="cena@example.com")
+        self.assertRollupsMatchRebuild()
+
+        self.admin_post("/api/admin/edit-reservation/", {
+            "id": reservation.id, **data, "date_time": (timezone.now() + timedelta(days=3)).isoformat(), "amount_people": 5,
+        })
+        self.assertRollupsMatchRebuild()
+
+        self.admin_post("/api/admin/delete-reservation/", {"id": reservation.id})
+        self.assertRollupsMatchRebuild()
+
+    def test_report_is_read_from_the_rollups_only(self):
+        self.client.force_login(self.staff["admin"])
+        today = restaurant_today()
+
+        # Sesion + usuario + un query por rollup, sin importar cuantas cuentas haya
+        with self.assertNumQueries(6):
+            report = self.client.get("/api/admin/get-sales-report/", {
+                "date_from": (today - timedelta(days=30)).isoformat(), "date_to": today.isoformat(),
+            }).json()
+
+        closed = Bill.objects.filter(state="closed")
+        self.assertEqual(report["totals"]["bills"], closed.count())
+        self.assertAlmostEqual(report["totals"]["revenue"], sum(closed.values_list("total", flat=True)))
+        self.assertEqual(sum(plate["quantity"] for plate in report["plates"]), BillPlate.objects.filter(account__state="closed").count())
+
+
+class TableStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = seed_restaurant(bills=0, reservations=0, tables=2, plates=2, waiters=1, customers=0, days=1)
+        cls.waiter = cls.staff["waiters"][0]
+        cls.table = Table.objects.order_by("id").first()
+
+    def test_only_one_occupy_wins(self):
+        self.assertTrue(occupy_table(self.table.id))
+        self.assertFalse(occupy_table(self.table.id))
+        self.assertTrue(release_table(self.table.id))
+        self.assertTrue(occupy_table(self.table.id))
+
+    def test_concurrent_create_bill_opens_one_bill(self):
+        self.client.force_login(self.waiter)
+        responses = []
+
+        def second_request(table):
+            # La segunda peticion llega mientras la primera todavia no ocupa la mesa
+            if not responses:
+                responses.append(None)
+                responses.append(self.client.post(
+                    "/api/waiter/create-bill/", {"table": self.table.id}, content_type="application/json",
+                ))
+            return self.waiter
+
+        with mock.patch("backend.views.waiter.bills.get_waiter_with_least_bills", side_effect=second_request):
+            first = self.client.post("/api/waiter/create-bill/", {"table": self.table.id}, content_type="application/json")
+
+        self.assertEqual(responses[1].status_code, 201)
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(Bill.objects.filter(table=self.table, state="current").count(), 1)
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.state, "occupied")
+
+    def test_finalize_twice_counts_the_bill_once(self):
+        self.client.force_login(self.waiter)
+        bill_id = self.client.post(
+            "/api/waiter/create-bill/", {"table": self.table.id}, content_type="application/json",
+        ).json()["id"]
+        payload = {"amount_paid": 100, "tip_percentage": 10}
+
+        first = self.client.post(f"/api/waiter/finalize-bill/{bill_id}/", payload, content_type="application/json")
+        second = self.client.post(f"/api/waiter/finalize-bill/{bill_id}/", payload, content_type="application/json")
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.assertEqual(sum(DailySales.objects.values_list("bills", flat=True)), 1)
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.state, "available")
+
+
+class ReviewSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = seed_restaurant(bills=0, reservations=0, tables=1, plates=1, waiters=1, customers=20, days=5)
+
+    def test_create_review_updates_the_summary_like_a_rebuild(self):
+        customer = self.staff["customers"][-1]
+        self.client.force_login(customer)
+        response = self.client.post(
+            "/api/review/create-review/", {"content": "Excelente", "score": 4}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+
+        incremental = get_review_summary()
+        rebuild_review_summary()
+        self.assertEqual(incremental, get_review_summary())
+        self.assertEqual(incremental["count"], Review.objects.count())
+
+        Review.objects.filter(user=customer).delete()
+        self.assertEqual(get_review_summary()["count"], Review.objects.count())
+
+    def test_first_reviews_created_at_the_same_time_are_both_counted(self):
+        ReviewSummary.objects.all().delete()
+        ours = Review.objects.create(user=self.staff["customers"][0], content="Rica", score=5)
+        theirs = Review.objects.create(user=self.staff["customers"][1], content="Lenta", score=2)
+        count_reviews = review_summary._count_reviews
+
+        def race():
+            # Cada peticion no ve la review de la otra (sin commit); la otra crea la fila justo antes que esta
+            ReviewSummary.objects.create(id=review_summary.SUMMARY_ID, **count_reviews(Review.objects.exclude(id=ours.id)))
+            return count_reviews(Review.objects.exclude(id=theirs.id))
+
+        with mock.patch.object(review_summary, "_count_reviews", side_effect=race):
+            review_summary.record_review(ours.score)
+
+        incremental = get_review_summary()
+        rebuild_review_summary()
+        self.assertEqual(incremental, get_review_summary())
+
+    def test_summary_endpoint_reads_one_row(self):
+        with self.assertNumQueries(1):
+            summary = self.client.get("/api/review/get-review-summary/").json()
+        scores = list(Review.objects.values_list("score", flat=True))
+        self.assertEqual(summary["count"], len(scores))
+        self.assertEqual(summary["average"], round(sum(scores) / len(scores), 2))
+        self.assertEqual(sum(summary["histogram"].values()), len(scores))
+
+    def test_reviews_feed_joins_users(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/review/get-reviews/", {"limit": 5})
+        self.assertEqual(len(response.json()["reviews"]), 5)
+
+
+class MaintenanceTests(TestCase):
+    def test_purges_only_expired_rows_in_batches(self):
+        now = timezone.now()
+        user = get_user_model().objects.create_user(email="nuevo@correo.com", password="x" * 12)
+        for is_used, expires_at in [(True, now + timedelta(minutes=5)), (False, now - timedelta(minutes=1)),
+                                    (False, now - timedelta(days=400)), (False, now + timedelta(minutes=5))]:
+            EmailValidationCode.objects.create(user=user, is_used=is_used, expires_at=expires_at)
+        Session.objects.create(session_key="expired", session_data="", expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key="alive", session_data="", expire_date=now + timedelta(days=1))
+        old = now - timedelta(days=60)
+        for state in [OutgoingEmail.SENT, OutgoingEmail.FAILED, OutgoingEmail.PENDING]:
+            email = OutgoingEmail.objects.create(subject="s", body="b", from_email="a@b.com", recipient="c@d.com", state=state)
+            OutgoingEmail.objects.filter(id=email.id).update(created_at=old)
+        KitchenEvent.objects.create(kind=KitchenEvent.PLATE_ADDED, payload={})
+        old_event = KitchenEvent.objects.create(kind=KitchenEvent.PLATE_ADDED, payload={})
+        KitchenEvent.objects.filter(id=old_event.id).update(created_at=old)
+
+        out = StringIO()
+        # VACUUM no puede correr dentro de la transaccion del test
+        call_command("dinely_maintenance", "--batch-size", "2", "--no-vacuum", stdout=out)
+
+        self.assertIn("email_validation_codes: 3 rows deleted", out.getvalue())
+        self.assertEqual(list(EmailValidationCode.objects.values_list("is_used", flat=True)), [False])
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["alive"])
+        self.assertEqual(list(OutgoingEmail.objects.values_list("state", flat=True)), [OutgoingEmail.PENDING])
+        self.assertEqual(KitchenEvent.objects.count(), 1)
+
+
+class MaintenanceVacuumTests(TransactionTestCase):
+    def test_vacuum_runs_outside_a_transaction(self):
+        out = StringIO()
+        call_command("dinely_maintenance", stdout=out)
+        self.assertIn("vacuum:", out.getvalue())
+
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        reset_throttle_store()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(email="mesero@correo.com", password="secreta-larga-123")
+
+    def tearDown(self):
+        reset_throttle_store()
+
+    def login(self, email, password="mala", ip="10.0.0.1"):
+        return self.client.post(
+            "/api/authentication/login/", {"email": email, "password": password},
+            content_type="application/json", REMOTE_ADDR=ip,
+        )
+
+    @override_settings(THROTTLE_RATES={"login": {"ip": "100/min", "email": "3/min"}})
+    def test_email_bucket_rejects_before_checking_the_password(self):
+        for _ in range(3):
+            self.assertEqual(self.login(self.user.email).status_code, 400)
+
+        with mock.patch("backend.models.User.check_password") as check_password:
+            response = self.login(self.user.email, ip="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        check_password.assert_not_called()
+        # Otro correo desde la misma IP sigue pasando
+        self.assertEqual(self.login("otro@correo.com").status_code, 404)
+
+    @override_settings(THROTTLE_RATES={"login": {"ip": "2/min"}})
+    def test_ip_bucket_refills_over_time(self):
+        with mock.patch("backend.throttling.time.time", return_value=1000.0):
+            self.assertEqual(self.login("a@correo.com").status_code, 404)
+            self.assertEqual(self.login("b@correo.com").status_code, 404)
+            self.assertEqual(self.login("c@correo.com").status_code, 429)
+            self.assertEqual(self.login("c@correo.com", ip="10.0.0.9").status_code, 404)
+        # 2/min: un token cada 30 segundos
+        with mock.patch("backend.throttling.time.time", return_value=1030.0):
+            self.assertEqual(self.login("c@correo.com").status_code, 404)
+
+    @override_settings(
+        THROTTLE_STORE="backend.throttling.CacheStore", THROTTLE_RATES={"register": {"email": "1/hour"}},
+    )
+    def test_cache_store_is_shared(self):
+        payload = {"email": "Nuevo@Correo.com", "password": "secreta-larga-123", "passwordConfirmation": "secreta-larga-123"}
+        self.assertEqual(self.client.post("/api/authentication/register/", payload, content_type="application/json").status_code, 201)
+        # Otro worker (otra instancia del store) ve la misma cubeta, y el email no distingue mayusculas
+        reset_throttle_store()
+        payload["email"] = "nuevo@correo.com"
+        response = self.client.post("/api/authentication/register/", payload, content_type="application/json")
+        self.assertEqual(response.status_code, 429)
+
+
+    @override_settings(THROTTLE_MAX_LOCAL_KEYS=2, THROTTLE_PRUNE_SECONDS=60)
+    def test_local_store_prunes_each_bucket_with_its_own_rate(self):
+        store = LocalMemoryStore()
+        store.take("register:ip:a", *parse_rate("1/hour"), now=1000.0)
+        store.take("login:ip:a", *parse_rate("30/min"), now=1000.0)
+        # Mas de 2 cubetas: se limpia una vez, y solo la de login ya se lleno otra vez
+        store.take("login:ip:b", *parse_rate("30/min"), now=1010.0)
+        self.assertEqual(set(store.buckets), {"register:ip:a", "login:ip:b"})
+
+        store.take("login:ip:c", *parse_rate("30/min"), now=1020.0)
+        store.take("login:ip:d", *parse_rate("30/min"), now=1030.0)
+        self.assertEqual(len(store.buckets), 4)
+        # Hasta que pasa el intervalo
+        store.take("login:ip:e", *parse_rate("30/min"), now=1075.0)
+        self.assertEqual(set(store.buckets), {"register:ip:a", "login:ip:e"})
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_QUERY_BUDGET=1)
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = seed_restaurant(bills=20, reservations=0, tables=4, plates=3, waiters=1, customers=0, days=2)
+
+    def setUp(self):
+        profiling_registry.clear()
+        self.client.force_login(self.staff["admin"])
+
+    def test_requests_are_recorded_per_view(self):
+        with self.assertLogs("backend.profiling", level="WARNING") as logs:
+            self.client.get("/api/admin/get-bills/")
+        self.assertIn("backend.views.shared.get_bills", logs.output[0])
+
+        metrics = self.client.get("/api/admin/metrics/")
+        self.assertEqual(metrics.status_code, 200)
+        body = metrics.content.decode()
+        view = 'view="backend.views.shared.get_bills"'
+        self.assertIn(f'dinely_request_duration_seconds_count{{{view}}} 1', body)
+        self.assertIn(f'dinely_serializer_duration_seconds_count{{{view}}} 1', body)
+        self.assertIn(f'dinely_db_queries_bucket{{{view},le="+Inf"}} 1', body)
+        self.assertRegex(body, r'dinely_response_size_bytes_sum\{view="backend.views.shared.get_bills"\} [1-9]')
+
+    def test_metrics_are_admin_only(self):
+        self.client.force_login(self.staff["waiters"][0])
+        self.assertEqual(self.client.get("/api/admin/metrics/").status_code, 401)
+
+
+def _post(data, path=None, user=None):
+    return {"method": "post", "data": data, "path": path, "user": user}
+
+
+def _get(params=None, path=None, user=None):
+    return {"method": "get", "data": params or {}, "path": path, "user": user}
+
+
+def _future(hours=48):
+    return (timezone.now() + timedelta(hours=hours)).isoformat()
+
+
+# Tiempo maximo por peticion en las pruebas (con el historial crecido)
+LATENCY_BUDGET_MS = 1000
+# Las rutas de una cuenta se llaman otra vez con una cuenta de LARGE_BILL_PLATES platillos distintos
+SMALL_BILL_PLATES = 3
+LARGE_BILL_PLATES = 20
+
+# route -> (role, max queries, build). build(test) prepares whatever the request needs (outside the count)
+# and returns the request. Roles: admin, cook, waiter, customer, anonymous.
+# Each request runs with cold caches (sessions, user cache, menu), so the budget is the worst case.
+ENDPOINT_BUDGETS = {
+    "admin/create-user/": ("admin", 6, lambda t: _post({"email": t.unique_email(), "name": "Nuevo", "is_waiter": True})),
+    "admin/edit-user/": ("admin", 6, lambda t: _post({"id": t.new_user().id, "email": t.unique_email(), "name": "Editado"})),
+    "admin/delete-user/": ("admin", 15, lambda t: _post({"id": t.new_user().id})),
+    "admin/list-users/": ("admin", 3, lambda t: _get({"limit": 50})),
+    "admin/get-waiters/": ("admin", 3, lambda t: _get()),
+    "admin/create-plate-category/": ("admin", 6, lambda t: _post({"label": t.unique("Categoria")})),
+    "admin/edit-plate-category/": ("admin", 9, lambda t: _post({"id": t.new_category().id, "label": t.unique("Categoria")})),
+    "admin/delete-plate-category/": ("admin", 7, lambda t: _post({"id": t.new_category().id})),
+    "admin/create-plate/": ("admin", 6, lambda t: _post(t.plate_payload())),
+    "admin/edit-plate/": ("admin", 8, lambda t: _post({"id": t.plates[0].id, **t.plate_payload()})),
+    "admin/delete-plate/": ("admin", 9, lambda t: _post({"id": t.new_plate().id})),
+    "admin/create-table-area/": ("admin", 5, lambda t: _post({"label": t.unique("Area")})),
+    "admin/edit-table-area/": ("admin", 8, lambda t: _post({"id": t.new_area().id, "label": t.unique("Area")})),
+    "admin/delete-table-area/": ("admin", 10, lambda t: _post({"id": t.new_area().id})),
+    "admin/get-table-areas/": ("admin", 1, lambda t: _get()),
+    "admin/create-table/": ("admin", 7, lambda t: _post(t.table_payload())),
+    "admin/edit-table/": ("admin", 9, lambda t: _post({"id": t.new_table().id, **t.table_payload()})),
+    "admin/delete-table/": ("admin", 9, lambda t: _post({"id": t.new_table().id})),
+    "admin/get-tables/": ("admin", 3, lambda t: _get({"limit": 50})),
+    "admin/get-available-tables/": ("admin", 3, lambda t: _get()),
+    "admin/create-reservation/": ("admin", 7, lambda t: _post(t.reservation_payload())),
+    "admin/edit-reservation/": ("admin", 6, lambda t: _post({"id": t.new_reservation().id, **t.reservation_payload()})),
+    "admin/delete-reservation/": ("admin", 7, lambda t: _post({"id": t.new_reservation().id})),
+    "admin/get-reservations/": ("admin", 3, lambda t: _get({"limit": 50})),
+    "admin/get-bills/": ("admin", 4, lambda t: _get({"limit": 50})),
+    "admin/export-bills/": ("admin", 4, lambda t: _get({"format": "ndjson"})),
+    "admin/export-reservations/": ("admin", 3, lambda t: _get()),
+    "admin/get-sales-report/": ("admin", 6, lambda t: _get()),
+    "admin/metrics/": ("admin", 2, lambda t: _get()),
+    "admin/create-bill/": ("admin", 15, lambda t: _post({"table": t.new_table().id, "waiter": t.waiter.id, "state": "current"})),
+    "admin/edit-bill/": ("admin", 15, lambda t: _post({"id": t.new_bill().id, "waiter": t.staff["waiters"][1].id})),
+    # Una cuenta cerrada, para que tambien se resten sus platillos de los reportes
+    "admin/delete-bill/": ("admin", 22, lambda t: _post({"id": t.new_bill(state="closed").id})),
+    "authentication/csrf/": ("anonymous", 0, lambda t: _get()),
+    "authentication/register/": ("anonymous", 6, lambda t: _post(
+        {"email": t.unique_email(), "password": "secreta-larga-123", "passwordConfirmation": "secreta-larga-123"}
+    )),
+    "authentication/login/": ("anonymous", 9, lambda t: _post({"email": t.customer.email, "password": "password123"})),
+    "authentication/set-password/": ("anonymous", 6, lambda t: _post(t.set_password_payload())),
+    "authentication/verify-email/": ("anonymous", 4, lambda t: _post({"code": t.validation_code()})),
+    "authentication/logout/": ("customer", 4, lambda t: _post({})),
+    "user/get-current-user/": ("customer", 2, lambda t: _get()),
+    "user/create-reservation/": ("customer", 7, lambda t: _post(t.user_reservation_payload())),
+    "user/get-reservation/": ("anonymous", 1, lambda t: _get({"code": t.new_reservation().code})),
+    "user/get-reservations/": ("customer", 4, lambda t: _get()),
+    "user/edit-reservation/": ("anonymous", 4, lambda t: _post({"code": t.new_reservation().code, **t.user_reservation_payload()})),
+    "user/cancel-reservation/": ("anonymous", 2, lambda t: _post({"code": t.new_reservation().code})),
+    "user/get-availability/": ("anonymous", 3, lambda t: _get({"date": restaurant_today().isoformat(), "amount_people": 2})),
+    "user/get-table-areas/": ("anonymous", 1, lambda t: _get()),
+    "review/create-review/": ("customer", 7, lambda t: _post({"content": "Muy rico", "score": 5}, user=t.new_user())),
+    "review/get-reviews/": ("anonymous", 1, lambda t: _get({"limit": 20})),
+    "review/get-review-summary/": ("anonymous", 1, lambda t: _get()),
+    "plates/get-plate-categories/": ("anonymous", 2, lambda t: _get()),
+    "plates/get-plates/": ("anonymous", 2, lambda t: _get()),
+    "kitchen/get-bills/": ("cook", 4, lambda t: _get({"limit": 50})),
+    "kitchen/mark-plate-cooked/<int:bill_plate_id>/": ("cook", 5, lambda t: _post(
+        {"cooked": True}, path=f"kitchen/mark-plate-cooked/{t.new_bill_plate().id}/"
+    )),
+    "kitchen/stream/": ("cook", 4, lambda t: _get()),
+    "kitchen/get-queue/": ("cook", 3, lambda t: _get()),
+    "waiter/create-bill/": ("waiter", 12, lambda t: _post({"table": t.new_table().id})),
+    "waiter/get-bills/": ("waiter", 4, lambda t: _get()),
+    "waiter/get-bill/<int:bill_id>/": ("waiter", 4, lambda t: _get(path=f"waiter/get-bill/{t.new_bill().id}/")),
+    "waiter/add-plate-to-bill/<int:bill_id>/": ("waiter", 11, lambda t: _post(
+        {"plate_id": t.plates[0].id, "quantity": 2}, path=f"waiter/add-plate-to-bill/{t.new_bill().id}/"
+    )),
+    "waiter/add-plates-to-bill/<int:bill_id>/": ("waiter", 11, lambda t: _post(
+        {"items": [{"plate_id": plate.id, "quantity": 2} for plate in t.plates[:3]]},
+        path=f"waiter/add-plates-to-bill/{t.new_bill().id}/",
+    )),
+    "waiter/finalize-bill/<int:bill_id>/": ("waiter", 30, lambda t: _post(
+        {"amount_paid": 100000, "tip_percentage": 10}, path=f"waiter/finalize-bill/{t.new_bill().id}/"
+    )),
+    "waiter/get-reservations/": ("waiter", 4, lambda t: _get()),
+    "waiter/get-seating-plan/": ("waiter", 6, lambda t: _get()),
+    "waiter/assign-table-to-reservation/<int:reservation_id>/": ("waiter", 16, lambda t: _post(
+        {"table_code": t.new_table().code}, path=f"waiter/assign-table-to-reservation/{t.new_reservation().id}/"
+    )),
+}
+
+# Rutas que reciben una cuenta de new_bill(): su numero de queries no puede depender de sus platillos
+BILL_ROUTES = [
+    "admin/edit-bill/",
+    "admin/delete-bill/",
+    "kitchen/mark-plate-cooked/<int:bill_plate_id>/",
+    "waiter/get-bill/<int:bill_id>/",
+    "waiter/add-plate-to-bill/<int:bill_id>/",
+    "waiter/add-plates-to-bill/<int:bill_id>/",
+    "waiter/finalize-bill/<int:bill_id>/",
+]
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    KITCHEN_STREAM_MAX_SECONDS=0,
+    THROTTLE_ENABLED=False,
+)
+class QueryBudgetTests(TestCase):
+    """
+    Every route of backend/urls.py, called with its role on a seeded restaurant: the number of queries
+    must stay within its budget, be the same after the history grows, and the request must be fast.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = seed_restaurant(
+            bills=150, reservations=80, tables=12, plates=LARGE_BILL_PLATES, waiters=3, customers=10, days=60,
+        )
+        cls.waiter = cls.staff["waiters"][0]
+        cls.customer = cls.staff["customers"][0]
+        cls.plates = cls.staff["plates"]
+        # Reservaciones de hoy ya sentadas (el seed no asigna mesas), para que las listas carguen mesas desde el inicio
+        day_start, _ = restaurant_day_bounds(restaurant_today())
+        Reservation.objects.bulk_create([
+            Reservation(
+                code=f"HOY-{i}", name="Hoy", email=cls.customer.email, phone_number="5522222222",
+                date_time=day_start + timedelta(hours=13 + i), amount_people=2, state="active",
+                table=cls.staff["tables"][-1 - i], notes="",
+            )
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.counter = 0
+        self.bill_plates = SMALL_BILL_PLATES
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f"{prefix} {self.counter}"
+
+    def unique_email(self):
+        return self.unique("nuevo").replace(" ", "") + "@correo.com"
+
+    def new_user(self):
+        return get_user_model().objects.create_user(email=self.unique_email(), password="password123", name="Nuevo")
+
+    def new_category(self):
+        return PlateCategory.objects.create(label=self.unique("Categoria"))
+
+    def new_plate(self):
+        return Plate.objects.create(name=self.unique("Platillo"), price=100, category=self.plates[0].category)
+
+    def new_area(self):
+        return TableArea.objects.create(label=self.unique("Area"))
+
+    def new_table(self):
+        return Table.objects.create(code=self.unique("T"), capacity=4, state="available", area=self.staff["tables"][0].area)
+
+    def new_reservation(self):
+        reservation = Reservation(
+            name="Invitado", email=self.customer.email, phone_number="5500000000", date_time=timezone.now() + timedelta(hours=1),
+            amount_people=2, state="active", notes="",
+        )
+        save_with_unique_code(reservation, lambda: self.unique("RES").replace(" ", "-"))
+        return reservation
+
+    def new_bill(self, state="current"):
+        table = self.new_table()
+        if state == "current":
+            table.state = "occupied"
+            table.save()
+        bill = Bill(table=table, waiter=self.waiter, state=state, closed_at=timezone.now() if state == "closed" else None)
+        save_with_unique_code(bill, lambda: self.unique("CUE").replace(" ", "-"))
+        plates = self.plates[:self.bill_plates]
+        BillPlate.objects.bulk_create([BillPlate(account=bill, plate=plate, notes="") for plate in plates])
+        bill.total = sum(plate.price for plate in plates)
+        bill.save()
+        return bill
+
+    def new_bill_plate(self):
+        return BillPlate.objects.filter(account=self.new_bill()).first()
+
+    def plate_payload(self):
+        return {"name": self.unique("Platillo"), "price": 120, "category": self.plates[0].category.label, "description": "Nuevo"}
+
+    def table_payload(self):
+        return {"code": self.unique("T"), "capacity": 4, "state": "available", "area": self.staff["tables"][0].area.label}
+
+    def reservation_payload(self):
+        return {
+            "name": "Invitado", "email": "invitado@correo.com", "phone_number": "5500000000",
+            "date_time": _future(), "amount_people": 2, "state": "active", "notes": "",
+        }
+
+    def user_reservation_payload(self):
+        return {"date_time": _future(), "table_area": self.staff["tables"][0].area.label, "amount_people": 2, "notes": ""}
+
+    def set_password_payload(self):
+        user = self.new_user()
+        user.is_active = False
+        user.save()
+        uid, token = generate_password_setup_token(user)
+        return {"uid": uid, "token": token, "password": "secreta-larga-123"}
+
+    def validation_code(self):
+        user = self.new_user()
+        user.is_active = False
+        user.save()
+        return generate_email_validation_code(user)
+
+    def grow_history(self, amount):
+        """Add amount more of everything the list endpoints return, like months more of service."""
+        tables = Table.objects.bulk_create([
+            Table(code=f"G-{i}", capacity=4, state="available", area=self.staff["tables"][i % 3].area) for i in range(amount)
+        ])
+        customers = get_user_model().objects.bulk_create([
+            get_user_model()(email=f"crece{i}@correo.com", name=f"Crece {i}", password="x") for i in range(amount)
+        ])
+        Review.objects.bulk_create([Review(user=user, content="Bien", score=4) for user in customers])
+        rebuild_review_summary()
+        Plate.objects.bulk_create([
+            Plate(name=f"Crece {i}", price=50, category=self.plates[i % len(self.plates)].category) for i in range(amount)
+        ])
+        bills = Bill.objects.bulk_create([
+            Bill(
+                code=f"G-{i}", table=tables[i], waiter=self.waiter, state="current" if i % 2 else "closed",
+                closed_at=None if i % 2 else timezone.now(), total=100,
+            )
+            for i in range(amount)
+        ])
+        BillPlate.objects.bulk_create([
+            BillPlate(account=bill, plate=plate, notes="") for bill in bills for plate in self.plates[:3]
+        ])
+        day_start, _ = restaurant_day_bounds(restaurant_today())
+        Reservation.objects.bulk_create([
+            Reservation(
+                code=f"G-{i}", name="Crece", email=self.customer.email, phone_number="5511111111",
+                date_time=day_start + timedelta(hours=14, minutes=i % 60), amount_people=2, state="active",
+                table=tables[i] if i % 3 == 0 else None, notes="",
+            )
+            for i in range(amount)
+        ])
+        KitchenEvent.objects.bulk_create([KitchenEvent(kind=KitchenEvent.PLATE_ADDED, payload={}) for _ in range(amount)])
+        rebuild_sales_rollups()
+
+    def call(self, route):
+        role, _, build = ENDPOINT_BUDGETS[route]
+        request = build(self)
+        self.client.logout()
+        user = request["user"] or {
+            "admin": self.staff["admin"], "cook": self.staff["cook"], "waiter": self.waiter, "customer": self.customer,
+        }.get(role)
+        if user is not None:
+            self.client.force_login(user)
+        # Caches frios: la sesion, el usuario y el menu se leen de la base de datos
+        cache.clear()
+        clear_user_cache()
+        reset_throttle_store()
+
+        path = "/api/" + (request["path"] or route)
+        started = perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            if request["method"] == "get":
+                response = self.client.get(path, request["data"])
+            else:
+                response = self.client.post(path, request["data"], content_type="application/json")
+            body = b"".join(response.streaming_content) if response.streaming else response.content
+        elapsed_ms = (perf_counter() - started) * 1000
+        self.assertLess(response.status_code, 300, f"{route}: {response.status_code} {body[:300]!r}")
+        return len(queries), elapsed_ms
+
+    def test_every_route_has_a_budget(self):
+        routes = {str(pattern.pattern) for pattern in urlpatterns}
+        self.assertEqual(routes - set(ENDPOINT_BUDGETS), set(), "routes without a query budget")
+        self.assertEqual(set(ENDPOINT_BUDGETS) - routes, set(), "budgets for routes that no longer exist")
+
+    def test_query_counts_stay_within_budget_and_do_not_grow_with_the_data(self):
+        small = {route: self.call(route) for route in ENDPOINT_BUDGETS}
+        self.grow_history(150)
+        large = {route: self.call(route) for route in ENDPOINT_BUDGETS}
+
+        self.bill_plates = LARGE_BILL_PLATES
+        large_bill = {route: self.call(route) for route in BILL_ROUTES}
+
+        for route, (_, max_queries, _) in ENDPOINT_BUDGETS.items():
+            with self.subTest(route=route):
+                self.assertLessEqual(max(small[route][0], large[route][0]), max_queries, f"{route} is over its query budget")
+                # Puede bajar (finalize crea las filas de los reportes del dia solo la primera vez), nunca subir
+                self.assertLessEqual(large[route][0], small[route][0], f"{route} runs more queries with more data")
+                self.assertLess(large[route][1], LATENCY_BUDGET_MS, f"{route} is over its latency budget")
+                if route in large_bill:
+                    self.assertEqual(large_bill[route][0], large[route][0], f"{route} runs more queries for a bigger bill")
+                    self.assertLess(large_bill[route][1], LATENCY_BUDGET_MS, f"{route} is over its latency budget")
@@ -0,0 +1,161 @@
+## Limite de intentos para login y registro (token bucket por IP y por email)
+# Corre como middleware antes de sesiones/autenticacion, asi una rafaga de intentos se rechaza
+# con 429 antes de buscar al usuario y pagar el hash PBKDF2 de check_password
+import json
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+PERIODS = {"s": 1, "sec": 1, "min": 60, "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate):
+    """'5/min' -> (capacity 5, refill of 5 tokens per 60 seconds as tokens/second)."""
+    amount, period = rate.split("/")
+    amount = int(amount)
+    return amount, amount / PERIODS[period]
+
+
+def _refill(tokens, updated_at, capacity, refill_rate, now):
+    return min(capacity, tokens + (now - updated_at) * refill_rate)
+
+
+class LocalMemoryStore:
+    """
+    Buckets in a dict of this process. Fine for one worker (or as a per-worker limit);
+    use CacheStore with a shared cache when running several.
+    """
+
+    def __init__(self):
+        # key -> (tokens, updated_at, capacity, refill_rate); cada cubeta guarda la tasa de su scope
+        self.buckets = {}
+        self.pruned_at = 0
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now):
+        with self.lock:
+            tokens, updated_at, _, _ = self.buckets.get(key, (capacity, now, capacity, refill_rate))
+            tokens = _refill(tokens, updated_at, capacity, refill_rate, now)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self.buckets[key] = (tokens, now, capacity, refill_rate)
+            self.prune(now)
+            return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+    def prune(self, now):
+        """
+        Full buckets don't add anything: drop them when there are too many keys, at most once
+        every THROTTLE_PRUNE_SECONDS so a flood of new keys doesn't pay the scan on every request.
+        """
+        if len(self.buckets) <= getattr(settings, "THROTTLE_MAX_LOCAL_KEYS", 10000):
+            return
+        if now - self.pruned_at < getattr(settings, "THROTTLE_PRUNE_SECONDS", 60):
+            return
+        self.pruned_at = now
+        full = [key for key, bucket in self.buckets.items() if _refill(*bucket, now) >= bucket[2]]
+        for key in full:
+            del self.buckets[key]
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheStore:
+    """
+    Buckets in a Django cache (THROTTLE_CACHE alias), shared by every worker that uses the same
+    cache: Redis/Memcached, or django.core.cache.backends.db.DatabaseCache to keep them in the database.
+    The read-modify-write isn't atomic, so under heavy contention a few extra requests can get through.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, "THROTTLE_CACHE", "default")]
+
+    def take(self, key, capacity, refill_rate, now):
+        key = f"throttle:{key}"
+        tokens, updated_at = self.cache.get(key, (capacity, now))
+        tokens = _refill(tokens, updated_at, capacity, refill_rate, now)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # Expira cuando la cubeta ya estaria llena otra vez
+        self.cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / refill_rate) + 1)
+        return allowed, 0 if allowed else (1 - tokens) / refill_rate
+
+    def clear(self):
+        self.cache.clear()
+
+
+_store = None
+
+
+def get_throttle_store():
+    global _store
+    if _store is None:
+        _store = import_string(getattr(settings, "THROTTLE_STORE", "backend.throttling.LocalMemoryStore"))()
+    return _store
+
+
+def reset_throttle_store():
+    """Forget the store (and its buckets), e.g. after changing THROTTLE_STORE in tests."""
+    global _store
+    _store = None
+
+
+def get_client_ip(request):
+    if getattr(settings, "THROTTLE_TRUST_X_FORWARDED_FOR", False):
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _get_email(request):
+    try:
+        data = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    email = data.get("email") if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+class ThrottleMiddleware:
+    """
+    Token bucket per (scope, IP) and per (scope, email) for the POST paths in THROTTLE_PATHS.
+    Each request takes one token from every bucket it belongs to; an empty bucket means 429
+    with Retry-After. Rates come from THROTTLE_RATES, e.g. {"login": {"ip": "20/min", "email": "5/min"}}.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        scope = getattr(settings, "THROTTLE_PATHS", {}).get(request.path)
+        if scope is None or request.method != "POST" or not getattr(settings, "THROTTLE_ENABLED", True):
+            return self.get_response(request)
+
+        rates = getattr(settings, "THROTTLE_RATES", {}).get(scope, {})
+        keys = []
+        if "ip" in rates:
+            keys.append(("ip", get_client_ip(request)))
+        if "email" in rates:
+            email = _get_email(request)
+            if email:
+                keys.append(("email", email))
+
+        store = get_throttle_store()
+        now = time.time()
+        for kind, value in keys:
+            capacity, refill_rate = parse_rate(rates[kind])
+            allowed, retry_after = store.take(f"{scope}:{kind}:{value}", capacity, refill_rate, now)
+            if not allowed:
+                response = JsonResponse({"error": "Too many attempts, try again later"}, status=429)
+                response["Retry-After"] = str(math.ceil(retry_after))
+                return response
+
+        return self.get_response(request)
@@ -1,12 +1,12 @@
 # backend/urls.py (or config/urls.py)
 from django.urls import path
-from backend.views.admin import plates, users, tables, reservations, bills
+from backend.views.admin import plates, users, tables, reservations, bills, exports, reports, metrics
 from backend.views.user import reservations as user_reservations
 from backend.views import shared
 from backend.views.authentication import authentication
 from backend.views.reviews import reviews
 from backend.views.waiter import bills as waiter_bills, reservations as waiter_reservations
-from backend.views.kitchen import plates as kitchen_plates
+from backend.views.kitchen import plates as kitchen_plates, stream as kitchen_stream
 
 urlpatterns = [
     path("admin/create-user/", users.create_user),
@@ -37,6 +37,10 @@ urlpatterns = [
     path("admin/delete-reservation/", reservations.delete_reservation),
     path("admin/get-reservations/", shared.get_reservations),
     path("admin/get-bills/", shared.get_bills),
+    path("admin/export-bills/", exports.export_bills),
+    path("admin/export-reservations/", exports.export_reservations),
+    path("admin/get-sales-report/", reports.get_sales_report),
+    path("admin/metrics/", metrics.get_metrics),
 
     path("admin/create-bill/", bills.create_bill),
     path("admin/edit-bill/", bills.edit_bill),
@@ -55,21 +59,27 @@ urlpatterns = [
     path("user/get-reservations/", user_reservations.get_user_reservations),
     path("user/edit-reservation/", user_reservations.edit_user_reservation),
     path("user/cancel-reservation/", user_reservations.cancel_user_reservation),
+    path("user/get-availability/", user_reservations.get_availability),
     path("user/get-table-areas/", shared.get_table_areas),
     
     path("review/create-review/", reviews.create_review),
     path("review/get-reviews/", reviews.get_reviews),
+    path("review/get-review-summary/", reviews.get_review_summary_view),
 
     path("plates/get-plate-categories/", shared.get_plate_categories),
     path("plates/get-plates/", shared.get_plates),
 
     path("kitchen/get-bills/", shared.get_bills),
     path("kitchen/mark-plate-cooked/<int:bill_plate_id>/", kitchen_plates.mark_plate_cooked),
+    path("kitchen/stream/", kitchen_stream.kitchen_stream),
+    path("kitchen/get-queue/", kitchen_plates.get_kitchen_queue),
     path("waiter/create-bill/", waiter_bills.create_bill),
     path("waiter/get-bills/", waiter_bills.get_waiter_bills),
     path("waiter/get-bill/<int:bill_id>/", waiter_bills.get_waiter_bill),
     path("waiter/add-plate-to-bill/<int:bill_id>/", waiter_bills.add_plate_to_bill),
+    path("waiter/add-plates-to-bill/<int:bill_id>/", waiter_bills.add_plates_to_bill),
     path("waiter/finalize-bill/<int:bill_id>/", waiter_bills.finalize_bill),
     path("waiter/get-reservations/", waiter_reservations.get_waiter_reservations),
+    path("waiter/get-seating-plan/", waiter_reservations.get_seating_plan),
     path("waiter/assign-table-to-reservation/<int:reservation_id>/", waiter_reservations.assign_table_to_reservation),
 ]
\ No newline at end of file
@@ -1,7 +1,11 @@
 import json
+from django.db import transaction
 from django.http import JsonResponse, HttpResponse
 from ...models import Bill
-from ...serializers.bills import AdminCreateBillSerializer, ReadBillSerializer
+from ...reports import record_closed_bill
+from ...serializers.bills import AdminCreateBillSerializer
+from ...table_state import AVAILABLE, set_table_state
+from ..rendering import build_bill
 from .validators import validate_create_bill, validate_edit_bill
 
 def create_bill(request):
@@ -26,10 +30,8 @@ def create_bill(request):
 
     bill = serializer.save()
 
-    # Después de usar el create serializer, ya no se puede usar para el .data
-    serializer = ReadBillSerializer(bill)
-
-    return JsonResponse(serializer.data, status=201)
+    # La respuesta tiene la misma forma que ReadBillSerializer, armada con .values()
+    return JsonResponse(build_bill(bill.id), status=201)
 
 
 def edit_bill(request):
@@ -66,10 +68,8 @@ def edit_bill(request):
 
     updated_bill = serializer.save()
 
-    # Después de usar el serializer de actualización, usar el de lectura
-    serializer = ReadBillSerializer(updated_bill)
-
-    return JsonResponse(serializer.data, status=201)
+    # La respuesta tiene la misma forma que ReadBillSerializer, armada con .values()
+    return JsonResponse(build_bill(updated_bill.id), status=201)
 
 
 def delete_bill(request):
@@ -85,19 +85,22 @@ def delete_bill(request):
     if not bill_id:
         return HttpResponse(status=400)
 
-    # Validar que la factura existe
-    try:
-        bill = Bill.objects.get(id=bill_id)
-    except Bill.DoesNotExist:
-        return HttpResponse(status=404)
+    with transaction.atomic():
+        # Validar que la factura existe
+        try:
+            bill = Bill.objects.select_for_update().get(id=bill_id)
+        except Bill.DoesNotExist:
+            return HttpResponse(status=404)
 
-    # If bill is active and has a table, free the table
-    if bill.table and bill.state == 'current':
-        bill.table.state = 'available'
-        bill.table.save()
+        # Una cuenta cerrada sale de los reportes
+        if bill.state == "closed":
+            record_closed_bill(bill.id, sign=-1)
 
-    # Eliminar la factura
-    bill.delete()
+        # If bill is active and has a table, free the table
+        if bill.table_id and bill.state == "current":
+            set_table_state(bill.table_id, AVAILABLE)
 
-    return HttpResponse(status=201)
+        # Eliminar la factura
+        bill.delete()
 
+    return HttpResponse(status=201)
@@ -0,0 +1,125 @@
+## Exportar historial de cuentas y reservaciones en streaming (CSV o NDJSON)
+import csv
+from itertools import islice
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from ...models import Bill, Reservation
+from ..pagination import filter_list
+from ..rendering import bill_values, build_bills, build_reservations, dumps, reservation_values
+
+BILL_CSV_COLUMNS = [
+    "id", "code", "date_time", "state", "table", "area", "waiter", "waiter_email",
+    "total", "total_paid", "tip", "plates_count", "plates",
+]
+RESERVATION_CSV_COLUMNS = [
+    "id", "code", "date_time", "state", "name", "email", "phone_number", "amount_people", "table", "area", "notes",
+]
+
+
+class _Echo:
+    """csv.writer target that hands back each written line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bill_csv_row(bill):
+    table = bill["table"] or {}
+    area = table.get("area") or {}
+    waiter = bill["waiter"] or {}
+    plates = [plate["plate"]["name"] for plate in bill["plates"] if plate["plate"]]
+    return [
+        bill["id"], bill["code"], bill["date_time"], bill["state"], table.get("code"), area.get("label"),
+        waiter.get("name"), waiter.get("email"), bill["total"], bill["total_paid"], bill["tip"],
+        len(bill["plates"]), " | ".join(plates),
+    ]
+
+
+def _reservation_csv_row(reservation):
+    table = reservation["table"] or {}
+    area = table.get("area") or {}
+    return [
+        reservation["id"], reservation["code"], reservation["date_time"], reservation["state"], reservation["name"],
+        reservation["email"], reservation["phone_number"], reservation["amount_people"], table.get("code"),
+        area.get("label"), reservation["notes"],
+    ]
+
+
+def _stream_export(request, rows, build, columns, to_csv_row, name):
+    """
+    Stream rows (a .values() queryset) in chunks: each chunk is read with .iterator(),
+    built with the same builders as the list endpoints and written out before the next one is read.
+    """
+    export_format = request.GET.get("format", "csv")
+    if export_format not in ("csv", "ndjson"):
+        return JsonResponse({"error": "format must be csv or ndjson"}, status=400)
+
+    chunk_size = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+    chunks = (build(chunk) for chunk in _chunks(rows.iterator(chunk_size=chunk_size), chunk_size))
+
+    if export_format == "ndjson":
+        def lines():
+            for chunk in chunks:
+                yield b"".join(dumps(item) + b"\n" for item in chunk)
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield writer.writerow(columns)
+        for chunk in chunks:
+            yield "".join(writer.writerow(to_csv_row(item)) for item in chunk)
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{name}.csv"'
+    return response
+
+
+def export_bills(request):
+    """
+    Bills with their plates, oldest first. Query params: format (csv|ndjson),
+    date_from, date_to, state, waiter, table (same filters as admin/get-bills/).
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not request.user.is_admin:
+        return HttpResponse(status=401)
+
+    bills, error = filter_list(Bill.objects.all(), request)
+    if error:
+        return error
+
+    rows = bill_values(bills.order_by("date_time", "id"))
+    return _stream_export(request, rows, build_bills, BILL_CSV_COLUMNS, _bill_csv_row, "bills")
+
+
+def export_reservations(request):
+    """
+    Reservations, oldest first. Query params: format (csv|ndjson), date_from, date_to, state, table.
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not request.user.is_admin:
+        return HttpResponse(status=401)
+
+    reservations, error = filter_list(Reservation.objects.all(), request, allowed=("state", "table"))
+    if error:
+        return error
+
+    rows = reservation_values(reservations.order_by("date_time", "id"))
+    return _stream_export(
+        request, rows, build_reservations, RESERVATION_CSV_COLUMNS, _reservation_csv_row, "reservations"
+    )
@@ -0,0 +1,17 @@
+from django.http import HttpResponse
+
+from ...profiling import registry
+
+
+def get_metrics(request):
+    """
+    Per-view request histograms of this process in Prometheus text format.
+    Empty unless PROFILING_ENABLED is on.
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not request.user.is_admin:
+        return HttpResponse(status=401)
+
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
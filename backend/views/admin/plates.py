@@ -69,7 +69,7 @@ def edit_plate_category(request):
     categories_serializer = ReadPlateCategorySerializer(plate_categories, many=True)
 
     # Obtener todos los platillos actualizados (porque pueden tener la categoría actualizada)
-    plates = Plate.objects.all()
+    plates = Plate.objects.select_related("category")
     plates_serializer = ReadPlateSerializer(plates, many=True)
 
     return JsonResponse({
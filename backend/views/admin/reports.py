@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+from django.db.models import Sum
+from django.http import HttpResponse, JsonResponse
+
+from ...models import DailyAreaSales, DailyPlateSales, DailySales, DailyWaiterSales
+from ...restaurant_time import restaurant_today
+
+
+def _parse_range(request):
+    """date_from/date_to as restaurant-local dates (YYYY-MM-DD), the last 30 days by default."""
+    try:
+        date_to = date.fromisoformat(request.GET["date_to"]) if request.GET.get("date_to") else restaurant_today()
+        date_from = (
+            date.fromisoformat(request.GET["date_from"]) if request.GET.get("date_from") else date_to - timedelta(days=29)
+        )
+    except ValueError:
+        return None, None, JsonResponse({"error": "date_from and date_to must be YYYY-MM-DD"}, status=400)
+    if date_from > date_to:
+        return None, None, JsonResponse({"error": "date_from must be before date_to"}, status=400)
+    return date_from, date_to, None
+
+
+def get_sales_report(request):
+    """
+    Sales dashboard for a date range, read only from the daily rollups (backend/reports.py):
+    totals, one row per day, waiters, best selling plates and areas.
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not request.user.is_admin:
+        return HttpResponse(status=401)
+
+    date_from, date_to, error = _parse_range(request)
+    if error:
+        return error
+
+    try:
+        plates_limit = int(request.GET.get("plates_limit", 10))
+    except ValueError:
+        return JsonResponse({"error": "plates_limit must be a valid integer"}, status=400)
+
+    in_range = {"day__gte": date_from, "day__lte": date_to}
+
+    days = list(
+        DailySales.objects.filter(**in_range).order_by("day")
+        .values("day", "bills", "covers", "revenue", "paid", "tips")
+    )
+    totals = {
+        field: sum(day[field] for day in days) for field in ("bills", "covers", "revenue", "paid", "tips")
+    }
+    totals["average_ticket"] = totals["revenue"] / totals["bills"] if totals["bills"] else 0
+
+    waiters = list(
+        DailyWaiterSales.objects.filter(**in_range)
+        .values("waiter_id", "waiter__name")
+        .annotate(bills=Sum("bills"), revenue=Sum("revenue"), tips=Sum("tips"))
+        .order_by("-revenue")
+    )
+    plates = list(
+        DailyPlateSales.objects.filter(**in_range)
+        .values("plate_id", "plate__name")
+        .annotate(quantity=Sum("quantity"), revenue=Sum("revenue"))
+        .order_by("-quantity", "plate_id")[:plates_limit]
+    )
+    areas = list(
+        DailyAreaSales.objects.filter(**in_range)
+        .values("area_id", "area__label")
+        .annotate(bills=Sum("bills"), revenue=Sum("revenue"))
+        .order_by("-revenue")
+    )
+
+    return JsonResponse({
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "totals": totals,
+        "days": days,
+        "waiters": [
+            {"id": row["waiter_id"], "name": row["waiter__name"], "bills": row["bills"], "revenue": row["revenue"], "tips": row["tips"]}
+            for row in waiters
+        ],
+        "plates": [
+            {"id": row["plate_id"], "name": row["plate__name"], "quantity": row["quantity"], "revenue": row["revenue"]}
+            for row in plates
+        ],
+        "areas": [
+            {"id": row["area_id"], "label": row["area__label"], "bills": row["bills"], "revenue": row["revenue"]}
+            for row in areas
+        ],
+    }, status=200)
@@ -1,7 +1,9 @@
 import json
+from django.db import transaction
 from django.http import HttpResponse, JsonResponse
 
 from backend.models import Reservation
+from backend.reports import record_covers
 from backend.serializers.reservations import AdminCreateReservationSerializer, ReadReservationSerializer
 from backend.views.admin.validators import validate_create_reservation
 
@@ -85,14 +87,19 @@ def delete_reservation(request):
     if not reservation_id:
         return HttpResponse(status=400)
 
-    # Validate that reservation exists
-    try:
-        reservation = Reservation.objects.get(id=reservation_id)
-    except Reservation.DoesNotExist:
-        return HttpResponse(status=404)
+    with transaction.atomic():
+        # Validate that reservation exists
+        try:
+            reservation = Reservation.objects.select_for_update().get(id=reservation_id)
+        except Reservation.DoesNotExist:
+            return HttpResponse(status=404)
+
+        # Las personas de una reservacion finalizada salen de los reportes
+        if reservation.state == "finalized":
+            record_covers([(reservation.date_time, reservation.amount_people)], sign=-1)
 
-    # Delete reservation
-    reservation.delete()
+        # Delete reservation
+        reservation.delete()
 
     # Return only status code (no data)
     return HttpResponse(status=201)
@@ -68,7 +68,7 @@ def edit_table_area(request):
     areas_serializer = ReadTableAreaSerializer(table_areas, many=True)
 
     # Obtener todos los mesas actualizadas (porque pueden tener el área actualizada)
-    tables = Table.objects.all()
+    tables = Table.objects.with_active_bill_code()
     tables_serializer = ReadTableSerializer(tables, many=True)
 
     return JsonResponse({
@@ -8,6 +8,7 @@ from backend.serializers.users import AdminUserCreateSerializer
 from backend.views.admin.validators import validate_create_user, validate_edit_user
 from backend.views.authentication.utils import generate_password_setup_token
 from backend.email_service import send_password_setup_email
+from backend.views.pagination import paginate
 
 def is_user_admin(request):
     """Check if user is authenticated and is an admin"""
@@ -61,10 +62,17 @@ def list_users(request):
         return JsonResponse({"error": "Unauthorized"}, status=401)
 
     User = get_user_model()
-    users = User.objects.all()
+    users, next_cursor, error = paginate(User.objects.all(), request)
+    if error:
+        return error
 
     serializer = UserReadSerializer(users, many=True)
-    return JsonResponse(serializer.data, safe=False)
+
+    # Sin limit/cursor se mantiene la respuesta original (lista completa)
+    if "limit" not in request.GET and "cursor" not in request.GET:
+        return JsonResponse(serializer.data, safe=False)
+
+    return JsonResponse({"users": serializer.data, "next_cursor": next_cursor}, status=200)
 
 def get_waiters(request):
     # Solo permitir a administradores autenticados
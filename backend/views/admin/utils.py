@@ -1,74 +1,90 @@
 import random
 import string
+from contextlib import nullcontext
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from backend.models import Reservation, Bill
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from backend.models import Bill
+
+
+CODE_CHARACTERS = string.ascii_uppercase + string.digits
 
 
 def generate_reservation_code():
     """
-    Generate a unique reservation code in format RES-###### (6 alphanumeric characters)
+    Generate a random reservation code in format RES-###### (6 alphanumeric characters).
+    Uniqueness is enforced by the unique index on Reservation.code, see save_with_unique_code.
     """
-    max_attempts = 100
-    for _ in range(max_attempts):
-        # Generate 6 random alphanumeric characters
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        code = f"RES-{random_part}"
-        
-        # Check if code already exists
-        if not Reservation.objects.filter(code=code).exists():
-            return code
-    
-    # If we couldn't generate a unique code after max_attempts, raise an error
-    raise ValueError("Could not generate unique reservation code after multiple attempts")
+    return f"RES-{''.join(random.choices(CODE_CHARACTERS, k=6))}"
 
 
 def generate_bill_code():
     """
-    Generate a unique bill code in format CUE-###### (6 alphanumeric characters)
+    Generate a random bill code in format CUE-###### (6 alphanumeric characters).
+    Uniqueness is enforced by the unique index on Bill.code, see save_with_unique_code.
+    """
+    return f"CUE-{''.join(random.choices(CODE_CHARACTERS, k=6))}"
+
+
+def save_with_unique_code(instance, generate_code, max_attempts=5):
     """
-    max_attempts = 100
+    Insert a new Bill or Reservation with a code from generate_code.
+    There is no existence check before inserting: the unique index on code guarantees
+    uniqueness even with concurrent requests, and the insert is only retried with a new
+    code when it actually collided (1 in ~2 billion per existing code).
+    """
+    connection = transaction.get_connection()
+
     for _ in range(max_attempts):
-        # Generate 6 random alphanumeric characters
-        random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-        code = f"CUE-{random_part}"
-        
-        # Check if code already exists
-        if not Bill.objects.filter(code=code).exists():
-            return code
-    
-    # If we couldn't generate a unique code after max_attempts, raise an error
-    raise ValueError("Could not generate unique bill code after multiple attempts")
+        instance.code = generate_code()
+        # Dentro de una transaccion hace falta un savepoint para poder seguir despues del error
+        context = transaction.atomic() if connection.in_atomic_block else nullcontext()
+        try:
+            with context:
+                instance.save(force_insert=True)
+            return instance
+        except IntegrityError:
+            # Solo reintentar si el error fue por el codigo repetido
+            if not type(instance).objects.filter(code=instance.code).exists():
+                raise
+
+    raise ValueError(f"Could not generate unique {type(instance).__name__.lower()} code after multiple attempts")
 
 
-def get_waiter_with_least_bills():
+def get_waiter_with_least_bills(table=None):
     """
-    Find the waiter with the lowest number of current bills assigned.
-    If multiple waiters have the same lowest count, randomly pick one.
-    Returns None if no waiters are available.
+    Pick the waiter for a new bill with a single query, using the strategy in
+    settings.WAITER_ASSIGNMENT_STRATEGY:
+    - "least_loaded" (default): the waiter with the lowest number of current bills.
+    - "round_robin": the waiter whose last bill is the oldest (or who has none yet).
+    - "area_affinity": the waiter with the most current bills in the table's area,
+      then the least loaded; falls back to least_loaded when there is no area.
+    Ties are broken randomly. Returns None if no waiters are available.
     """
     User = get_user_model()
-    
-    # Get all waiters
-    waiters = User.objects.filter(is_waiter=True, is_active=True)
-    
-    if not waiters.exists():
-        return None
-    
-    # Count current bills for each waiter
-    waiter_bill_counts = []
-    for waiter in waiters:
-        bill_count = Bill.objects.filter(waiter=waiter, state="current").count()
-        waiter_bill_counts.append((waiter, bill_count))
-    
-    # Find the minimum bill count
-    min_count = min(count for _, count in waiter_bill_counts)
-    
-    # Get all waiters with the minimum count
-    waiters_with_min_count = [waiter for waiter, count in waiter_bill_counts if count == min_count]
-    
-    # Randomly pick one from waiters with minimum count
-    if waiters_with_min_count:
-        return random.choice(waiters_with_min_count)
-    
-    return None
+    strategy = getattr(settings, "WAITER_ASSIGNMENT_STRATEGY", "least_loaded")
+
+    # Subconsulta por mesero en lugar de un JOIN con todo el historial, usa bill_waiter_state_idx
+    current_bills = Bill.objects.filter(waiter=OuterRef("pk"), state="current").values("waiter").annotate(
+        total=Count("id")
+    ).values("total")
+    waiters = User.objects.filter(is_waiter=True, is_active=True).annotate(
+        current_bills=Coalesce(Subquery(current_bills), 0)
+    )
+
+    if strategy == "round_robin":
+        waiters = waiters.annotate(last_bill=Max("accounts__date_time"))
+        ordering = [F("last_bill").asc(nulls_first=True)]
+    elif strategy == "area_affinity" and table is not None and table.area_id:
+        waiters = waiters.annotate(area_bills=Count(
+            "accounts",
+            filter=Q(accounts__state="current", accounts__table__area_id=table.area_id)
+        ))
+        ordering = ["-area_bills", "current_bills"]
+    else:
+        ordering = ["current_bills"]
 
+    # Desempate aleatorio entre meseros con la misma carga
+    return waiters.order_by(*ordering, "?").first()
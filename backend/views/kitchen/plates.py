@@ -1,7 +1,9 @@
 import json
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
-from backend.models import BillPlate
+from backend.models import BillPlate, KitchenEvent
+from backend.serializers.bills import ReadKitchenPlateSerializer
+from backend.views.kitchen.utils import record_kitchen_events
 
 
 def mark_plate_cooked(request, bill_plate_id):
@@ -25,7 +27,7 @@ def mark_plate_cooked(request, bill_plate_id):
 
     # Get the BillPlate
     try:
-        bill_plate = BillPlate.objects.get(id=bill_plate_id)
+        bill_plate = BillPlate.objects.select_related("plate", "account__table").get(id=bill_plate_id)
     except BillPlate.DoesNotExist:
         return JsonResponse({"error": "Bill plate not found"}, status=404)
 
@@ -37,6 +39,9 @@ def mark_plate_cooked(request, bill_plate_id):
         bill_plate.cooked_at = None
     bill_plate.save()
 
+    # Avisar a las pantallas conectadas al stream de cocina
+    record_kitchen_events(KitchenEvent.PLATE_COOKED if cooked else KitchenEvent.PLATE_UNCOOKED, [bill_plate])
+
     # Return success response
     return JsonResponse({
         "success": True,
@@ -45,3 +50,24 @@ def mark_plate_cooked(request, bill_plate_id):
         "cooked_at": bill_plate.cooked_at.isoformat() if bill_plate.cooked_at else None
     }, status=200)
 
+
+def get_kitchen_queue(request):
+    """
+    Get the plates the kitchen still has to cook: uncooked plates of current bills,
+    as a flat list ordered by the time they were ordered.
+    Only accessible to authenticated kitchen staff or admins.
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not (request.user.is_kitchen or request.user.is_admin):
+        return JsonResponse({"error": "Unauthorized"}, status=401)
+
+    # Usa el indice parcial billplate_pending_idx, no depende del historial de cuentas
+    bill_plates = BillPlate.objects.select_related("plate", "account__table").filter(
+        cooked=False,
+        account__state="current",
+    ).order_by("id")
+    serializer = ReadKitchenPlateSerializer(bill_plates, many=True)
+
+    return JsonResponse({"plates": serializer.data}, status=200)
@@ -0,0 +1,37 @@
+from django.db.models import Max
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from backend.models import KitchenEvent
+from backend.views.kitchen.utils import parse_kitchen_cursor, stream_kitchen_events
+
+
+def kitchen_stream(request):
+    """
+    Server-Sent Events feed of BillPlate changes (plate added, cooked, uncooked).
+    Accessible to authenticated kitchen staff, waiters and admins.
+    Resumes after the Last-Event-ID header (or last_event_id query parameter) when given,
+    otherwise only pushes events created after the connection was opened.
+    The ids sent are stream cursors (see stream_kitchen_events), a plain event id is also accepted.
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not (request.user.is_kitchen or request.user.is_waiter or request.user.is_admin):
+        return HttpResponse(status=401)
+
+    cursor = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+
+    gaps = {}
+    if cursor is None:
+        last_event_id = KitchenEvent.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+    else:
+        try:
+            last_event_id, gaps = parse_kitchen_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"error": "last_event_id must be a valid integer"}, status=400)
+
+    response = StreamingHttpResponse(stream_kitchen_events(last_event_id, gaps), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Evita que nginx guarde la respuesta en buffer
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,107 @@
+import json
+import math
+import time
+from django.conf import settings
+from django.db.models import Q
+
+from backend.models import KitchenEvent
+from backend.serializers.bills import ReadKitchenPlateSerializer
+
+
+def record_kitchen_events(kind, bill_plates):
+    """
+    Store one KitchenEvent per BillPlate so the kitchen stream can push it.
+    The bill plates must have their plate and bill (with its table) loaded.
+    """
+    events = [
+        KitchenEvent(kind=kind, bill_plate=bill_plate, payload=ReadKitchenPlateSerializer(bill_plate).data)
+        for bill_plate in bill_plates
+    ]
+    return KitchenEvent.objects.bulk_create(events)
+
+
+def format_kitchen_event(event, cursor=None):
+    """Format a KitchenEvent as a Server-Sent Events message. The SSE id is the stream cursor."""
+    data = json.dumps(event.payload, separators=(",", ":"))
+    return f"id: {cursor or event.id}\nevent: {event.kind}\ndata: {data}\n\n"
+
+
+def format_kitchen_cursor(last_event_id, gaps):
+    """
+    '105' or, with ids still missing below it, '105-101:1760000010,103:1760000012'
+    (each missing id with the unix time at which it stops being looked up).
+    """
+    if not gaps:
+        return str(last_event_id)
+    return f"{last_event_id}-{','.join(f'{gap}:{until}' for gap, until in sorted(gaps.items()))}"
+
+
+def parse_kitchen_cursor(value):
+    """
+    Inverse of format_kitchen_cursor: (last_event_id, {missing id: until}). Raises ValueError.
+    A missing id without its time (cursors sent before it was added) gets None.
+    """
+    last_event_id, _, gaps = value.partition("-")
+    parsed = {}
+    for gap in filter(None, gaps.split(",")):
+        gap, _, until = gap.partition(":")
+        parsed[int(gap)] = int(until) if until else None
+    return int(last_event_id), parsed
+
+
+def stream_kitchen_events(last_event_id, gaps=None):
+    """
+    Generator that yields every KitchenEvent after last_event_id, polling for new ones.
+    The stream closes after KITCHEN_STREAM_MAX_SECONDS; the browser reconnects on its own
+    sending Last-Event-ID, so a worker is never held by a single client forever.
+
+    Ids are taken when the INSERT runs but become visible on commit, so on PostgreSQL a lower id can
+    show up after a higher one was already sent. The ids skipped over (gaps) are looked up again for
+    KITCHEN_STREAM_GAP_SECONDS from when they were first seen. They travel in the SSE id with that
+    deadline, so a reconnect keeps looking for them until then, and no longer.
+    """
+    poll_seconds = getattr(settings, "KITCHEN_STREAM_POLL_SECONDS", 1)
+    max_seconds = getattr(settings, "KITCHEN_STREAM_MAX_SECONDS", 30)
+    retry_ms = getattr(settings, "KITCHEN_STREAM_RETRY_MS", 2000)
+    gap_seconds = getattr(settings, "KITCHEN_STREAM_GAP_SECONDS", 10)
+    max_gaps = getattr(settings, "KITCHEN_STREAM_MAX_GAPS", 100)
+
+    deadline = time.monotonic() + max_seconds
+    # id que falta -> hasta cuando se sigue buscando (unix, viaja en el cursor); despues se da por un rollback
+    now = time.time()
+    pending = {
+        gap: until or math.ceil(now + gap_seconds) for gap, until in (gaps or {}).items() if gap < last_event_id
+    }
+    pending = {gap: until for gap, until in pending.items() if until > now}
+    yield f"retry: {retry_ms}\n\n"
+
+    while True:
+        query = Q(id__gt=last_event_id)
+        if pending:
+            query |= Q(id__in=list(pending))
+        events = list(KitchenEvent.objects.filter(query).order_by("id")[:500])
+        now = time.time()
+        for event in events:
+            if event.id in pending:
+                del pending[event.id]
+            elif event.id > last_event_id:
+                # Solo los ultimos max_gaps: un salto grande es historial purgado, no transacciones abiertas
+                for missing in range(max(last_event_id + 1, event.id - max_gaps), event.id):
+                    pending[missing] = math.ceil(now + gap_seconds)
+                last_event_id = event.id
+            yield format_kitchen_event(event, format_kitchen_cursor(last_event_id, pending))
+
+        pending = {gap: until for gap, until in pending.items() if until > now}
+
+        # Si el lote vino lleno puede haber mas eventos, no hay que esperar
+        if len(events) == 500:
+            continue
+
+        if time.monotonic() >= deadline:
+            return
+
+        if not events:
+            # Comentario SSE para que los proxies no cierren la conexion
+            yield ": keep-alive\n\n"
+
+        time.sleep(poll_seconds)
@@ -0,0 +1,134 @@
+## Paginacion por cursor (keyset) y filtros para los endpoints de listas
+import base64
+import json
+from datetime import datetime
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from backend.restaurant_time import restaurant_day_bounds
+
+
+def encode_cursor(value, pk):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, pk], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, field):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return field.to_python(value), int(pk)
+
+
+def paginate(queryset, request, order_field="id"):
+    """
+    Keyset pagination, newest first, with a stable (order_field, id) descending ordering.
+    Only applies when the request sends limit= or cursor=; otherwise the whole queryset is
+    returned so existing clients keep working.
+    Returns a (items, next_cursor, error_response) tuple. next_cursor is None on the last page.
+    """
+    limit = request.GET.get("limit")
+    cursor = request.GET.get("cursor")
+
+    if limit is None and cursor is None:
+        return queryset, None, None
+
+    default_limit = getattr(settings, "PAGINATION_DEFAULT_LIMIT", 50)
+    max_limit = getattr(settings, "PAGINATION_MAX_LIMIT", 200)
+    try:
+        limit = int(limit) if limit is not None else default_limit
+    except ValueError:
+        return None, None, JsonResponse({"error": "limit must be a valid integer"}, status=400)
+    if limit < 1:
+        return None, None, JsonResponse({"error": "limit must be at least 1"}, status=400)
+    limit = min(limit, max_limit)
+
+    field = queryset.model._meta.get_field(order_field)
+    if order_field == "id":
+        queryset = queryset.order_by("-id")
+    else:
+        queryset = queryset.order_by(f"-{order_field}", "-id")
+
+    if cursor:
+        try:
+            value, pk = decode_cursor(cursor, field)
+        except (ValueError, TypeError, ValidationError):
+            return None, None, JsonResponse({"error": "Invalid cursor"}, status=400)
+
+        if order_field == "id":
+            queryset = queryset.filter(id__lt=pk)
+        else:
+            queryset = queryset.filter(Q(**{f"{order_field}__lt": value}) | Q(**{order_field: value, "id__lt": pk}))
+
+    # Se pide un elemento de mas para saber si hay otra pagina sin hacer un COUNT
+    items = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        # Los items pueden ser instancias o dicts de .values()
+        if isinstance(last, dict):
+            next_cursor = encode_cursor(last[order_field], last["id"])
+        else:
+            next_cursor = encode_cursor(getattr(last, order_field), last.id)
+
+    return items, next_cursor, None
+
+
+def parse_date_bound(value, end=False):
+    """
+    Parse a date_from/date_to value. Accepts a datetime, or a date meaning a whole
+    day in the restaurant's local timezone. Returns (lookup, datetime) or None if invalid.
+    """
+    parsed = parse_datetime(value)
+    if parsed is not None:
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return ("lte" if end else "gte"), parsed
+
+    day = parse_date(value)
+    if day is None:
+        return None
+
+    start_of_day, end_of_day = restaurant_day_bounds(day)
+    if end:
+        # date_to incluye todo el dia
+        return "lt", end_of_day
+    return "gte", start_of_day
+
+
+def filter_list(queryset, request, date_field="date_time", allowed=("state", "waiter", "table")):
+    """
+    Apply the list filters in SQL: state, date_from, date_to (on date_field), waiter (id) and table (id).
+    Only the filters named in allowed (plus the date range) are read.
+    Returns a (queryset, error_response) tuple.
+    """
+    params = request.GET
+
+    if "state" in allowed and params.get("state"):
+        queryset = queryset.filter(state=params["state"])
+
+    for name in ("waiter", "table"):
+        if name in allowed and params.get(name):
+            try:
+                queryset = queryset.filter(**{f"{name}_id": int(params[name])})
+            except ValueError:
+                return None, JsonResponse({"error": f"{name} must be a valid id"}, status=400)
+
+    for name, end in (("date_from", False), ("date_to", True)):
+        if params.get(name):
+            try:
+                bound = parse_date_bound(params[name], end=end)
+            except ValueError:
+                bound = None
+            if bound is None:
+                return None, JsonResponse({"error": f"{name} must be a date or datetime"}, status=400)
+            lookup, value = bound
+            queryset = queryset.filter(**{f"{date_field}__{lookup}": value})
+
+    return queryset, None
@@ -1,9 +1,12 @@
 import json
+from django.db import transaction
 from django.http import HttpResponse, JsonResponse
 
 from backend.models import Review
 from backend.serializers.reviews import CreateReviewSerializer, ReadReviewSerializer
+from backend.review_summary import get_review_summary, record_review
 from backend.views.reviews.validators import validate_create_review
+from backend.views.pagination import paginate
 
 
 def create_review(request):
@@ -31,7 +34,9 @@ def create_review(request):
         print(serializer.errors)
         return JsonResponse(serializer.errors, status=400)
 
-    review = serializer.save()
+    with transaction.atomic():
+        review = serializer.save()
+        record_review(review.score)
 
     # Return created review using read serializer
     read_serializer = ReadReviewSerializer(review)
@@ -42,8 +47,11 @@ def get_reviews(request):
     if request.method != "GET":
         return HttpResponse(status=405)
 
-    # Get all reviews (public endpoint, no authentication required)
-    reviews = Review.objects.all().order_by("-created_at")
+    # Get all reviews (public endpoint, no authentication required), users joined in the same query
+    reviews = Review.objects.select_related("user").order_by("-created_at")
+    reviews, next_cursor, error = paginate(reviews, request, order_field="created_at")
+    if error:
+        return error
     serializer = ReadReviewSerializer(reviews, many=True)
 
     # Check if authenticated user has already left a review
@@ -53,6 +61,14 @@ def get_reviews(request):
 
     return JsonResponse({
         "reviews": serializer.data,
-        "user_has_reviewed": user_has_reviewed
+        "user_has_reviewed": user_has_reviewed,
+        "next_cursor": next_cursor
     }, status=200)
 
+
+def get_review_summary_view(request):
+    """Rating widget: count, average and 1-5 histogram, from the summary row (one query)."""
+    if request.method != "GET":
+        return HttpResponse(status=405)
+
+    return JsonResponse(get_review_summary(), status=200)
@@ -1,30 +1,40 @@
 ## Aqui van funciones que se usan en muchos lados, son funciones que prinpipalmente obtienen informacion
 from django.http import JsonResponse, HttpResponse
 
-from backend.models import PlateCategory, Plate, Reservation, Table, TableArea, Bill
+from django.db.models import Q
+
+from backend.models import PlateCategory, Plate, Reservation, Table, TableArea, Bill, BillPlate, DeletedRecord
 from backend.serializers.tables import ReadTableSerializer, ReadTableAreaSerializer
-from backend.serializers.reservations import ReadReservationSerializer
 from backend.serializers.plates import ReadPlateCategorySerializer, ReadPlateSerializer
-from backend.serializers.bills import ReadBillSerializer
+from backend.views.sync import parse_since, get_sync_cursor, get_deleted_ids
+from backend.views.pagination import paginate, filter_list
+from backend.menu_cache import cached_menu_response
+from backend.views.rendering import (
+    FastJsonResponse, bill_values, build_bills, build_reservations, build_tables, reservation_values, table_values,
+)
 
 def get_plate_categories(request):
     if not request.method == "GET":
         return HttpResponse(status=405)
 
-    plate_categories = PlateCategory.objects.all()
-    serializer = ReadPlateCategorySerializer(plate_categories, many=True)
+    def build_payload():
+        plate_categories = PlateCategory.objects.all()
+        serializer = ReadPlateCategorySerializer(plate_categories, many=True)
+        return {"plate_categories": serializer.data}
 
-    return JsonResponse({"plate_categories": serializer.data}, status=200)
+    return cached_menu_response(request, "plate-categories", build_payload)
 
 
 def get_plates(request):
     if not request.method == "GET":
         return HttpResponse(status=405)
 
-    plates = Plate.objects.all()
-    serializer = ReadPlateSerializer(plates, many=True)
+    def build_payload():
+        plates = Plate.objects.select_related("category")
+        serializer = ReadPlateSerializer(plates, many=True)
+        return {"plates": serializer.data}
 
-    return JsonResponse({"plates": serializer.data}, status=200)
+    return cached_menu_response(request, "plates", build_payload)
 
 
 def get_reservations(request):
@@ -34,10 +44,27 @@ def get_reservations(request):
     if not request.user.is_authenticated or not request.user.is_admin:
         return HttpResponse(status=401)
 
-    reservations = Reservation.objects.all()
-    serializer = ReadReservationSerializer(reservations, many=True)
+    since, error = parse_since(request)
+    if error:
+        return error
+
+    reservations, error = filter_list(Reservation.objects.all(), request, allowed=("state", "table"))
+    if error:
+        return error
+
+    cursor = get_sync_cursor()
+    if since:
+        reservations = reservations.filter(updated_at__gte=since)
+
+    reservations, next_cursor, error = paginate(reservation_values(reservations), request, order_field="date_time")
+    if error:
+        return error
+
+    response = {"reservations": build_reservations(reservations), "cursor": cursor, "next_cursor": next_cursor}
+    if since:
+        response["deleted"] = {"reservations": get_deleted_ids(Reservation, since)}
 
-    return JsonResponse({"reservations": serializer.data}, status=200)
+    return FastJsonResponse(response, status=200)
 
 def get_tables(request):
     if not request.method == "GET":
@@ -46,10 +73,20 @@ def get_tables(request):
     if not request.user.is_authenticated:
         return HttpResponse(status=401)
 
+    since, error = parse_since(request)
+    if error:
+        return error
+
+    cursor = get_sync_cursor()
     tables = Table.objects.all()
-    serializer = ReadTableSerializer(tables, many=True)
+    if since:
+        tables = tables.filter(updated_at__gte=since)
 
-    return JsonResponse({"tables": serializer.data}, status=200)
+    response = {"tables": build_tables(table_values(tables)), "cursor": cursor}
+    if since:
+        response["deleted"] = {"tables": get_deleted_ids(Table, since)}
+
+    return FastJsonResponse(response, status=200)
 
 def get_available_tables(request):
     """
@@ -65,7 +102,7 @@ def get_available_tables(request):
         return HttpResponse(status=401)
 
     # Get all tables
-    all_tables = Table.objects.all()
+    all_tables = Table.objects.with_active_bill_code()
     
     # Get IDs of tables that are currently in use by active bills
     occupied_table_ids = Bill.objects.filter(
@@ -97,8 +134,51 @@ def get_bills(request):
     if not request.user.is_authenticated or not (request.user.is_admin or request.user.is_kitchen):
         return HttpResponse(status=401)
 
-    bills = Bill.objects.prefetch_related('plates__plate').all()
-    serializer = ReadBillSerializer(bills, many=True)
+    since, error = parse_since(request)
+    if error:
+        return error
+
+    bills, error = filter_list(Bill.objects.all(), request)
+    if error:
+        return error
 
-    return JsonResponse({"bills": serializer.data}, status=200)
+    cursor = get_sync_cursor()
+    if since:
+        bills = filter_bills_changed_since(bills, since)
+
+    bills, next_cursor, error = paginate(bill_values(bills), request, order_field="date_time")
+    if error:
+        return error
+
+    response = {"bills": build_bills(bills), "cursor": cursor, "next_cursor": next_cursor}
+    if since:
+        response["deleted"] = get_deleted_bill_ids(since)
+
+    return FastJsonResponse(response, status=200)
+
+
+def filter_bills_changed_since(bills, since):
+    """Bills updated after since, or with a plate added/changed after since."""
+    changed_plates = BillPlate.objects.filter(updated_at__gte=since).values("account_id")
+    return bills.filter(Q(updated_at__gte=since) | Q(id__in=changed_plates))
+
+
+def get_deleted_bill_ids(since, waiter=None):
+    """
+    Bills and plates that left the list since since. For a waiter, only the ones of their own bills,
+    including bills reassigned to another waiter. Bills that are in the list again are left out.
+    """
+    listed = Bill.objects.all() if waiter is None else Bill.objects.filter(waiter=waiter)
+    records = DeletedRecord.objects.filter(deleted_at__gte=since)
+    if waiter is not None:
+        records = records.filter(waiter_id=waiter.pk)
+
+    return {
+        "bills": list(
+            records.filter(model=Bill._meta.label_lower)
+            .exclude(object_id__in=listed.values("id"))
+            .values_list("object_id", flat=True)
+        ),
+        "bill_plates": list(records.filter(model=BillPlate._meta.label_lower).values_list("object_id", flat=True)),
+    }
 
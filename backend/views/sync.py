@@ -0,0 +1,50 @@
+## Funciones para la sincronizacion incremental (parametro since=) de los endpoints de listas
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from backend.models import DeletedRecord
+
+
+def parse_since(request):
+    """
+    Read the since= cursor from the query string.
+    Returns a (since, error_response) tuple; since is None when the parameter isn't given.
+    """
+    since = request.GET.get("since")
+    if not since:
+        return None, None
+
+    try:
+        parsed = parse_datetime(since)
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        return None, JsonResponse({"error": "since must be an ISO 8601 datetime"}, status=400)
+
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+
+    return parsed, None
+
+
+def get_sync_cursor():
+    """
+    Cursor the client sends back as since= on its next sync. It must be taken before querying.
+    It is moved back a few seconds so rows committed by transactions that were still open
+    are not missed; the client may get a few rows twice, which is harmless.
+    """
+    overlap = getattr(settings, "SYNC_CURSOR_OVERLAP_SECONDS", 5)
+    cursor = timezone.now() - timedelta(seconds=overlap)
+    return cursor.astimezone(dt_timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def get_deleted_ids(model, since):
+    """Ids of the rows of model deleted at or after since."""
+    return list(
+        DeletedRecord.objects.filter(model=model._meta.label_lower, deleted_at__gte=since)
+        .values_list("object_id", flat=True)
+    )
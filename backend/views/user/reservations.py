@@ -1,7 +1,9 @@
 import json
+from datetime import date
 from django.http import HttpResponse, JsonResponse
 
-from backend.models import Reservation
+from backend.availability import AvailabilityIndex
+from backend.models import Reservation, TableArea
 from backend.serializers.reservations import UserCreateReservationSerializer, ReadReservationSerializer
 from backend.views.user.validators import validate_user_reservation, validate_edit_user_reservation
 
@@ -128,12 +130,12 @@ def get_user_reservations(request):
     
     # If user is authenticated, use their email
     if request.user.is_authenticated:
-        reservations = Reservation.objects.filter(email=request.user.email).order_by("-date_time")
+        reservations = Reservation.objects.with_related().filter(email=request.user.email).order_by("-date_time")
     elif email:
         # Email takes priority if both email and phone_number are provided
-        reservations = Reservation.objects.filter(email=email).order_by("-date_time")
+        reservations = Reservation.objects.with_related().filter(email=email).order_by("-date_time")
     elif phone_number:
-        reservations = Reservation.objects.filter(phone_number=phone_number).order_by("-date_time")
+        reservations = Reservation.objects.with_related().filter(phone_number=phone_number).order_by("-date_time")
     else:
         return JsonResponse({"error": "Authentication required, or email/phone_number parameter needed"}, status=400)
 
@@ -224,3 +226,39 @@ def cancel_user_reservation(request):
     serializer = ReadReservationSerializer(reservation)
     return JsonResponse(serializer.data, status=201)
 
+
+
+def get_availability(request):
+    """
+    Open reservation slots of a whole day for a party size, optionally in one table area.
+    Query params: date (YYYY-MM-DD, restaurant time), amount_people, table_area (label).
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+
+    try:
+        day = date.fromisoformat(request.GET.get("date", ""))
+    except ValueError:
+        return JsonResponse({"error": "date must be YYYY-MM-DD"}, status=400)
+
+    try:
+        amount_people = int(request.GET.get("amount_people", ""))
+    except ValueError:
+        amount_people = 0
+    if amount_people <= 0:
+        return JsonResponse({"error": "amount_people must be a positive integer"}, status=400)
+
+    area_id = None
+    table_area = request.GET.get("table_area")
+    if table_area:
+        area_id = TableArea.objects.filter(label=table_area).values_list("id", flat=True).first()
+        if area_id is None:
+            return JsonResponse({"error": "Table area not found"}, status=404)
+
+    index = AvailabilityIndex.for_day(day)
+    slots = [
+        {"date_time": slot.isoformat(), "available": available}
+        for slot, available in index.open_slots(day, amount_people, area_id)
+    ]
+
+    return JsonResponse({"date": day.isoformat(), "slots": slots}, status=200)
@@ -1,5 +1,8 @@
+from django.conf import settings
+
+from backend.availability import find_best_available_table
 from backend.models import Bill, Plate, Reservation, Table
-from django.utils import timezone
+from backend.restaurant_time import restaurant_today, to_restaurant_time
 
 
 def validate_add_plate_to_bill(bill_id, data, user):
@@ -28,7 +31,7 @@ def validate_add_plate_to_bill(bill_id, data, user):
 
     # Validate bill exists and belongs to waiter
     try:
-        bill = Bill.objects.prefetch_related('plates__plate').get(id=bill_id, waiter=user)
+        bill = Bill.objects.select_related("table").get(id=bill_id, waiter=user)
         result["bill"] = bill
     except Bill.DoesNotExist:
         result["bill_valid"] = "Bill not found"
@@ -58,6 +61,7 @@ def validate_add_plate_to_bill(bill_id, data, user):
         return result
 
     # Validate quantity
+    max_quantity = getattr(settings, "BILL_MAX_PLATE_QUANTITY", 50)
     quantity = data.get("quantity", 1)
     try:
         quantity = int(quantity)
@@ -65,6 +69,10 @@ def validate_add_plate_to_bill(bill_id, data, user):
             result["quantity_valid"] = "quantity must be at least 1"
             result["okay"] = False
             return result
+        if quantity > max_quantity:
+            result["quantity_valid"] = f"quantity must be at most {max_quantity}"
+            result["okay"] = False
+            return result
         result["quantity"] = quantity
     except (ValueError, TypeError):
         result["quantity_valid"] = "quantity must be a valid integer"
@@ -72,8 +80,12 @@ def validate_add_plate_to_bill(bill_id, data, user):
         return result
 
     # Validate notes (optional, max length 1024)
-    notes = data.get("notes", "")
-    if notes and len(notes) > 1024:
+    notes = data.get("notes") or ""
+    if not isinstance(notes, str):
+        result["notes_valid"] = "notes must be a string"
+        result["okay"] = False
+        return result
+    if len(notes) > 1024:
         result["notes_valid"] = "notes must be less than 1024 characters"
         result["okay"] = False
         return result
@@ -82,6 +94,100 @@ def validate_add_plate_to_bill(bill_id, data, user):
     return result
 
 
+def validate_add_plates_to_bill(bill_id, data, user):
+    """
+    Validate adding several plates to a bill in one request.
+    data must have an "items" list of {"plate_id", "quantity", "notes"} objects.
+    Returns a dictionary with validation results, the bill and the validated lines
+    (plate object, quantity, notes) if valid. Plates are loaded with a single query.
+    """
+    result = {
+        "bill_valid": True,
+        "bill": None,
+        "items_valid": True,
+        "items": [],
+        "okay": True
+    }
+
+    # Validate bill exists, belongs to waiter and is not closed
+    try:
+        bill = Bill.objects.select_related("table").get(id=bill_id, waiter=user)
+        result["bill"] = bill
+    except Bill.DoesNotExist:
+        result["bill_valid"] = "Bill not found"
+        result["okay"] = False
+        return result
+
+    if bill.state == "closed":
+        result["bill_valid"] = "Cannot add plates to a closed bill"
+        result["okay"] = False
+        return result
+
+    items = data.get("items")
+    if not isinstance(items, list) or not items:
+        result["items_valid"] = "items must be a non-empty list"
+        result["okay"] = False
+        return result
+
+    plate_ids = set()
+    for item in items:
+        if isinstance(item, dict):
+            try:
+                plate_ids.add(int(item.get("plate_id")))
+            except (ValueError, TypeError):
+                pass
+    plates = Plate.objects.in_bulk(plate_ids)
+
+    max_quantity = getattr(settings, "BILL_MAX_PLATE_QUANTITY", 50)
+    lines = []
+    total_quantity = 0
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            result["items_valid"] = f"items[{index}]: must be an object"
+            result["okay"] = False
+            return result
+
+        try:
+            plate = plates.get(int(item.get("plate_id")))
+        except (ValueError, TypeError):
+            plate = None
+        if plate is None:
+            result["items_valid"] = f"items[{index}]: Plate not found"
+            result["okay"] = False
+            return result
+
+        try:
+            quantity = int(item.get("quantity", 1))
+        except (ValueError, TypeError):
+            result["items_valid"] = f"items[{index}]: quantity must be a valid integer"
+            result["okay"] = False
+            return result
+        if quantity < 1:
+            result["items_valid"] = f"items[{index}]: quantity must be at least 1"
+            result["okay"] = False
+            return result
+        total_quantity += quantity
+        if total_quantity > max_quantity:
+            result["items_valid"] = f"items: at most {max_quantity} plates can be added per request"
+            result["okay"] = False
+            return result
+
+        notes = item.get("notes") or ""
+        if not isinstance(notes, str):
+            result["items_valid"] = f"items[{index}]: notes must be a string"
+            result["okay"] = False
+            return result
+        if len(notes) > 1024:
+            result["items_valid"] = f"items[{index}]: notes must be less than 1024 characters"
+            result["okay"] = False
+            return result
+
+        lines.append((plate, quantity, notes))
+
+    result["items"] = lines
+    return result
+
+
 def validate_finalize_bill(bill_id, data, user):
     """
     Validate finalizing a bill.
@@ -165,9 +271,11 @@ def validate_finalize_bill(bill_id, data, user):
     return result
 
 
-def validate_assign_table_to_reservation(reservation_id, table_code, user):
+def validate_assign_table_to_reservation(reservation_id, table_code, user, auto=False):
     """
     Validate assigning a table to a reservation.
+    With auto=True and no table_code, the smallest available table that fits the party
+    (in the reservation's preferred area when possible) is picked.
     Returns a dictionary with validation results and the reservation/table objects if valid.
     Error messages are assigned to keys when validation fails.
     """
@@ -201,24 +309,21 @@ def validate_assign_table_to_reservation(reservation_id, table_code, user):
         return result
 
     # Validate reservation is for today (in restaurant's local timezone)
-    import pytz
-    restaurant_tz = pytz.timezone('America/Mexico_City')
-    today_local = timezone.now().astimezone(restaurant_tz).date()
-    
-    # Convert reservation date_time to restaurant's local timezone for comparison
-    if reservation.date_time.tzinfo:
-        reservation_date_local = reservation.date_time.astimezone(restaurant_tz).date()
-    else:
-        # If naive, assume UTC
-        from django.utils import timezone as tz
-        utc_dt = tz.make_aware(reservation.date_time, tz.utc)
-        reservation_date_local = utc_dt.astimezone(restaurant_tz).date()
-    
-    if reservation_date_local != today_local:
+    if to_restaurant_time(reservation.date_time).date() != restaurant_today():
         result["reservation_valid"] = "Reservation is not for today"
         result["okay"] = False
         return result
 
+    # Auto-seating: la mesa mas chica disponible donde quepan, de preferencia en el area pedida
+    if auto and not table_code:
+        table = find_best_available_table(reservation.amount_people, reservation.table_area_id)
+        if table is None:
+            result["table_code_valid"] = f"No available table fits {reservation.amount_people} people"
+            result["okay"] = False
+            return result
+        result["table"] = table
+        return result
+
     # Validate table_code
     if not table_code:
         result["table_code_valid"] = "table_code is required"
@@ -1,10 +1,18 @@
 import json
+from django.db import transaction
+from django.db.models import F
 from django.http import JsonResponse, HttpResponse
+from django.utils import timezone
 
-from backend.models import Bill, Table, Reservation
-from backend.serializers.bills import ReadBillSerializer, CreateBillPlateSerializer
-from backend.views.validators import validate_add_plate_to_bill, validate_finalize_bill
-from backend.views.admin.utils import generate_bill_code, get_waiter_with_least_bills
+from backend.models import Bill, BillPlate, Table, Reservation, KitchenEvent
+from backend.reports import record_closed_bill, record_covers
+from backend.table_state import OCCUPIED, WALK_IN_STATES, occupy_table, release_table
+from backend.views.validators import validate_add_plate_to_bill, validate_add_plates_to_bill, validate_finalize_bill
+from backend.views.admin.utils import generate_bill_code, get_waiter_with_least_bills, save_with_unique_code
+from backend.views.kitchen.utils import record_kitchen_events
+from backend.views.rendering import FastJsonResponse, bill_values, build_bill, build_bills
+from backend.views.shared import filter_bills_changed_since, get_deleted_bill_ids
+from backend.views.sync import parse_since, get_sync_cursor
 
 
 def create_bill(request):
@@ -35,37 +43,30 @@ def create_bill(request):
     except Table.DoesNotExist:
         return JsonResponse({"error": "Table not found"}, status=404)
 
-    # Check if table is already occupied by an active bill
-    if Bill.objects.filter(table=table, state="current").exists():
-        return JsonResponse({"error": "Table is already occupied"}, status=400)
-
     # Automatically select waiter with least bills
-    waiter = get_waiter_with_least_bills()
+    waiter = get_waiter_with_least_bills(table)
     if waiter is None:
         return JsonResponse({"error": "No waiters available to assign"}, status=500)
 
-    # Generate bill code
-    bill_code = generate_bill_code()
-
-    # Create bill
-    bill = Bill.objects.create(
-        code=bill_code,
-        table=table,
-        waiter=waiter,
-        state="current",
-        total=0.0,
-        total_paid=0.0,
-        tip=0
-    )
-
-    # Mark table as occupied
-    table.state = "occupied"
-    table.save()
+    with transaction.atomic():
+        # Ocupar la mesa y crear la cuenta juntos: si dos meseros abren la misma mesa, solo uno gana
+        if not occupy_table(table.id, from_states=WALK_IN_STATES):
+            return JsonResponse({"error": "Table is already occupied"}, status=400)
+        table.state = OCCUPIED
+
+        # Create bill (the code is generated when inserting)
+        bill = Bill(
+            table=table,
+            waiter=waiter,
+            state="current",
+            total=0.0,
+            total_paid=0.0,
+            tip=0
+        )
+        save_with_unique_code(bill, generate_bill_code)
 
     # Return created bill
-    bill.refresh_from_db()
-    serializer = ReadBillSerializer(bill)
-    return JsonResponse(serializer.data, status=201)
+    return JsonResponse(build_bill(bill.id), status=201)
 
 
 def get_waiter_bills(request):
@@ -79,11 +80,21 @@ def get_waiter_bills(request):
     if not request.user.is_authenticated or not request.user.is_waiter:
         return HttpResponse(status=401)
 
+    since, error = parse_since(request)
+    if error:
+        return error
+
+    cursor = get_sync_cursor()
     # Filter bills by the current waiter user
-    bills = Bill.objects.prefetch_related('plates__plate').filter(waiter=request.user)
-    serializer = ReadBillSerializer(bills, many=True)
+    bills = Bill.objects.filter(waiter=request.user)
+    if since:
+        bills = filter_bills_changed_since(bills, since)
+
+    response = {"bills": build_bills(bill_values(bills)), "cursor": cursor}
+    if since:
+        response["deleted"] = get_deleted_bill_ids(since, waiter=request.user)
 
-    return JsonResponse({"bills": serializer.data}, status=200)
+    return FastJsonResponse(response, status=200)
 
 
 def get_waiter_bill(request, bill_id):
@@ -97,13 +108,40 @@ def get_waiter_bill(request, bill_id):
     if not request.user.is_authenticated or not request.user.is_waiter:
         return HttpResponse(status=401)
 
-    try:
-        # Get bill and verify it belongs to the current waiter
-        bill = Bill.objects.prefetch_related('plates__plate').get(id=bill_id, waiter=request.user)
-        serializer = ReadBillSerializer(bill)
-        return JsonResponse(serializer.data, status=200)
-    except Bill.DoesNotExist:
+    # Get bill and verify it belongs to the current waiter
+    bills = build_bills(bill_values(Bill.objects.filter(id=bill_id, waiter=request.user)))
+    if not bills:
         return JsonResponse({"error": "Bill not found"}, status=404)
+    return JsonResponse(bills[0], status=200)
+
+
+def _create_bill_plates(bill, lines):
+    """
+    Create the BillPlate rows for a list of (plate, quantity, notes) lines with one bulk_create,
+    and add their price to the bill total with an F() expression, in a single transaction.
+    Concurrent waiters adding to the same bill can't lose each other's total update.
+    Returns the created bill plates, or None if the bill was closed in the meantime.
+    """
+    added_total = sum(plate.price * quantity for plate, quantity, _ in lines)
+
+    with transaction.atomic():
+        updated = Bill.objects.filter(id=bill.id).exclude(state="closed").update(
+            total=F("total") + added_total,
+            updated_at=timezone.now()
+        )
+        if not updated:
+            return None
+
+        bill_plates = BillPlate.objects.bulk_create([
+            BillPlate(plate=plate, account=bill, notes=notes)
+            for plate, quantity, notes in lines
+            for _ in range(quantity)
+        ])
+
+        # Avisar a la pantalla de cocina
+        record_kitchen_events(KitchenEvent.PLATE_ADDED, bill_plates)
+
+    return bill_plates
 
 
 def add_plate_to_bill(request, bill_id):
@@ -142,29 +180,47 @@ def add_plate_to_bill(request, bill_id):
     quantity = validation_result["quantity"]
     notes = validation_result["notes"]
 
-    # Create BillPlate objects (one per quantity)
-    created_bill_plates = []
-    for _ in range(quantity):
-        bill_plate_data = {
-            "plate_id": plate.id,
-            "notes": notes,
-        }
-        serializer = CreateBillPlateSerializer(data=bill_plate_data)
-        if not serializer.is_valid():
-            return JsonResponse(serializer.errors, status=400)
-        
-        bill_plate = serializer.save(account=bill)
-        created_bill_plates.append(bill_plate)
+    # Create BillPlate objects (one per quantity) and update the bill total
+    if _create_bill_plates(bill, [(plate, quantity, notes)]) is None:
+        return JsonResponse({"bill_valid": "Cannot add plates to a closed bill"}, status=400)
+
+    # Return updated bill
+    return JsonResponse(build_bill(bill_id), status=200)
+
+
+def add_plates_to_bill(request, bill_id):
+    """
+    Add several plates to a bill in one request. Only accessible to authenticated waiters who own the bill.
+    Expects {"items": [{"plate_id": 1, "quantity": 2, "notes": ""}, ...]}.
+    All BillPlate objects are created with one insert and the total is updated atomically.
+    """
+    if not request.method == "POST":
+        return HttpResponse(status=405)
+
+    if not request.user.is_authenticated or not request.user.is_waiter:
+        return HttpResponse(status=401)
+
+    try:
+        data = json.loads(request.body)
+    except json.JSONDecodeError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
 
-    # Update bill total
-    bill.total += plate.price * quantity
-    bill.save()
+    validation_result = validate_add_plates_to_bill(bill_id, data, request.user)
+
+    if not validation_result["okay"]:
+        response_data = validation_result.copy()
+        response_data.pop("bill", None)
+        response_data.pop("items", None)
+        response_data.pop("okay", None)
+        return JsonResponse(response_data, status=400)
+
+    bill = validation_result["bill"]
+
+    if _create_bill_plates(bill, validation_result["items"]) is None:
+        return JsonResponse({"bill_valid": "Cannot add plates to a closed bill"}, status=400)
 
     # Return updated bill
-    bill.refresh_from_db()
-    bill = Bill.objects.prefetch_related('plates__plate').get(id=bill_id)
-    serializer = ReadBillSerializer(bill)
-    return JsonResponse(serializer.data, status=200)
+    return JsonResponse(build_bill(bill_id), status=200)
 
 
 def finalize_bill(request, bill_id):
@@ -200,27 +256,36 @@ def finalize_bill(request, bill_id):
     amount_paid = validation_result["amount_paid"]
     tip_percentage = validation_result["tip_percentage"]
 
-    # Update bill
-    bill.state = "closed"
-    bill.total_paid = amount_paid
-    bill.tip = int(tip_percentage)
-    bill.save()
-
-    # If bill has a table, free it (set to available) and update associated reservations
-    if bill.table:
-        bill.table.state = 'available'
-        bill.table.save()
-        
-        # Update associated reservations: find reservations with the same table that are in "in_course" state
-        # and update them to "finalized"
-        reservations_to_update = Reservation.objects.filter(
-            table=bill.table,
-            state="in_course"
+    with transaction.atomic():
+        # Update bill: solo si sigue abierta, asi dos cierres al mismo tiempo no se cuentan dos veces
+        bill.state = "closed"
+        bill.total_paid = amount_paid
+        bill.tip = int(tip_percentage)
+        bill.closed_at = timezone.now()
+        closed = Bill.objects.filter(id=bill.id).exclude(state="closed").update(
+            state=bill.state, total_paid=bill.total_paid, tip=bill.tip, closed_at=bill.closed_at, updated_at=bill.closed_at
         )
-        reservations_to_update.update(state="finalized")
+        if not closed:
+            return JsonResponse({"bill_valid": "Bill is already closed"}, status=400)
+
+        # If bill has a table, free it (set to available) and update associated reservations
+        if bill.table_id:
+            release_table(bill.table_id)
+            
+            # Update associated reservations: find reservations with the same table that are in "in_course" state
+            # and update them to "finalized"
+            finalized = list(
+                Reservation.objects.select_for_update()
+                .filter(table_id=bill.table_id, state="in_course")
+                .values_list("id", "date_time", "amount_people")
+            )
+            Reservation.objects.filter(id__in=[row[0] for row in finalized]).update(
+                state="finalized", updated_at=timezone.now()
+            )
+            record_covers([row[1:] for row in finalized])
+
+        # Sumar la cuenta a los reportes del dia, releyendo el total ya cerrado
+        record_closed_bill(bill.id)
 
     # Return updated bill
-    bill.refresh_from_db()
-    bill = Bill.objects.prefetch_related('plates__plate').get(id=bill_id)
-    serializer = ReadBillSerializer(bill)
-    return JsonResponse(serializer.data, status=200)
+    return JsonResponse(build_bill(bill_id), status=200)
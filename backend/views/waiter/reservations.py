@@ -1,11 +1,14 @@
 import json
-from datetime import datetime
+from django.db import transaction
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
+from backend.availability import AvailabilityIndex
+from backend.restaurant_time import format_restaurant_datetimes, restaurant_day_bounds, restaurant_today
+from backend.table_state import occupy_table
 from backend.models import Reservation, Table, Bill
 from backend.serializers.reservations import ReadReservationSerializer
 from backend.views.validators import validate_assign_table_to_reservation
-from backend.views.admin.utils import generate_bill_code, get_waiter_with_least_bills
+from backend.views.admin.utils import generate_bill_code, get_waiter_with_least_bills, save_with_unique_code
 
 
 def get_waiter_reservations(request):
@@ -14,32 +17,13 @@ def get_waiter_reservations(request):
     if not request.user.is_authenticated or not (request.user.is_waiter or request.user.is_kitchen or request.user.is_admin):
         return HttpResponse(status=401)
     
-    # Get today's date in restaurant's local timezone (America/Mexico_City)
-    import pytz
-    from datetime import datetime
-    restaurant_tz = pytz.timezone('America/Mexico_City')
-    utc_tz = pytz.UTC
+    # Today in the restaurant's local timezone
+    start_of_day, end_of_day = restaurant_day_bounds(restaurant_today())
     
-    # Get current time in restaurant's timezone
-    now_local = timezone.now().astimezone(restaurant_tz)
-    today_local = now_local.date()
-    
-    # Create start and end of day in restaurant's timezone, then convert to UTC for filtering
-    start_of_day_local = restaurant_tz.localize(
-        datetime.combine(today_local, datetime.min.time())
-    )
-    end_of_day_local = restaurant_tz.localize(
-        datetime.combine(today_local, datetime.max.time())
-    )
-    
-    # Convert to UTC for database query
-    start_of_day_utc = start_of_day_local.astimezone(utc_tz)
-    end_of_day_utc = end_of_day_local.astimezone(utc_tz)
-    
-    reservations = Reservation.objects.filter(
+    reservations = Reservation.objects.with_related().filter(
         state="active",
-        date_time__gte=start_of_day_utc,
-        date_time__lte=end_of_day_utc
+        date_time__gte=start_of_day,
+        date_time__lt=end_of_day
     ).order_by('date_time')
     
     serializer = ReadReservationSerializer(reservations, many=True)
@@ -58,8 +42,10 @@ def assign_table_to_reservation(request, reservation_id):
         return JsonResponse({"error": "Invalid JSON"}, status=400)
     
     table_code = data.get("table_code")
+    # Sin table_code y con auto=true se escoge la mesa automaticamente
+    auto = data.get("auto", False) is True
     
-    validation_result = validate_assign_table_to_reservation(reservation_id, table_code, request.user)
+    validation_result = validate_assign_table_to_reservation(reservation_id, table_code, request.user, auto=auto)
     
     if not validation_result["okay"]:
         response_data = validation_result.copy()
@@ -71,36 +57,74 @@ def assign_table_to_reservation(request, reservation_id):
     reservation = validation_result["reservation"]
     table = validation_result["table"]
     
-    reservation.table = table
-    reservation.state = "in_course"  # Change state to indicate reservation is in progress
-    reservation.save()
-    
-    # Mark table as occupied when assigned to a reservation
-    table.state = "occupied"
-    table.save()
-    
     # Create bill automatically after table assignment
     # Find waiter with least number of current bills
-    waiter = get_waiter_with_least_bills()
+    waiter = get_waiter_with_least_bills(table)
     
     if waiter is None:
         # If no waiters available, return error
         return JsonResponse({"error": "No waiters available to assign"}, status=500)
     
-    # Generate bill code
-    bill_code = generate_bill_code()
-    
-    # Create bill
-    bill = Bill.objects.create(
-        code=bill_code,
-        table=table,
-        waiter=waiter,
-        state="current",
-        total=0.0,
-        total_paid=0.0,
-        tip=0
-    )
+    with transaction.atomic():
+        # Mark table as occupied when assigned to a reservation (solo si sigue disponible)
+        if not occupy_table(table.id):
+            return JsonResponse({"table_code_valid": "Table is no longer available"}, status=400)
+        
+        # Change state to indicate reservation is in progress (solo si nadie la asigno antes)
+        assigned = Reservation.objects.filter(id=reservation.id, state="active").update(
+            table=table, state="in_course", updated_at=timezone.now()
+        )
+        if not assigned:
+            # Deshace la mesa ocupada
+            transaction.set_rollback(True)
+            return JsonResponse({"reservation_valid": "Reservation is not active"}, status=400)
+        
+        # Create bill (the code is generated when inserting)
+        bill = Bill(
+            table=table,
+            waiter=waiter,
+            state="current",
+            total=0.0,
+            total_paid=0.0,
+            tip=0
+        )
+        save_with_unique_code(bill, generate_bill_code)
     
     reservation.refresh_from_db()
     serializer = ReadReservationSerializer(reservation)
     return JsonResponse(serializer.data, status=200)
+
+
+def get_seating_plan(request):
+    """
+    Suggested table for each of today's active reservations that doesn't have one yet.
+    All of them are planned at once, best-fit in arrival order, on the day's availability index.
+    """
+    if not request.method == "GET":
+        return HttpResponse(status=405)
+    if not request.user.is_authenticated or not (request.user.is_waiter or request.user.is_admin):
+        return HttpResponse(status=401)
+
+    today = restaurant_today()
+    index = AvailabilityIndex.for_day(today)
+
+    start_of_day, end_of_day = restaurant_day_bounds(today)
+    reservations = list(Reservation.objects.filter(
+        state="active",
+        table__isnull=True,
+        date_time__gte=start_of_day,
+        date_time__lt=end_of_day,
+    ).values("id", "code", "name", "date_time", "amount_people").order_by("date_time", "id"))
+
+    date_times = format_restaurant_datetimes([reservation["date_time"] for reservation in reservations])
+    plan = []
+    for reservation, date_time in zip(reservations, date_times):
+        table = index.assignments.get(reservation["id"])
+        plan.append({
+            **reservation,
+            "date_time": date_time,
+            "table_code": table.code if table else None,
+        })
+
+    unplaced = sum(1 for item in plan if item["table_code"] is None)
+    return JsonResponse({"plan": plan, "unplaced": unplaced}, status=200)
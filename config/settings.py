@@ -13,20 +13,46 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-# Quick-start development settings - unsuitable for production
+
+def env_bool(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+# Perfil de configuracion: "development" (por defecto: SQLite, DEBUG) o "production" (PostgreSQL, sin DEBUG).
+# Cualquier valor se puede sobreescribir con las variables DINELY_* de abajo.
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
+PROFILE = os.environ.get("DINELY_PROFILE", "development")
+if PROFILE not in ("development", "production"):
+    raise ImproperlyConfigured("DINELY_PROFILE must be 'development' or 'production'")
+IS_PRODUCTION = PROFILE == "production"
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-zqxv0q1n+p2y(hq)v+i3q+*dknb%h$pemp0*g=c385vw59lva*'
+SECRET_KEY = os.environ.get("DINELY_SECRET_KEY")
+if not SECRET_KEY:
+    if IS_PRODUCTION:
+        raise ImproperlyConfigured("DINELY_SECRET_KEY is required in production")
+    SECRET_KEY = 'django-insecure-zqxv0q1n+p2y(hq)v+i3q+*dknb%h$pemp0*g=c385vw59lva*'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool("DINELY_DEBUG", not IS_PRODUCTION)
 
-ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+ALLOWED_HOSTS = env_list("DINELY_ALLOWED_HOSTS", ['localhost', '127.0.0.1'])
 
 # Application definition
 
@@ -43,7 +69,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero para medir la peticion completa; no hace nada si PROFILING_ENABLED es False
+    "backend.profiling.ProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    # Antes de sesiones y autenticacion: los intentos de mas se rechazan sin tocar la base de datos
+    "backend.throttling.ThrottleMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,19 +84,75 @@ MIDDLEWARE = [
 ]
 
 # CORS
-CORS_ALLOWED_ORIGINS = [
+CORS_ALLOWED_ORIGINS = env_list("DINELY_CORS_ALLOWED_ORIGINS", [
     "http://127.0.0.1:5173",
     "http://localhost:5173",
-]
+])
 CORS_ALLOW_CREDENTIALS = True 
 
-CSRF_TRUSTED_ORIGINS = [
-    "http://127.0.0.1:5173",
-    "http://localhost:5173",
-]
+CSRF_TRUSTED_ORIGINS = env_list("DINELY_CSRF_TRUSTED_ORIGINS", CORS_ALLOWED_ORIGINS)
 
 AUTH_USER_MODEL = "backend.User"
 
+# Un solo backend: el ModelBackend de Django con un cache corto del usuario por proceso
+AUTHENTICATION_BACKENDS = ["backend.auth_backends.CachedModelBackend"]
+USER_CACHE_SECONDS = 30
+
+# Cache: "locmem" (por proceso, solo para un worker), "redis" (pip install redis), "memcached" (pip install pymemcache)
+# o "db" (DatabaseCache, requiere python manage.py createcachetable). Con varios workers tiene que ser compartido:
+# las sesiones cached_db, la version del menu y THROTTLE_STORE = CacheStore viven aqui.
+CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", ""),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+    "memcached": ("django.core.cache.backends.memcached.PyMemcacheCache", "127.0.0.1:11211"),
+    "db": ("django.core.cache.backends.db.DatabaseCache", "dinely_cache"),
+}
+CACHE_BACKEND = os.environ.get("DINELY_CACHE_BACKEND", "locmem")
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(f"DINELY_CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}")
+CACHE_IS_SHARED = CACHE_BACKEND != "locmem"
+if IS_PRODUCTION and not CACHE_IS_SHARED:
+    raise ImproperlyConfigured("production needs a cache shared by every worker: set DINELY_CACHE_BACKEND to redis, memcached or db")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": os.environ.get("DINELY_CACHE_LOCATION", CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+
+# Sesiones: "cached_db" lee del cache y solo va a la base de datos si no esta ahi; solo es seguro con un cache
+# compartido (si no, una sesion cerrada en un worker sigue valida en otro). Sin cache compartido: "db".
+# "django.contrib.sessions.backends.signed_cookies" no usa base de datos ni cache.
+SESSION_ENGINE = os.environ.get(
+    "DINELY_SESSION_ENGINE",
+    "django.contrib.sessions.backends.cached_db" if CACHE_IS_SHARED else "django.contrib.sessions.backends.db",
+)
+
+# Perfilado por vista (histogramas en admin/metrics/) y log de las peticiones que pasan el presupuesto
+PROFILING_ENABLED = env_bool("DINELY_PROFILING_ENABLED", False)
+PROFILING_QUERY_BUDGET = 20
+PROFILING_LATENCY_BUDGET_MS = 500
+
+# Limite de intentos de login/registro (token bucket por IP y por email, backend/throttling.py)
+# Con varios workers usar "backend.throttling.CacheStore" y un cache compartido (Redis, Memcached o DatabaseCache)
+THROTTLE_ENABLED = env_bool("DINELY_THROTTLE_ENABLED", True)
+THROTTLE_STORE = os.environ.get("DINELY_THROTTLE_STORE", "backend.throttling.LocalMemoryStore")
+THROTTLE_CACHE = "default"
+# LocalMemoryStore: con mas cubetas que esto borra las llenas, como mucho una vez cada THROTTLE_PRUNE_SECONDS
+THROTTLE_MAX_LOCAL_KEYS = 10000
+THROTTLE_PRUNE_SECONDS = 60
+# Solo si hay un proxy de confianza delante que pone X-Forwarded-For
+THROTTLE_TRUST_X_FORWARDED_FOR = env_bool("DINELY_THROTTLE_TRUST_X_FORWARDED_FOR", False)
+THROTTLE_PATHS = {
+    "/api/authentication/login/": "login",
+    "/api/authentication/register/": "register",
+}
+THROTTLE_RATES = {
+    "login": {"ip": "30/min", "email": "5/min"},
+    "register": {"ip": "10/hour", "email": "3/hour"},
+}
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -90,13 +176,50 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DINELY_DB_ENGINE: "sqlite" (desarrollo) o "postgres" (psycopg 3 con su pool, en requirements.txt)
+
+DB_ENGINE = os.environ.get("DINELY_DB_ENGINE", "postgres" if IS_PRODUCTION else "sqlite")
+
+if DB_ENGINE == "postgres":
+    # Conexiones persistentes: cada worker reutiliza su conexion hasta CONN_MAX_AGE segundos
+    # y la revisa antes de usarla (CONN_HEALTH_CHECKS) por si PostgreSQL o pgbouncer la cerraron.
+    # Con DINELY_DB_POOL=true se usa el pool de psycopg; Django pide CONN_MAX_AGE = 0 en ese caso.
+    DB_POOL = env_bool("DINELY_DB_POOL", False)
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get("DINELY_DB_NAME", "dinely"),
+            'USER': os.environ.get("DINELY_DB_USER", "dinely"),
+            'PASSWORD': os.environ.get("DINELY_DB_PASSWORD", ""),
+            'HOST': os.environ.get("DINELY_DB_HOST", "localhost"),
+            'PORT': os.environ.get("DINELY_DB_PORT", "5432"),
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.environ.get("DINELY_DB_CONN_MAX_AGE", "60")),
+            'CONN_HEALTH_CHECKS': env_bool("DINELY_DB_CONN_HEALTH_CHECKS", True),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get("DINELY_DB_POOL_MIN_SIZE", "2")),
+                    'max_size': int(os.environ.get("DINELY_DB_POOL_MAX_SIZE", "10")),
+                    'timeout': int(os.environ.get("DINELY_DB_POOL_TIMEOUT", "10")),
+                } if DB_POOL else False,
+            },
+        }
     }
-}
+elif DB_ENGINE == "sqlite":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get("DINELY_DB_NAME", BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL deja leer mientras alguien escribe; IMMEDIATE toma el lock de escritura al inicio
+                # de cada transaccion para esperar (timeout) en lugar de fallar con "database is locked"
+                'init_command': "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;",
+                'transaction_mode': 'IMMEDIATE',
+                'timeout': 20,
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured("DINELY_DB_ENGINE must be 'sqlite' or 'postgres'")
 
 
 # Password validation
@@ -136,17 +259,68 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / "frontend" / "dist"]
 
-FRONTEND_URL = "http://localhost:5173"
+FRONTEND_URL = os.environ.get("DINELY_FRONTEND_URL", "http://localhost:5173")
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST='smtp.gmail.com'
-EMAIL_PORT=587
-EMAIL_USE_TLS=True
-EMAIL_HOST_PASSWORD='gsotwgcxfrltqqbl'
-EMAIL_HOST_USER='louis.day9128@alumnos.udg.mx'
+# Credenciales de correo solo por variables de entorno
+EMAIL_BACKEND = os.environ.get("DINELY_EMAIL_BACKEND", 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get("DINELY_EMAIL_HOST", 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get("DINELY_EMAIL_PORT", "587"))
+EMAIL_USE_TLS = env_bool("DINELY_EMAIL_USE_TLS", True)
+EMAIL_HOST_USER = os.environ.get("DINELY_EMAIL_HOST_USER", "")
+EMAIL_HOST_PASSWORD = os.environ.get("DINELY_EMAIL_HOST_PASSWORD", "")
+
+
+# Pantalla de cocina (Server-Sent Events)
+KITCHEN_STREAM_POLL_SECONDS = 1
+KITCHEN_STREAM_MAX_SECONDS = 30
+KITCHEN_STREAM_RETRY_MS = 2000
+# Ids saltados (transacciones sin commit) que se siguen buscando, y por cuantos segundos
+KITCHEN_STREAM_MAX_GAPS = 100
+KITCHEN_STREAM_GAP_SECONDS = 10
+
+# Sincronizacion incremental (since=): segundos que se retrocede el cursor para no perder escrituras concurrentes
+SYNC_CURSOR_OVERLAP_SECONDS = 5
+
+# Paginacion por cursor (limit= / cursor=)
+PAGINATION_DEFAULT_LIMIT = 50
+PAGINATION_MAX_LIMIT = 200
+
+# Platillos que se pueden agregar a una cuenta en una sola peticion (cada uno es una fila de BillPlate)
+BILL_MAX_PLATE_QUANTITY = 50
+
+# Asignacion automatica de mesero: "least_loaded", "round_robin" o "area_affinity"
+WAITER_ASSIGNMENT_STRATEGY = "least_loaded"
+
+# Cache del menu publico (se invalida al editar platillos/categorias; la version vive en la base de datos)
+MENU_CACHE_SECONDS = 60 * 60 * 24
+
+# Disponibilidad de reservaciones (hora local del restaurante)
+RESERVATION_SEATING_MINUTES = 120
+RESERVATION_SLOT_MINUTES = 30
+RESTAURANT_OPENING_TIME = "13:00"
+RESTAURANT_LAST_SEATING_TIME = "22:00"
+
+# Outbox de correos (python manage.py send_outbox_emails)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 60
+# Un worker reclama cada lote por este tiempo; si muere a la mitad, otro lo retoma al vencer
+OUTBOX_LEASE_SECONDS = 300
+# Correos enviados/fallidos que se conservan antes de que dinely_maintenance los borre
+OUTBOX_RETENTION_DAYS = 30
+
+# Zona horaria del restaurante: fechas de reservaciones, "hoy" de los meseros, filtros por fecha
+RESTAURANT_TIME_ZONE = "America/Mexico_City"
+
+# Exportaciones en streaming: filas leidas y escritas por bloque
+EXPORT_CHUNK_SIZE = 2000
+
 
+# Mantenimiento (python manage.py dinely_maintenance): filas borradas por lote y dias de eventos de cocina guardados
+MAINTENANCE_BATCH_SIZE = 1000
+KITCHEN_EVENT_RETENTION_DAYS = 7